@@ -0,0 +1,35 @@
+"""Simple Sison CPU simulator.
+
+The core (cpu, memory, isa, assembler, tracing, ...) is pure Python; PyQt5 is
+only imported by the GUI modules (main, ui, editor, trace_viewer). The names
+below are loaded on first use so that `import cpusim.batch` and friends start
+quickly.
+"""
+from importlib import import_module
+
+__version__ = "1.0.0"
+
+EXPORTS = {
+    "CPU": "cpu",
+    "Memory": "memory",
+    "CompactMemory": "compact_memory",
+    "PagedMemory": "paged_memory",
+    "new_memory": "paged_memory",
+    "Registers": "registers",
+    "Validator": "validator",
+    "assemble": "assembler",
+    "assemble_file": "assembler",
+    "AssemblyError": "assembler",
+    "load_image": "machine_image",
+    "save_image": "machine_image",
+}
+
+
+def __getattr__(name):
+    if name in EXPORTS:
+        return getattr(import_module(f".{EXPORTS[name]}", __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(list(globals()) + list(EXPORTS))
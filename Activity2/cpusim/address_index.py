@@ -0,0 +1,62 @@
+from bisect import bisect_left, insort
+from collections import Counter
+
+
+class AddressIndex:
+    """Reference-counted index of the data addresses used by instruction rows.
+
+    Each row uses at most one address. Updating a row touches only that row's
+    old and new address, and the sorted address list is kept up to date with
+    bisection so the data panel can map rows to addresses directly.
+    """
+
+    def __init__(self):
+        self.row_address = {}  # row -> address it uses
+        self.users = Counter()  # address -> number of rows using it
+        self.sorted_addresses = []
+
+    def clear(self):
+        self.row_address.clear()
+        self.users.clear()
+        self.sorted_addresses.clear()
+
+    def set_row(self, row, address):
+        """Set the address used by row (None for no address).
+
+        Returns (added, removed): the address that became used and the one that
+        is no longer used by any row, each None if nothing changed.
+        """
+        old = self.row_address.get(row)
+        if old == address:
+            return None, None
+
+        removed = None
+        if old is not None:
+            del self.row_address[row]
+            self.users[old] -= 1
+            if not self.users[old]:
+                del self.users[old]
+                del self.sorted_addresses[bisect_left(self.sorted_addresses, old)]
+                removed = old
+
+        added = None
+        if address is not None:
+            self.row_address[row] = address
+            self.users[address] += 1
+            if self.users[address] == 1:
+                insort(self.sorted_addresses, address)
+                added = address
+        return added, removed
+
+    def position(self, address):
+        """Index of address in the sorted address list"""
+        return bisect_left(self.sorted_addresses, address)
+
+    def __contains__(self, address):
+        return address in self.users
+
+    def __len__(self):
+        return len(self.sorted_addresses)
+
+    def __iter__(self):
+        return iter(self.sorted_addresses)
@@ -0,0 +1,361 @@
+"""Assembler for the simulator's text program format.
+
+    ; Comments run from ';' or '#' to the end of the line
+            .text               ; instructions (the default section)
+    start:  LOAD count          ; operands are addresses, labels or label+N / label-N
+    loop:   SUB one
+            JZ done
+            JMP loop
+    done:   HLT
+            .data               ; data words, separated by spaces or commas
+    count:  10
+    one:    1
+            .org 200            ; move the location counter
+    table:  1, 2, 3
+
+Instructions and data words are stored apart (LOAD 0 reads the data word at
+address 0 even when address 0 holds an instruction), but both sections share
+one location counter, so a .data section follows the code before it.
+
+Sources are read a line at a time. parse() is a generator of statements and
+Assembler loads them into memory in chunks of consecutive words through
+load_instructions/load_data. Only labels, unresolved forward references and
+the address ranges in use are kept, so memory stays bounded for long files.
+Assembly does not stop at the first error: every error is collected with its
+line number and raised together in one AssemblyError.
+
+Raw mode reads the old .prog files: one instruction per line, where only
+lines starting with '#' are comments and ':', ';' and a leading '.' have no
+meaning. Instruction text that does not assemble is stored verbatim and fails
+at execute time, as it always did.
+"""
+import argparse
+import re
+import sys
+from array import array
+
+from . import isa
+from .memory import DEFAULT_MEMORY_SIZE
+from .validator import Validator
+
+CHUNK_SIZE = 4096  # Words buffered before a bulk load
+MAX_ERRORS = 100  # Errors kept for the report; the rest are only counted
+
+# Statement kinds yielded by parse()
+LABEL = "label"
+ORG = "org"
+INSTRUCTION = "instruction"
+WORDS = "words"
+ERROR = "error"
+
+NAME = re.compile(r"[A-Za-z_][A-Za-z0-9_]*$")
+LABEL_OPERAND = re.compile(r"([A-Za-z_][A-Za-z0-9_]*)\s*(?:([+-])\s*(\d+))?$")
+
+
+class AssemblyError(Exception):
+    def __init__(self, errors, total=None, name=None):
+        self.errors = errors  # (line number, message), at most MAX_ERRORS
+        self.total = total if total is not None else len(errors)
+        self.name = name
+        super().__init__("\n".join(self.lines()))
+
+    def lines(self):
+        prefix = f"{self.name}:" if self.name else "line "
+        lines = [f"{prefix}{line_number}: {message}" for line_number, message in self.errors]
+        if self.total > len(self.errors):
+            lines.append(f"... and {self.total - len(self.errors)} more errors")
+        return lines
+
+
+class Program:
+    """What an assembly run loaded: label addresses and word counts"""
+
+    def __init__(self, labels, instructions, words):
+        self.labels = labels
+        self.instructions = instructions
+        self.words = words
+
+
+def parse_operand(operand):
+    """(address, None, 0) for a number, (None, label, offset) for a label expression, or None"""
+    match = LABEL_OPERAND.match(operand)
+    if match is None:
+        try:
+            return int(operand), None, 0
+        except ValueError:
+            return None
+    name, sign, offset = match.groups()
+    offset = int(offset) if offset else 0
+    return None, name, -offset if sign == "-" else offset
+
+
+def parse(lines, raw=False):
+    """Yield (line number, kind, value) statements from source lines.
+
+    Syntax errors come out as ERROR statements so the caller sees all of them.
+    INSTRUCTION values are (mnemonic, operand text or None, source text).
+    In raw mode every line but blanks and '#' comments is an unchecked INSTRUCTION.
+    """
+    in_data = False
+    for line_number, line in enumerate(lines, 1):
+        if raw:
+            text = line.strip()
+            if text and text[0] != "#":
+                parts = text.split(None, 1)
+                yield line_number, INSTRUCTION, (parts[0], parts[1].strip() if len(parts) > 1 else None, text)
+            continue
+
+        text = line.split(";", 1)[0].split("#", 1)[0].strip()
+        if not text:
+            continue
+
+        if ":" in text:
+            name, _, text = text.partition(":")
+            name = name.strip()
+            if NAME.match(name):
+                yield line_number, LABEL, name
+            else:
+                yield line_number, ERROR, f"invalid label '{name}'"
+            text = text.strip()
+            if not text:
+                continue
+
+        if text[0] == ".":
+            parts = text.split()
+            directive = parts[0].lower()
+            if directive in (".text", ".data") and len(parts) == 1:
+                in_data = directive == ".data"
+            elif directive == ".org" and len(parts) == 2:
+                yield line_number, ORG, parts[1]
+            elif directive in (".text", ".data", ".org"):
+                yield line_number, ERROR, f"wrong number of arguments to {directive}"
+            else:
+                yield line_number, ERROR, f"unknown directive '{parts[0]}'"
+            continue
+
+        if in_data:
+            values = []
+            for value in text.replace(",", " ").split():
+                valid, value = Validator.validate_data_value(value)
+                if valid:
+                    values.append(value)
+                else:
+                    yield line_number, ERROR, f"{value}: '{text}'"
+                    break
+            else:
+                yield line_number, WORDS, values
+            continue
+
+        parts = text.split(None, 1)
+        mnemonic = parts[0].upper()
+        operand = parts[1].strip() if len(parts) > 1 else None
+        if mnemonic not in isa.OPCODES:
+            yield line_number, ERROR, f"unknown instruction '{parts[0]}'"
+            continue
+        if mnemonic == "HLT" and operand is not None:
+            yield line_number, ERROR, "HLT takes no operand"
+            continue
+        if mnemonic != "HLT" and operand is None:
+            yield line_number, ERROR, f"missing operand for {mnemonic}"
+            continue
+        yield line_number, INSTRUCTION, (mnemonic, operand, text)
+
+
+class Assembler:
+    """Loads parsed statements into a memory, see the module docstring"""
+
+    def __init__(self, memory, raw=False, name=None):
+        self.memory = memory
+        self.raw = raw
+        self.name = name
+        self.labels = {}  # name -> (address, line number)
+        self.fixups = {}  # label -> (addresses, line numbers, offsets) of forward references
+        self.errors = []
+        self.error_count = 0
+        self.location = 0
+        self.instruction_count = 0
+        self.word_count = 0
+
+        # Words waiting for a bulk load: one run of consecutive addresses of one kind
+        self.pending_kind = None
+        self.pending_start = 0
+        self.pending = []
+
+        # Address ranges written so far, by kind: [start, end, line number of the start]
+        self.ranges = {INSTRUCTION: [], WORDS: []}
+        self.overflowed = False
+
+    def error(self, line_number, message):
+        self.error_count += 1
+        if len(self.errors) < MAX_ERRORS:
+            self.errors.append((line_number, message))
+
+    def assemble(self, lines):
+        for line_number, kind, value in parse(lines, self.raw):
+            if kind == INSTRUCTION:
+                self.add_instruction(line_number, *value)
+            elif kind == WORDS:
+                for word in value:
+                    self.emit(WORDS, line_number, word)
+                self.word_count += len(value)
+            elif kind == LABEL:
+                self.define(line_number, value)
+            elif kind == ORG:
+                self.org(line_number, value)
+            else:
+                self.error(line_number, value)
+        self.flush()
+        self.resolve_fixups()
+        self.check_overlaps()
+        if self.error_count:
+            raise AssemblyError(sorted(self.errors), self.error_count, self.name)
+        return Program({name: address for name, (address, _) in self.labels.items()},
+                       self.instruction_count, self.word_count)
+
+    def define(self, line_number, name):
+        if name in self.labels:
+            self.error(line_number, f"label '{name}' already defined on line {self.labels[name][1]}")
+        else:
+            self.labels[name] = (self.location, line_number)
+
+    def org(self, line_number, operand):
+        valid, address = Validator.validate_address(operand, self.memory.size)
+        if not valid:
+            self.error(line_number, f".org: {address}")
+            return
+        self.location = address
+        self.overflowed = False
+
+    def add_instruction(self, line_number, mnemonic, operand, text):
+        self.instruction_count += 1
+        if self.raw:
+            self.emit(INSTRUCTION, line_number, text)  # Verbatim, as .prog files always were
+            return
+        if operand is None:
+            self.emit(INSTRUCTION, line_number, mnemonic)
+            return
+        parsed = parse_operand(operand)
+        if parsed is None:
+            self.error(line_number, f"invalid operand '{operand}'")
+            return
+
+        address, label, offset = parsed
+        if label is not None:
+            if label not in self.labels:
+                # Forward reference: a placeholder holds the address until it is patched
+                if self.location < self.memory.size:  # Otherwise emit reports the overflow
+                    fixups = self.fixups.get(label)
+                    if fixups is None:
+                        fixups = self.fixups[label] = (array("q"), array("q"), array("q"))
+                    fixups[0].append(self.location)
+                    fixups[1].append(line_number)
+                    fixups[2].append(offset)
+                self.emit(INSTRUCTION, line_number, mnemonic)
+                return
+            address = self.labels[label][0] + offset
+        self.emit(INSTRUCTION, line_number, self.operand_text(line_number, mnemonic, address))
+
+    def operand_text(self, line_number, mnemonic, address):
+        if not 0 <= address < self.memory.size:
+            _, message = Validator.validate_address(address, self.memory.size)
+            self.error(line_number, f"{mnemonic} operand {address}: {message}")
+        return f"{mnemonic} {address}"
+
+    def emit(self, kind, line_number, value):
+        location = self.location
+        if location >= self.memory.size:
+            if not self.overflowed:
+                self.error(line_number, f"program does not fit in memory (address {location})")
+                self.overflowed = True
+            return
+        self.location = location + 1
+
+        ranges = self.ranges[kind]
+        if ranges and ranges[-1][1] == location:
+            ranges[-1][1] = location + 1
+        else:
+            ranges.append([location, location + 1, line_number])
+
+        pending = self.pending
+        if kind != self.pending_kind or location != self.pending_start + len(pending) \
+                or len(pending) >= CHUNK_SIZE:
+            self.flush()
+            self.pending_kind = kind
+            self.pending_start = location
+        self.pending.append(value)
+
+    def flush(self):
+        if self.pending:
+            if self.pending_kind == INSTRUCTION:
+                self.memory.load_instructions(self.pending, self.pending_start)
+            else:
+                self.memory.load_data(self.pending, self.pending_start)
+            self.pending = []
+
+    def resolve_fixups(self):
+        memory = self.memory
+        for label, (addresses, line_numbers, offsets) in self.fixups.items():
+            if label not in self.labels:
+                for line_number in line_numbers:
+                    self.error(line_number, f"undefined label '{label}'")
+                continue
+            base = self.labels[label][0]
+            for address, line_number, offset in zip(addresses, line_numbers, offsets):
+                mnemonic = memory.get_instruction(address).split(None, 1)[0]
+                memory.set_instruction(address, self.operand_text(line_number, mnemonic, base + offset))
+        self.fixups = {}
+
+    def check_overlaps(self):
+        kinds = {INSTRUCTION: "instructions", WORDS: "data words"}
+        for kind, ranges in self.ranges.items():
+            ranges.sort()
+            # Compare each range with the one reaching furthest so far, not just its neighbour,
+            # so a long range still catches every later range it covers
+            furthest = None
+            for current in ranges:
+                if furthest is not None and current[0] < furthest[1]:
+                    first, second = sorted((furthest[2], current[2]))
+                    self.error(second, f"{kinds[kind]} at {current[0]}-{min(current[1], furthest[1]) - 1} "
+                                       f"overlap those from line {first}")
+                if furthest is None or current[1] > furthest[1]:
+                    furthest = current
+
+
+def assemble(lines, memory, raw=False, name=None):
+    """Assemble source lines into memory; raises AssemblyError listing every error"""
+    return Assembler(memory, raw, name).assemble(lines)
+
+
+def assemble_file(path, memory, raw=False):
+    with open(path) as f:
+        return assemble(f, memory, raw, path)
+
+
+def main(argv=None):
+    from .cpu import CPU
+    from .paged_memory import new_memory
+
+    parser = argparse.ArgumentParser(description="Check an assembly file, or assemble it into a machine image")
+    parser.add_argument("source", help="assembly file")
+    parser.add_argument("-o", "--output", help="write a machine image (.img) of the assembled program")
+    parser.add_argument("--memory-size", type=int, default=DEFAULT_MEMORY_SIZE)
+    parser.add_argument("--raw", action="store_true",
+                        help="keep instructions that do not assemble, like .prog files")
+    args = parser.parse_args(argv)
+
+    memory = new_memory(args.memory_size)
+    try:
+        program = assemble_file(args.source, memory, args.raw)
+    except AssemblyError as e:
+        sys.stderr.write(f"{e}\n")
+        return 1
+    print(f"{args.source}: {program.instructions} instructions, {program.words} data words, "
+          f"{len(program.labels)} labels")
+    if args.output:
+        from .machine_image import save_image
+        save_image(CPU(memory=memory), args.output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
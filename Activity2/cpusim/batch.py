@@ -0,0 +1,239 @@
+"""Headless batch runner: run many programs across a process pool without the GUI.
+
+Program files (*.prog) hold one instruction per line, starting at address 0;
+assembly files (*.asm, see assembler.py) may use labels and a .data section.
+Both go through the assembler, .prog files in its raw mode. An optional data
+file with the same name and a .data suffix holds "address value" pairs.
+Blank lines and lines starting with # are ignored.
+Machine images (*.img, see machine_image.py) resume a saved CPU state.
+A manifest is a JSON lines file of {"name", "program", "data"} or
+{"name", "image"} entries with paths relative to the manifest.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+from .assembler import AssemblyError, assemble_file
+from .cpu import CPU, ENGINES, INTERPRETER
+from .machine_image import ImageError, load_image
+from .memory import DEFAULT_MEMORY_SIZE
+from .paged_memory import new_memory
+from .profiler import Profile
+from .trace_file import FileTrace
+from .tracing import LEVELS, FULL
+from .validator import Validator
+
+PROGRAM_SUFFIX = ".prog"
+ASSEMBLY_SUFFIX = ".asm"
+DATA_SUFFIX = ".data"
+IMAGE_SUFFIX = ".img"
+TRACE_SUFFIX = ".trace"
+
+
+class ProgramFileError(Exception):
+    pass
+
+
+def read_lines(path):
+    with open(path) as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if line and not line.startswith("#"):
+                yield line_number, line
+
+
+def assemble_program(path, memory):
+    """Assemble a .prog or .asm file straight into memory"""
+    try:
+        return assemble_file(path, memory, raw=not path.endswith(ASSEMBLY_SUFFIX))
+    except AssemblyError as e:
+        raise ProgramFileError(str(e)) from e
+
+
+def load_data_file(path, max_memory=DEFAULT_MEMORY_SIZE):
+    data_values = {}
+    for line_number, line in read_lines(path):
+        parts = line.split()
+        if len(parts) != 2:
+            raise ProgramFileError(f"{path}:{line_number}: expected 'address value'")
+        valid, address = Validator.validate_address(parts[0], max_memory)
+        if not valid:
+            raise ProgramFileError(f"{path}:{line_number}: {address}")
+        valid, value = Validator.validate_data_value(parts[1])
+        if not valid:
+            raise ProgramFileError(f"{path}:{line_number}: {value}")
+        data_values[address] = value
+    return data_values
+
+
+def jobs_from_directory(directory):
+    for name in sorted(os.listdir(directory)):
+        if name.endswith(IMAGE_SUFFIX):
+            yield image_job(os.path.join(directory, name))
+        elif name.endswith((PROGRAM_SUFFIX, ASSEMBLY_SUFFIX)):
+            yield program_job(os.path.join(directory, name))
+
+
+def program_job(path):
+    stem = os.path.splitext(path)[0]
+    data_path = stem + DATA_SUFFIX
+    return {
+        "name": os.path.basename(stem),
+        "program": path,
+        "data": data_path if os.path.exists(data_path) else None,
+    }
+
+
+def image_job(path, name=None):
+    return {"name": name or os.path.splitext(os.path.basename(path))[0], "image": path}
+
+
+def jobs_from_manifest(manifest):
+    base = os.path.dirname(os.path.abspath(manifest))
+    for _, line in read_lines(manifest):
+        entry = json.loads(line)
+        if "image" in entry:
+            yield image_job(os.path.join(base, entry["image"]), entry.get("name"))
+            continue
+        program = os.path.join(base, entry["program"])
+        data = entry.get("data")
+        yield {
+            "name": entry.get("name", os.path.splitext(os.path.basename(program))[0]),
+            "program": program,
+            "data": os.path.join(base, data) if data else None,
+        }
+
+
+def registers_dict(cpu):
+    registers = cpu.registers
+    return {
+        "AC": registers.AC,
+        "PC": registers.PC,
+        "IR": registers.IR,
+        "MAR": registers.MAR,
+        "MDR": registers.MDR,
+    }
+
+
+def run_job(job, trace_level=FULL, engine=INTERPRETER, profiled=False,
+            memory_size=DEFAULT_MEMORY_SIZE, max_cycles=None, max_seconds=None, trace_dir=None):
+    """Run one program job and return its JSON-serializable result.
+
+    Programs get a memory of memory_size words, paged above paged_memory.DENSE_LIMIT.
+    max_cycles and max_seconds bound the run; see CPU.run_program. With trace_dir
+    every record also goes to <trace_dir>/<name>.trace, whatever the trace level.
+    """
+    result = {"name": job["name"]}
+    try:
+        if "image" in job:
+            result["image"] = job["image"]
+            cpu = load_image(job["image"], trace_level)
+            cpu.engine = engine
+        else:
+            result["program"] = job["program"]
+            cpu = CPU(trace_level, memory=new_memory(memory_size), engine=engine)
+            assemble_program(job["program"], cpu.memory)
+            if job["data"]:
+                cpu.load_program({}, load_data_file(job["data"], memory_size))
+    except (OSError, ProgramFileError, ImageError) as e:
+        result["error"] = str(e)
+        return result
+
+    if trace_dir is not None:
+        result["trace_file"] = os.path.join(trace_dir, job["name"] + TRACE_SUFFIX)
+        try:
+            cpu.trace = FileTrace(result["trace_file"], cpu)
+        except OSError as e:
+            result["error"] = str(e)
+            return result
+    start = time.perf_counter()
+    initial_data = cpu.memory.snapshot()
+    profile = Profile() if profiled else None
+    try:
+        cpu.run_program(profile=profile, max_cycles=max_cycles, max_seconds=max_seconds)
+    finally:
+        if trace_dir is not None:
+            cpu.trace.close()
+    wall_time = time.perf_counter() - start
+
+    result["registers"] = registers_dict(cpu)
+    result["halted"] = cpu.halted
+    result["cycles"] = cpu.cycles
+    if cpu.stopped:
+        result["stopped"] = cpu.stopped
+    result["memory_diff"] = {address: [old, new] for address, old, new in cpu.memory.diff(initial_data)}
+    result["wall_time"] = wall_time
+    if trace_level == FULL:
+        result["log"] = cpu.execution_log
+    if profile is not None:
+        result["profile"] = profile.report()
+    return result
+
+
+def run_batch(jobs, output, workers=None, trace_level=FULL, chunksize=16, engine=INTERPRETER,
+              profiled=False, memory_size=DEFAULT_MEMORY_SIZE, max_cycles=None, max_seconds=None,
+              trace_dir=None):
+    """Run jobs on a process pool, writing one JSON result per line to output.
+
+    A single job, or workers=1, runs in this process: starting a pool would cost
+    more than a short program.
+    """
+    arguments = (jobs, [trace_level] * len(jobs), [engine] * len(jobs), [profiled] * len(jobs),
+                 [memory_size] * len(jobs), [max_cycles] * len(jobs), [max_seconds] * len(jobs),
+                 [trace_dir] * len(jobs))
+    if len(jobs) <= 1 or workers == 1:
+        for result in map(run_job, *arguments):
+            output.write(json.dumps(result) + "\n")
+        return
+    from concurrent.futures import ProcessPoolExecutor  # Only paid for when a pool is needed
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for result in pool.map(run_job, *arguments, chunksize=chunksize):
+            output.write(json.dumps(result) + "\n")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run CPU simulator programs without the GUI")
+    parser.add_argument("source", help="directory of .prog/.asm/.data/.img files, a JSON lines manifest, "
+                                       "or one .prog/.asm/.img file")
+    parser.add_argument("-o", "--output", help="results file (default: stdout)")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="worker processes")
+    parser.add_argument("--trace", choices=sorted(LEVELS), default="off",
+                        help="trace level; 'full' includes the execution log in each result")
+    parser.add_argument("--engine", choices=ENGINES, default=INTERPRETER,
+                        help="execution engine (translate falls back to the interpreter with --trace full)")
+    parser.add_argument("--profile", action="store_true",
+                        help="include per-opcode counters and a memory access heatmap in each result")
+    parser.add_argument("--chunksize", type=int, default=16, help="jobs sent to a worker at a time")
+    parser.add_argument("--memory-size", type=int, default=DEFAULT_MEMORY_SIZE,
+                        help="words of memory for .prog/.asm jobs; large sizes use sparse paged memory")
+    parser.add_argument("--max-cycles", type=int, default=None, help="cycle budget of each job")
+    parser.add_argument("--max-seconds", type=float, default=None, help="wall-clock budget of each job")
+    parser.add_argument("--trace-dir", help="write every trace record of each job to <dir>/<name>.trace "
+                                            "(see trace_file.py)")
+    args = parser.parse_args(argv)
+
+    if os.path.isdir(args.source):
+        jobs = list(jobs_from_directory(args.source))
+    elif args.source.endswith(IMAGE_SUFFIX):
+        jobs = [image_job(args.source)]
+    elif args.source.endswith((PROGRAM_SUFFIX, ASSEMBLY_SUFFIX)):
+        jobs = [program_job(args.source)]
+    else:
+        jobs = list(jobs_from_manifest(args.source))
+
+    if args.trace_dir:
+        os.makedirs(args.trace_dir, exist_ok=True)
+    output = open(args.output, "w") if args.output else sys.stdout
+    try:
+        run_batch(jobs, output, args.workers, LEVELS[args.trace], args.chunksize, args.engine,
+                  args.profile, args.memory_size, args.max_cycles, args.max_seconds, args.trace_dir)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+
+if __name__ == "__main__":
+    main()
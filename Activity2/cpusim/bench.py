@@ -0,0 +1,275 @@
+"""Benchmarks for the simulator hot paths; runs without a display.
+
+    python -m cpusim.bench --save baseline.json
+    python -m cpusim.bench --compare baseline.json --threshold 0.10
+    python -m cpusim.bench --startup
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from .compact_memory import CompactMemory
+from .cpu import CPU, INTERPRETER, TRANSLATE
+from .memory import Memory
+from .paged_memory import PagedMemory
+from .tracing import FULL, OFF
+from .validator import Validator
+
+PROGRAM_SIZES = (64, 256, 1024, 4096)
+OPERAND_OPCODES = ("LOAD", "STORE", "ADD", "SUB")
+STARTUP_PROGRAM = "LOAD one\nADD one\nHLT\n.data\none: 1\n"
+HEADLESS_MODULES = ("batch", "assembler", "multicore", "service", "trace_file")
+
+
+def generate_program(length, memory_size, seed=0):
+    """Straight-line program of length instructions ending in HLT, data after the code"""
+    rng = random.Random(seed)
+    data_start = length
+    instructions = {}
+    for address in range(length - 1):
+        operand = rng.randrange(data_start, memory_size)
+        instructions[address] = f"{rng.choice(OPERAND_OPCODES)} {operand}"
+    instructions[length - 1] = "HLT"
+    data_values = {address: rng.randint(-1000, 1000) for address in range(data_start, memory_size)}
+    return instructions, data_values
+
+
+def memory_size_for(length):
+    return max(256, 2 * length)
+
+
+def best_time(function, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def make_cpu(length, trace_level=OFF, engine=INTERPRETER, memory_class=Memory):
+    instructions, data_values = generate_program(length, memory_size_for(length))
+    cpu = CPU(trace_level, memory=memory_class(memory_size_for(length)), engine=engine)
+    cpu.load_program(instructions, data_values)
+    return cpu
+
+
+def rerun(cpu):
+    cpu.registers.reset()
+    cpu.halted = False
+    cpu.run_program()
+
+
+def bench_run_program(results, repeat, sizes):
+    for length in sizes:
+        for engine in (INTERPRETER, TRANSLATE):
+            for level_name, level in (("off", OFF), ("full", FULL)):
+                cpu = make_cpu(length, level, engine)
+                elapsed = best_time(lambda: rerun(cpu), repeat)
+                results[f"run_program/{engine}/trace_{level_name}/{length}"] = {
+                    "value": length / elapsed, "unit": "cycles/s", "higher_is_better": True,
+                }
+        for name, memory_class in (("compact_memory", CompactMemory), ("paged_memory", PagedMemory)):
+            cpu = make_cpu(length, OFF, INTERPRETER, memory_class)
+            elapsed = best_time(lambda: rerun(cpu), repeat)
+            results[f"run_program/{name}/{length}"] = {
+                "value": length / elapsed, "unit": "cycles/s", "higher_is_better": True,
+            }
+
+
+def bench_fetch(results, repeat, count=10000):
+    cpu = make_cpu(256)
+
+    def fetch_all():
+        cpu.registers.PC = 0
+        fetch = cpu.fetch
+        for _ in range(count):
+            fetch()
+            if cpu.registers.PC >= 256:
+                cpu.registers.PC = 0
+
+    results["fetch"] = {"value": count / best_time(fetch_all, repeat), "unit": "ops/s", "higher_is_better": True}
+
+
+def bench_opcodes(results, repeat, length=1024):
+    # Cost of one fetch + decode_execute per opcode, on a program made only of that opcode
+    for mnemonic in OPERAND_OPCODES + ("NOP", "ERROR"):
+        cpu = CPU(OFF, memory=Memory(length))
+        if mnemonic == "NOP":
+            program = [""] * length
+        elif mnemonic == "ERROR":
+            program = ["BAD 0"] * length
+        else:
+            program = [f"{mnemonic} {length - 1}"] * length
+        cpu.memory.load_instructions(program)
+        elapsed = best_time(lambda: rerun(cpu), repeat)
+        results[f"opcode/{mnemonic}"] = {"value": elapsed / length * 1e9, "unit": "ns", "higher_is_better": False}
+
+
+def bench_memory(results, repeat, count=20000):
+    for memory_class in (Memory, CompactMemory, PagedMemory):
+        memory = memory_class(4096)
+        name = memory_class.__name__
+
+        def data_access():
+            get_value = memory.get_value
+            set_data = memory.set_data
+            for address in range(count):
+                set_data(address & 4095, address)
+                get_value(address & 4095)
+
+        def instruction_access():
+            get_instruction = memory.get_instruction
+            for address in range(count):
+                get_instruction(address & 4095)
+
+        results[f"memory/{name}/set_data+get_value"] = {
+            "value": count / best_time(data_access, repeat), "unit": "ops/s", "higher_is_better": True,
+        }
+        results[f"memory/{name}/get_instruction"] = {
+            "value": count / best_time(instruction_access, repeat), "unit": "ops/s", "higher_is_better": True,
+        }
+
+
+def bench_validator(results, repeat, count=20000):
+    values = [str(value) for value in range(count)]
+    instructions = {address: "LOAD 1" for address in range(count)}
+
+    def validate():
+        for value in values:
+            Validator.validate_address(value, max_memory=count)
+            Validator.validate_data_value(value)
+
+    results["validator/validate_address+value"] = {
+        "value": count / best_time(validate, repeat), "unit": "ops/s", "higher_is_better": True,
+    }
+    results["validator/check_duplicate_instructions"] = {
+        "value": count / best_time(lambda: Validator.check_duplicate_instructions(instructions), repeat),
+        "unit": "ops/s", "higher_is_better": True,
+    }
+
+
+def bench_load_and_peak(results, repeat, sizes):
+    for length in sizes:
+        size = memory_size_for(length)
+        instructions, data_values = generate_program(length, size)
+
+        def load():
+            CPU(OFF, memory=Memory(size)).load_program(instructions, data_values)
+
+        results[f"load_program/{length}"] = {"value": best_time(load, repeat), "unit": "s", "higher_is_better": False}
+
+        tracemalloc.start()
+        cpu = CPU(FULL, memory=Memory(size))
+        cpu.load_program(instructions, data_values)
+        cpu.run_program()
+        cpu.execution_log  # Render the log so its strings count towards the peak
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        results[f"peak_memory/trace_full/{length}"] = {"value": peak, "unit": "bytes", "higher_is_better": False}
+
+
+def bench_startup(results, repeat):
+    """Cold start of short headless invocations, each in a fresh interpreter"""
+    env = dict(os.environ)
+    package_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [package_root, env.get("PYTHONPATH")]))
+
+    # The headless entry points must never pull in Qt
+    imports = "; ".join(f"import cpusim.{module}" for module in HEADLESS_MODULES)
+    check = subprocess.run([sys.executable, "-c", f"import sys; {imports}; print('PyQt5' in sys.modules)"],
+                           env=env, capture_output=True, text=True, check=True)
+    if check.stdout.strip() != "False":
+        raise RuntimeError("a headless module imports PyQt5")
+
+    with tempfile.TemporaryDirectory() as directory:
+        program = os.path.join(directory, "startup.asm")
+        with open(program, "w") as f:
+            f.write(STARTUP_PROGRAM)
+        commands = {
+            "python": ["-c", "pass"],
+            "import_core": ["-c", "import cpusim.cpu"],
+            "batch_help": ["-m", "cpusim.batch", "--help"],
+            "batch_run": ["-m", "cpusim.batch", program],
+        }
+        for name, args in commands.items():
+            def start():
+                subprocess.run([sys.executable, *args], env=env, stdout=subprocess.DEVNULL, check=True)
+
+            results[f"startup/{name}"] = {"value": best_time(start, repeat), "unit": "s", "higher_is_better": False}
+
+
+def run_benchmarks(repeat=5, sizes=PROGRAM_SIZES):
+    results = {}
+    bench_run_program(results, repeat, sizes)
+    bench_fetch(results, repeat)
+    bench_opcodes(results, repeat)
+    bench_memory(results, repeat)
+    bench_validator(results, repeat)
+    bench_load_and_peak(results, repeat, sizes)
+    bench_startup(results, repeat)
+    return results
+
+
+def compare(baseline, current, threshold):
+    """Return (name, baseline, current, change) for every benchmark that got worse than threshold"""
+    regressions = []
+    for name, result in current.items():
+        if name not in baseline:
+            continue
+        old = baseline[name]["value"]
+        new = result["value"]
+        if not old:
+            continue
+        change = (new - old) / old
+        worse = -change if result["higher_is_better"] else change
+        if worse > threshold:
+            regressions.append((name, old, new, change))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the CPU simulator core")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per benchmark, best time is kept")
+    parser.add_argument("--quick", action="store_true", help="only the two smallest program sizes")
+    parser.add_argument("--startup", action="store_true", help="only the cold start benchmarks")
+    parser.add_argument("--save", help="write results as a JSON baseline")
+    parser.add_argument("--compare", help="compare against a JSON baseline")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="relative slowdown that counts as a regression (default 0.10)")
+    args = parser.parse_args(argv)
+
+    sizes = PROGRAM_SIZES[:2] if args.quick else PROGRAM_SIZES
+    if args.startup:
+        results = {}
+        bench_startup(results, args.repeat)
+    else:
+        results = run_benchmarks(args.repeat, sizes)
+
+    for name, result in results.items():
+        print(f"{name:55} {result['value']:>16.6g} {result['unit']}")
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump({"python": platform.python_version(), "benchmarks": results}, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["benchmarks"]
+        regressions = compare(baseline, results, args.threshold)
+        for name, old, new, change in regressions:
+            print(f"REGRESSION {name}: {old:.6g} -> {new:.6g} ({change:+.1%})")
+        if regressions:
+            sys.exit(1)
+        print("No regressions.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+from array import array
+
+from .isa import EMPTY, decode, format_instruction
+
+OPCODE_BITS = 8
+OPCODE_MASK = (1 << OPCODE_BITS) - 1
+# Operands that fit next to the opcode in one signed 64-bit code word
+MIN_OPERAND = -(1 << (63 - OPCODE_BITS))
+MAX_OPERAND = (1 << (63 - OPCODE_BITS)) - 1
+
+
+def pack(opcode, operand):
+    return (operand << OPCODE_BITS) | opcode
+
+
+def unpack(code):
+    return code & OPCODE_MASK, code >> OPCODE_BITS
+
+
+class CompactMemory:
+    """Memory with the same interface as Memory, backed by flat buffers.
+
+    Data words live in an array('q') and wrap around to word_bits bits.
+    Instructions are stored as packed (operand << 8 | opcode) integers with a
+    bitmap marking instruction addresses. Text that does not round-trip through
+    the packed form (odd spacing, malformed instructions) is kept in a side table.
+    The full text list (see instructions) is built on first use and dropped by
+    every instruction write, so runs of an unchanged program do not rebuild it.
+    """
+
+    def __init__(self, size=256, word_bits=64):
+        if not 1 <= word_bits <= 64:
+            raise ValueError("word_bits must be between 1 and 64")
+        self.size = size
+        self.word_bits = word_bits
+        self.word_mask = (1 << word_bits) - 1
+        self.sign_bit = 1 << (word_bits - 1)
+        self.data = array("q", bytes(8 * size))
+        self.code = array("q", bytes(8 * size))
+        self.bitmap = bytearray((size + 7) // 8)
+        self.texts = {}  # address -> text that is not in canonical form
+        self.decoded = {}  # Decode cache, filled on first fetch
+        self.text_list = None  # Cache behind instructions, None after a write
+
+    def clear(self):
+        # Zero the existing buffers in place
+        memoryview(self.data).cast("B")[:] = bytes(8 * self.size)
+        memoryview(self.code).cast("B")[:] = bytes(8 * self.size)
+        self.bitmap[:] = bytes(len(self.bitmap))
+        self.texts.clear()
+        self.decoded.clear()
+        self.text_list = None
+
+    def wrap(self, value):
+        # Two's complement wraparound to the configured word width
+        value &= self.word_mask
+        if value & self.sign_bit:
+            value -= 1 << self.word_bits
+        return value
+
+    def encode(self, address, instruction):
+        """Packed code word for instruction at address, updating the side table"""
+        opcode, operand, _ = decode(instruction)
+        if MIN_OPERAND <= operand <= MAX_OPERAND:
+            if format_instruction(opcode, operand) != instruction:
+                self.texts[address] = instruction
+            else:
+                self.texts.pop(address, None)
+            return pack(opcode, operand)
+        self.texts[address] = instruction
+        return pack(opcode, 0)
+
+    @property
+    def instructions(self):
+        """Instruction text of every address ("" for data), like Memory.instructions; read only"""
+        if self.text_list is None:
+            texts = [""] * self.size
+            for address, text in self.iter_instructions():
+                texts[address] = text
+            self.text_list = texts
+        return self.text_list
+
+    def set_instruction(self, address, instruction):
+        if 0 <= address < self.size:
+            self.code[address] = self.encode(address, instruction)
+            self.bitmap[address >> 3] |= 1 << (address & 7)
+            self.decoded.pop(address, None)  # Invalidate only this entry
+            self.text_list = None
+
+    def set_data(self, address, value):
+        if 0 <= address < self.size:
+            self.data[address] = self.wrap(value)
+
+    def load_data(self, values, start=0):
+        """Bulk-load consecutive data words starting at start"""
+        values = array("q", [self.wrap(value) for value in values[:max(self.size - start, 0)]])
+        self.data[start:start + len(values)] = values
+
+    def load_instructions(self, instructions, start=0):
+        """Bulk-load consecutive instructions starting at start"""
+        instructions = instructions[:max(self.size - start, 0)]
+        if not instructions:
+            return
+        encode = self.encode
+        codes = array("q", [encode(address, instruction) for address, instruction in enumerate(instructions, start)])
+        end = start + len(codes)
+        self.code[start:end] = codes
+
+        # Whole bitmap bytes in one slice, the bits at either end one by one
+        bitmap = self.bitmap
+        first, last = (start + 7) >> 3, end >> 3
+        if first < last:
+            bitmap[first:last] = b"\xff" * (last - first)
+            edges = list(range(start, first << 3)) + list(range(last << 3, end))
+        else:
+            edges = range(start, end)
+        for address in edges:
+            bitmap[address >> 3] |= 1 << (address & 7)
+
+        decoded = self.decoded
+        if decoded:
+            for address in range(start, end):
+                decoded.pop(address, None)
+        self.text_list = None
+
+    def get_value(self, address):
+        if 0 <= address < self.size:
+            return self.data[address]
+        return 0
+
+    def get_instruction(self, address):
+        if 0 <= address < self.size and self.is_instruction_address(address):
+            text = self.texts.get(address)
+            if text is None:
+                text = format_instruction(*unpack(self.code[address]))
+            return text
+        return ""
+
+    def get_decoded(self, address):
+        entry = self.decoded.get(address)
+        if entry is None:
+            if not (0 <= address < self.size and self.is_instruction_address(address)):
+                return EMPTY
+            text = self.get_instruction(address)
+            if address in self.texts:
+                entry = decode(text)  # Keeps out-of-range operands exact
+            else:
+                entry = unpack(self.code[address]) + (text,)
+            self.decoded[address] = entry
+        return entry
+
+    def is_instruction_address(self, address):
+        if 0 <= address < self.size:
+            return bool(self.bitmap[address >> 3] & (1 << (address & 7)))
+        return False
+
+    def iter_pages(self):
+        """(base address, page) pairs; the data buffer is a single page"""
+        yield 0, self.data
+
+    def iter_instructions(self):
+        for address in range(self.size):
+            if self.bitmap[address >> 3] & (1 << (address & 7)):
+                yield address, self.get_instruction(address)
+
+    def snapshot(self):
+        return self.data[:]
+
+    def restore(self, snapshot):
+        self.data[:] = snapshot
+
+    def diff(self, snapshot):
+        """(address, old, new) for every data word that differs from snapshot"""
+        if snapshot == self.data:
+            return []
+        return [(address, old, new) for address, (old, new) in enumerate(zip(snapshot, self.data))
+                if old != new]
+
+    def get_memory_dump(self, start=0, end=10):
+        """Debug method to see memory contents"""
+        end = min(end, self.size)
+        result = []
+        for addr, value in enumerate(self.data[start:end].tolist(), start):
+            if self.is_instruction_address(addr):
+                result.append(f"Address {addr}: INSTRUCTION = '{self.get_instruction(addr)}'")
+            else:
+                result.append(f"Address {addr}: DATA = {value}")
+        return result
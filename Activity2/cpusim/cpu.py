@@ -0,0 +1,278 @@
+import time
+
+from . import isa
+from .registers import Registers
+from .memory import Memory
+from .tracing import Trace, FULL
+from . import translate
+from .loop_guard import LoopGuard
+
+# Execution engines for run_program
+INTERPRETER = "interpreter"
+TRANSLATE = "translate"  # Compiled basic blocks, falls back to the interpreter when tracing fully
+ENGINES = (INTERPRETER, TRANSLATE)
+
+# Why run_program stopped early (CPU.stopped), None when it halted or ran off memory
+CYCLE_BUDGET = "cycle budget exhausted"
+TIME_BUDGET = "time budget exhausted"
+INFINITE_LOOP = "infinite loop detected"
+
+CHECK_INTERVAL = 1024  # Cycles between budget checks
+
+class CPU:
+    def __init__(self, trace_level=FULL, memory=None, engine=INTERPRETER):
+        self.registers = Registers()
+        self.memory = memory if memory is not None else Memory()
+        self.halted = False
+        self.cycles = 0
+        self.trace = Trace(trace_level)
+        self.engine = engine
+        self.current = isa.EMPTY  # Decoded form of IR
+        self.stopped = None
+        self.backward_jumps = 0  # Taken branches to an earlier address, a sign of a loop
+        # Opcode -> handler, indexed by the integer opcodes in isa
+        self.dispatch = [None] * isa.OPCODE_COUNT
+        self.dispatch[isa.NOP] = self.execute_nop
+        self.dispatch[isa.LOAD] = self.execute_load
+        self.dispatch[isa.STORE] = self.execute_store
+        self.dispatch[isa.ADD] = self.execute_add
+        self.dispatch[isa.SUB] = self.execute_sub
+        self.dispatch[isa.HLT] = self.execute_hlt
+        self.dispatch[isa.MISSING_OPERAND] = self.execute_error
+        self.dispatch[isa.INVALID_ADDRESS] = self.execute_error
+        self.dispatch[isa.UNKNOWN] = self.execute_error
+        for opcode in isa.BRANCHES:
+            self.dispatch[opcode] = self.execute_branch
+    
+    def reset(self):
+        self.registers.reset()
+        self.memory.clear()
+        self.halted = False
+        self.cycles = 0
+        self.trace.clear()
+        self.current = isa.EMPTY
+        self.stopped = None
+        self.backward_jumps = 0
+    
+    def load_program(self, instructions, data_values):
+        # Load instructions and data from {address: value} dicts
+        for address, instruction in instructions.items():
+            self.memory.set_instruction(address, instruction)
+        
+        for address, value in data_values.items():
+            self.memory.set_data(address, value)
+    
+    @property
+    def execution_log(self):
+        # Text lines are only rendered when someone reads the log
+        return self.trace.lines()
+    
+    def fetch(self):
+        # MAR ← PC
+        self.registers.MAR = self.registers.PC
+        
+        # MDR ← Memory[MAR] (get instruction, decoded once and cached by memory)
+        self.current = self.memory.get_decoded(self.registers.MAR)
+        instruction = self.current[2]
+        self.registers.MDR = instruction
+        
+        # IR ← MDR
+        self.registers.IR = instruction
+        
+        # PC ← PC + 1
+        self.registers.PC += 1
+    
+    def decode_execute(self):
+        if self.halted:
+            return
+
+        opcode, address, _ = self.current
+        self.dispatch[opcode](address)
+
+    def execute_nop(self, address):
+        pass
+
+    def execute_hlt(self, address):
+        self.halted = True
+        if self.trace.full:
+            self.trace.record(self.registers.PC - 1, self.current)
+
+    def execute_error(self, address):
+        # Missing operand, invalid address or unknown opcode; the trace renders the message
+        if self.trace.full:
+            self.trace.record(self.registers.PC - 1, self.current)
+
+    def execute_load(self, address):
+        current_ac = self.registers.AC
+        memory_value = self.memory.get_value(address)
+        self.registers.AC = memory_value
+        if self.trace.full:
+            self.trace.record(self.registers.PC - 1, self.current, current_ac, self.registers.AC, memory_value)
+
+    def execute_store(self, address):
+        old_value = self.memory.get_value(address)
+        self.memory.set_data(address, self.registers.AC)
+        if self.trace.full:
+            new_value = self.memory.get_value(address)
+            self.trace.record(self.registers.PC - 1, self.current, old_value, new_value, self.registers.AC)
+
+    def execute_add(self, address):
+        memory_value = self.memory.get_value(address)
+        old_ac = self.registers.AC
+        self.registers.AC += memory_value
+        if self.trace.full:
+            self.trace.record(self.registers.PC - 1, self.current, old_ac, self.registers.AC, memory_value)
+
+    def execute_sub(self, address):
+        memory_value = self.memory.get_value(address)
+        old_ac = self.registers.AC
+        self.registers.AC -= memory_value
+        if self.trace.full:
+            self.trace.record(self.registers.PC - 1, self.current, old_ac, self.registers.AC, memory_value)
+    
+    def execute_branch(self, address):
+        registers = self.registers
+        pc = registers.PC - 1
+        ac = registers.AC
+        if isa.branch_taken(self.current[0], ac):
+            registers.PC = address
+            if address <= pc:
+                self.backward_jumps += 1
+        if self.trace.full:
+            self.trace.record(pc, self.current, None, registers.PC, ac)
+    
+    def running(self):
+        return not self.halted and self.registers.PC < self.memory.size
+    
+    def run_cycle(self):
+        if self.halted or self.registers.PC >= self.memory.size:
+            return False
+        
+        self.cycles += 1
+        self.fetch()
+        self.decode_execute()
+        return not self.halted
+    
+    def run_profiled(self, profile, limit=None, deadline=None, guard=None):
+        # Instrumented copy of the run_cycle loop so unprofiled runs pay nothing for it.
+        # Repeated states are detected by a LoopGuard without fast-forwarding, which would
+        # skip the cycles being profiled: guard if the caller keeps one across calls,
+        # otherwise one for this call unless other cores can change memory
+        own_guard = guard is None and not getattr(self.memory, "shared", False)
+        if own_guard:
+            guard = LoopGuard(self, fast_forward=False)
+        clock = time.perf_counter
+        registers = self.registers
+        size = self.memory.size
+        sparse = getattr(self.memory, "sparse", False)
+        opcode_counts = profile.opcode_counts
+        opcode_times = profile.opcode_times
+        try:
+            with profile.count_memory_access(self.memory):
+                while not self.halted and registers.PC < size:
+                    if limit is not None and self.cycles >= limit:
+                        return CYCLE_BUDGET
+                    if sparse:
+                        # Empty cells are skipped in one step and counted as NOPs
+                        skipped = self.cycles
+                        self.skip_empty(limit)
+                        skipped = self.cycles - skipped
+                        if skipped:
+                            profile.cycles += skipped
+                            opcode_counts[isa.NOP] += skipped
+                            continue
+                    started = clock()
+                    if deadline is not None and started >= deadline:
+                        return TIME_BUDGET
+                    self.cycles += 1
+                    self.fetch()
+                    fetched = clock()
+                    opcode, address, _ = self.current
+                    self.dispatch[opcode](address)
+                    executed = clock()
+                    profile.cycles += 1
+                    profile.fetch_time += fetched - started
+                    profile.execute_time += executed - fetched
+                    opcode_counts[opcode] += 1
+                    opcode_times[opcode] += executed - fetched
+                    if guard is not None and guard.looping:
+                        return INFINITE_LOOP
+        finally:
+            if own_guard:
+                guard.remove()
+    
+    def skip_empty(self, limit=None):
+        # Run a stretch of empty cells in one step; each would only advance PC
+        registers = self.registers
+        pc = registers.PC
+        if self.halted or pc >= self.memory.size:
+            return False
+        address = self.memory.next_instruction_address(pc)
+        if limit is not None:
+            address = min(address, pc + max(limit - self.cycles, 0))
+        if address == pc:
+            return False
+        self.cycles += address - pc
+        registers.PC = address
+        registers.MAR = address - 1
+        registers.IR = registers.MDR = ""
+        self.current = isa.EMPTY
+        return address < self.memory.size
+    
+    def run_interpreted(self, limit=None, deadline=None):
+        # run_cycle in chunks, checking the budgets between chunks; a LoopGuard takes
+        # over once the program jumps backwards, unless other cores can change memory
+        sparse = getattr(self.memory, "sparse", False)
+        guarded = not getattr(self.memory, "shared", False)
+        guard = None
+        try:
+            while self.running():
+                chunk = CHECK_INTERVAL
+                if limit is not None:
+                    chunk = min(chunk, limit - self.cycles)
+                    if chunk <= 0:
+                        return CYCLE_BUDGET
+                if guard is None and guarded and self.backward_jumps:
+                    # Closed-form fast-forwarding skips the trace records and STORE wraparound
+                    fast_forward = not self.trace.full and not hasattr(self.memory, "wrap")
+                    guard = LoopGuard(self, fast_forward)
+                if guard is not None:
+                    guard.limit = limit
+                    if guard.run(chunk, sparse):
+                        return INFINITE_LOOP
+                elif sparse:
+                    for _ in range(chunk):
+                        if self.skip_empty(limit):
+                            break  # Skipped cycles count against the budget; re-check it
+                        if not self.run_cycle():
+                            break
+                else:
+                    for _ in range(chunk):
+                        if not self.run_cycle():
+                            break
+                if deadline is not None and time.perf_counter() >= deadline:
+                    return TIME_BUDGET if self.running() else None
+        finally:
+            if guard is not None:
+                guard.remove()
+        return None
+    
+    def run_program(self, profile=None, max_cycles=None, max_seconds=None):
+        """Run until HLT, the end of memory, or a budget: at most max_cycles cycles and
+        max_seconds of wall-clock time. Sets stopped to the reason for an early stop."""
+        self.trace.clear()  # Clear previous logs
+        self.trace.start()
+        start_cycles = self.cycles
+        limit = None if max_cycles is None else self.cycles + max_cycles
+        deadline = None if max_seconds is None else time.perf_counter() + max_seconds
+        self.backward_jumps = 0
+        
+        if profile is not None:
+            self.stopped = self.run_profiled(profile, limit, deadline)
+        elif self.engine == TRANSLATE and translate.run_translated(self, limit=limit):
+            self.stopped = None
+        else:
+            self.stopped = self.run_interpreted(limit, deadline)
+        
+        self.trace.finish(self.cycles - start_cycles, self.halted, self.stopped)
+        return self.trace  # Iterating the trace renders the log lines
@@ -0,0 +1,208 @@
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex
+from PyQt5.QtWidgets import QStyledItemDelegate, QComboBox, QLineEdit
+
+from .address_index import AddressIndex
+
+INSTRUCTION_TYPES = ["", "LOAD", "STORE", "ADD", "SUB", "JMP", "JZ", "JN", "HLT"]
+DATA_INSTRUCTIONS = ["LOAD", "STORE", "ADD", "SUB"]
+BRANCH_INSTRUCTIONS = ["JMP", "JZ", "JN"]
+OPERAND_INSTRUCTIONS = DATA_INSTRUCTIONS + BRANCH_INSTRUCTIONS
+
+ADDRESS_COLUMN = 0
+INSTRUCTION_COLUMN = 1
+OPERAND_COLUMN = 2
+
+
+def operand_address(instruction, operand):
+    # Data address used by one row, or None; branch targets are code addresses
+    if instruction in DATA_INSTRUCTIONS and operand:
+        try:
+            return int(operand)
+        except ValueError:
+            pass
+    return None
+
+
+class DataModel(QAbstractTableModel):
+    """Data values for the addresses in use, one row per address (rows are virtual)"""
+
+    HEADERS = ["Address", "Value"]
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.address_index = AddressIndex()
+        self.values = {}  # address -> entered text, kept while the address is unused
+
+    def clear(self):
+        self.beginResetModel()
+        self.address_index.clear()
+        self.values.clear()
+        self.endResetModel()
+
+    def set_row_address(self, row, address):
+        """Point an instruction row at a new data address, updating only the affected rows"""
+        index = self.address_index
+        old = index.row_address.get(row)
+        if old == address:
+            return
+
+        if old is not None and index.users[old] == 1:
+            position = index.position(old)
+            self.beginRemoveRows(QModelIndex(), position, position)
+            index.set_row(row, None)
+            self.endRemoveRows()
+        else:
+            index.set_row(row, None)
+
+        if address is not None:
+            if address in index:
+                index.set_row(row, address)
+            else:
+                position = index.position(address)
+                self.beginInsertRows(QModelIndex(), position, position)
+                index.set_row(row, address)
+                self.endInsertRows()
+
+    def value_text(self, address):
+        return self.values.get(address, "0")
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.address_index)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else 2
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.HEADERS[section]
+        return None
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or role not in (Qt.DisplayRole, Qt.EditRole):
+            return None
+        address = self.address_index.sorted_addresses[index.row()]
+        if index.column() == 0:
+            return str(address)
+        return self.value_text(address)
+
+    def flags(self, index):
+        flags = Qt.ItemIsEnabled | Qt.ItemIsSelectable
+        if index.column() == 1:
+            flags |= Qt.ItemIsEditable
+        return flags
+
+    def setData(self, index, value, role=Qt.EditRole):
+        if role != Qt.EditRole or index.column() != 1:
+            return False
+        address = self.address_index.sorted_addresses[index.row()]
+        self.values[address] = str(value).strip()
+        self.dataChanged.emit(index, index, [role])
+        return True
+
+
+class InstructionModel(QAbstractTableModel):
+    """Instruction rows (address, instruction, operand) backing the editor table"""
+
+    HEADERS = ["Address", "Instruction", "Operand"]
+
+    def __init__(self, data_model, parent=None):
+        super().__init__(parent)
+        self.data_model = data_model
+        self.instructions = []
+        self.operands = []
+
+    def reset_rows(self, count):
+        self.beginResetModel()
+        self.instructions = [""] * count
+        self.operands = [""] * count
+        self.data_model.clear()
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.instructions)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else 3
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.HEADERS[section]
+        return None
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        row = index.row()
+        column = index.column()
+        if role in (Qt.DisplayRole, Qt.EditRole):
+            if column == ADDRESS_COLUMN:
+                return str(row)
+            if column == INSTRUCTION_COLUMN:
+                return self.instructions[row]
+            return self.operands[row]
+        if role == Qt.ToolTipRole and column == OPERAND_COLUMN and self.instructions[row] in OPERAND_INSTRUCTIONS:
+            return "Jump Target" if self.instructions[row] in BRANCH_INSTRUCTIONS else "Data Address"
+        return None
+
+    def flags(self, index):
+        flags = Qt.ItemIsEnabled | Qt.ItemIsSelectable
+        column = index.column()
+        if column == INSTRUCTION_COLUMN:
+            flags |= Qt.ItemIsEditable
+        elif column == OPERAND_COLUMN and self.instructions[index.row()] in OPERAND_INSTRUCTIONS:
+            flags |= Qt.ItemIsEditable
+        return flags
+
+    def setData(self, index, value, role=Qt.EditRole):
+        if role != Qt.EditRole or not index.isValid():
+            return False
+        row = index.row()
+        column = index.column()
+        value = str(value)
+        if column == INSTRUCTION_COLUMN:
+            self.instructions[row] = value
+            if value not in OPERAND_INSTRUCTIONS and self.operands[row]:
+                # Instructions without an operand clear it, like the old editor did
+                self.operands[row] = ""
+                operand_index = self.index(row, OPERAND_COLUMN)
+                self.dataChanged.emit(operand_index, operand_index, [Qt.DisplayRole, Qt.EditRole])
+        elif column == OPERAND_COLUMN:
+            self.operands[row] = value.strip()
+        else:
+            return False
+        self.dataChanged.emit(index, index, [Qt.DisplayRole, Qt.EditRole])
+        self.data_model.set_row_address(row, operand_address(self.instructions[row], self.operands[row]))
+        return True
+
+    def set_row(self, row, instruction, operand=""):
+        self.setData(self.index(row, INSTRUCTION_COLUMN), instruction)
+        if operand:
+            self.setData(self.index(row, OPERAND_COLUMN), operand)
+
+
+class InstructionDelegate(QStyledItemDelegate):
+    """Combo box editor for the instruction column, placeholder text for operands"""
+
+    def createEditor(self, parent, option, index):
+        if index.column() == INSTRUCTION_COLUMN:
+            combo = QComboBox(parent)
+            combo.addItems(INSTRUCTION_TYPES)
+            # Commit as soon as a new instruction is picked
+            combo.activated.connect(lambda _: self.commitData.emit(combo))
+            return combo
+        editor = super().createEditor(parent, option, index)
+        if isinstance(editor, QLineEdit) and index.column() == OPERAND_COLUMN:
+            editor.setPlaceholderText(index.data(Qt.ToolTipRole) or "Data Address")
+        return editor
+
+    def setEditorData(self, editor, index):
+        if isinstance(editor, QComboBox):
+            editor.setCurrentText(index.data(Qt.EditRole) or "")
+        else:
+            super().setEditorData(editor, index)
+
+    def setModelData(self, editor, model, index):
+        if isinstance(editor, QComboBox):
+            model.setData(index, editor.currentText())
+        else:
+            super().setModelData(editor, model, index)
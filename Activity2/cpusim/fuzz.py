@@ -0,0 +1,643 @@
+"""Differential fuzzing of the execution engines against a reference interpreter.
+
+    python -m cpusim.fuzz --seconds 60
+    python -m cpusim.fuzz --programs 100000 -j 8 --engines translate,paged-translate
+    python -m cpusim.fuzz --replay mismatches.jsonl
+
+Random programs (including empty cells, missing operands, unknown opcodes,
+out-of-range and oversized operands) and data are generated in worker
+processes. Each one runs on run_reference, a deliberately naive interpreter
+that parses the instruction text on every cycle like the original CPU did,
+and on every engine configuration in ENGINES. Final registers, data memory,
+halt/stop state and, for traced engines, the rendered trace must all agree.
+Mismatches are shrunk to a small reproducer and written as JSON lines that
+--replay reads back.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from importlib.util import find_spec
+
+from .compact_memory import CompactMemory
+from .cpu import CHECK_INTERVAL, CPU, CYCLE_BUDGET, INFINITE_LOOP, INTERPRETER, TRANSLATE
+from .memory import Memory
+from .paged_memory import PagedMemory
+from .prefix_cache import PrefixCache, run_cached
+from .profiler import Profile
+from .tracing import FULL, OFF, SEPARATOR
+
+DEFAULT_MAX_CYCLES = 3 * CHECK_INTERVAL  # The loop guard only starts at a chunk boundary
+DEFAULT_BATCH_SIZE = 200  # Programs per worker task
+DEFAULT_MAX_FAILURES = 20  # Mismatches collected before the run stops early
+MAX_DIFFERENCES = 8  # Reported per mismatch
+REPORT_INTERVAL = 5.0  # Seconds between progress lines
+
+MEMORY_SIZES = (8, 16, 32, 64)
+PAGE_BITS = 3  # Small pages so that short programs span several of them
+PREFIX_STRIDE = 4
+WORD_BITS = 64  # CompactMemory and the vector engine use 64-bit words
+MIN_WORD = -(1 << (WORD_BITS - 1))
+MAX_WORD = (1 << (WORD_BITS - 1)) - 1
+
+REGISTER_NAMES = ("AC", "PC", "IR", "MAR", "MDR")
+OPERAND_MNEMONICS = ("LOAD", "STORE", "ADD", "SUB")
+BRANCH_MNEMONICS = ("JMP", "JZ", "JN")
+
+
+class Case:
+    """One generated program: memory size, {address: text} and {address: value}"""
+
+    def __init__(self, size, instructions, data):
+        self.size = size
+        self.instructions = instructions
+        self.data = data
+
+    def to_json(self):
+        return {
+            "size": self.size,
+            "instructions": {str(address): text for address, text in sorted(self.instructions.items())},
+            "data": {str(address): value for address, value in sorted(self.data.items())},
+        }
+
+    @classmethod
+    def from_json(cls, entry):
+        return cls(entry["size"],
+                   {int(address): text for address, text in entry["instructions"].items()},
+                   {int(address): value for address, value in entry["data"].items()})
+
+    def has_branches(self):
+        return any(text.split()[0] in BRANCH_MNEMONICS for text in self.instructions.values() if text.split())
+
+    def cost(self):
+        """Ordering used by the shrinker: fewer, shorter, smaller is simpler"""
+        return (len(self.instructions) + len(self.data), self.size,
+                sum(map(len, self.instructions.values())), sum(len(str(value)) for value in self.data.values()))
+
+
+class Outcome:
+    """Final machine state of one run, comparable across engines"""
+
+    def __init__(self, registers, halted, cycles, stopped, data, lines=None, looping=False, overflow=False):
+        self.registers = registers  # (AC, PC, IR, MAR, MDR)
+        self.halted = halted
+        self.cycles = cycles
+        self.stopped = stopped
+        self.data = data  # Every data word, address 0 to size - 1
+        self.lines = lines  # Execution log, None for untraced runs
+        self.looping = looping  # Reference only: a state repeated, so the run never ends
+        self.overflow = overflow  # Reference only: AC or a word left the signed 64-bit range
+
+
+def wrap_word(value):
+    return ((value - MIN_WORD) & ((1 << WORD_BITS) - 1)) + MIN_WORD
+
+
+def run_reference(case, max_cycles, wrap=False, budget_reason=CYCLE_BUDGET):
+    """Run case one cycle at a time, parsing each instruction string as it is fetched.
+
+    This is the specification the engines are checked against, so it shares no
+    code with them. With wrap, stored words wrap to 64 bits like CompactMemory.
+    A run cut off after max_cycles stops with budget_reason.
+    """
+    size = case.size
+    data = [0] * size
+    for address, value in case.data.items():
+        if 0 <= address < size:
+            data[address] = wrap_word(value) if wrap else value
+    ac = pc = mar = cycles = 0
+    ir = mdr = ""
+    halted = looping = False
+    overflow = any(not MIN_WORD <= value <= MAX_WORD for value in data)
+    stopped = None
+    seen = set()
+    lines = ["Starting program execution...", SEPARATOR]
+
+    def get(address):
+        return data[address] if 0 <= address < size else 0
+
+    while not halted and pc < size:
+        if cycles >= max_cycles:
+            stopped = budget_reason
+            break
+        cycles += 1
+        mar = pc
+        mdr = ir = case.instructions.get(pc, "") if pc >= 0 else ""
+        at = pc
+        pc += 1
+        if not ir.strip():
+            continue
+        parts = ir.split()
+        if parts[0] == "HLT":
+            halted = True
+            lines.append(f"PC={at}\tIR={ir}\tProgram Halted.")
+            continue
+        if len(parts) < 2:
+            lines.append(f"PC={at}\tIR={ir}\tError: Missing operand")
+            continue
+        try:
+            address = int(parts[1])
+        except ValueError:
+            lines.append(f"PC={at}\tIR={ir}\tError: Invalid address")
+            continue
+        old_ac = ac
+        if parts[0] == "LOAD":
+            ac = get(address)
+            lines.append(f"PC={at}\tIR={ir}\tAC={old_ac}→{ac}\t\t(loaded from memory[{address}]={ac})")
+        elif parts[0] == "ADD":
+            ac += get(address)
+            lines.append(f"PC={at}\tIR={ir}\tAC={old_ac}→{ac}\t\t(added memory[{address}]={get(address)})")
+        elif parts[0] == "SUB":
+            ac -= get(address)
+            lines.append(f"PC={at}\tIR={ir}\tAC={old_ac}→{ac}\t\t(subtracted memory[{address}]={get(address)})")
+        elif parts[0] == "STORE":
+            old = get(address)
+            if 0 <= address < size:
+                data[address] = wrap_word(ac) if wrap else ac
+                overflow = overflow or not MIN_WORD <= data[address] <= MAX_WORD
+            lines.append(f"PC={at}\tIR={ir}\tMemory[{address}]={old}→{get(address)}\t(stored from AC={ac})")
+        elif parts[0] in BRANCH_MNEMONICS:
+            taken = parts[0] == "JMP" or (parts[0] == "JZ" and ac == 0) or (parts[0] == "JN" and ac < 0)
+            if taken:
+                pc = address
+                lines.append(f"PC={at}\tIR={ir}\tPC→{pc}\t\t(jumped, AC={ac})")
+                if address <= at and not looping:
+                    state = (address, ac, tuple(data))
+                    looping = state in seen
+                    seen.add(state)
+            else:
+                lines.append(f"PC={at}\tIR={ir}\tPC→{pc}\t\t(not taken, AC={ac})")
+        else:
+            lines.append(f"PC={at}\tIR={ir}\tError: Unknown instruction")
+        overflow = overflow or not MIN_WORD <= ac <= MAX_WORD
+
+    if stopped:
+        lines.append(f"Stopped: {stopped}.")
+    lines.extend((SEPARATOR, "Program execution completed."))
+    return Outcome((ac, pc, ir, mar, mdr), halted, cycles, stopped, data, lines, looping, overflow)
+
+
+def cpu_outcome(cpu, size):
+    registers = cpu.registers
+    return Outcome((registers.AC, registers.PC, registers.IR, registers.MAR, registers.MDR),
+                   cpu.halted, cpu.cycles, cpu.stopped, [cpu.memory.get_value(address) for address in range(size)],
+                   cpu.execution_log if cpu.trace.full else None)
+
+
+def run_cpu(case, max_cycles, memory, trace_level=FULL, engine=INTERPRETER, profiled=False):
+    cpu = CPU(trace_level, memory=memory, engine=engine)
+    cpu.load_program(case.instructions, case.data)
+    cpu.run_program(profile=Profile() if profiled else None, max_cycles=max_cycles)
+    return cpu_outcome(cpu, case.size)
+
+
+# Engine configurations: name -> function(case, max_cycles, expected) returning an
+# Outcome, or None when the configuration cannot run the case
+def run_interpreter(case, max_cycles, expected):
+    return run_cpu(case, max_cycles, Memory(case.size))
+
+
+def run_fast_forward(case, max_cycles, expected):
+    # Without full tracing the loop guard fast-forwards counted loops
+    return run_cpu(case, max_cycles, Memory(case.size), OFF)
+
+
+def run_translate(case, max_cycles, expected):
+    return run_cpu(case, max_cycles, Memory(case.size), OFF, TRANSLATE)
+
+
+def run_profiled(case, max_cycles, expected):
+    return run_cpu(case, max_cycles, Memory(case.size), profiled=True)
+
+
+def run_compact(case, max_cycles, expected):
+    return run_cpu(case, max_cycles, CompactMemory(case.size, WORD_BITS))
+
+
+def run_paged(case, max_cycles, expected):
+    return run_cpu(case, max_cycles, PagedMemory(case.size, PAGE_BITS))
+
+
+def run_paged_translate(case, max_cycles, expected):
+    return run_cpu(case, max_cycles, PagedMemory(case.size, PAGE_BITS), OFF, TRANSLATE)
+
+
+def run_prefix_cache(case, max_cycles, expected):
+    # The second run resumes from the cached prefix
+    cache = PrefixCache(stride=PREFIX_STRIDE)
+    cpu = CPU(FULL, memory=Memory(case.size))
+    for _ in range(2):
+        cpu.reset()
+        cpu.load_program(case.instructions, case.data)
+        run_cached(cpu, cache, max_cycles)
+    return cpu_outcome(cpu, case.size)
+
+
+def run_prefix_cache_edited(case, max_cycles, expected):
+    # One cache first sees the program at other memory sizes, then with its last
+    # instruction (at least the first one after the first stride) edited, with every
+    # data word changed and then under the case's data, and finally the case itself:
+    # it may only resume from strides whose text, memory size and data match
+    address = max(max(case.instructions, default=0), PREFIX_STRIDE)
+    text = "HLT" if case.instructions.get(address) != "HLT" else "ADD 0"
+    edited = replaced(case.instructions, address, text)
+    shifted_data = {address: case.data.get(address, 0) + 1 for address in range(case.size)}
+    cache = PrefixCache(stride=PREFIX_STRIDE)
+    # The smaller size goes first: operands out of range there are in range in the case
+    for size, instructions, data in ((case.size // 2, case.instructions, case.data),
+                                     (case.size * 2, case.instructions, case.data),
+                                     (case.size, edited, shifted_data),
+                                     (case.size, edited, case.data)):
+        cpu = CPU(FULL, memory=Memory(size))
+        cpu.load_program(instructions, data)
+        run_cached(cpu, cache, max_cycles)
+    cpu = CPU(FULL, memory=Memory(case.size))
+    cpu.load_program(case.instructions, case.data)
+    run_cached(cpu, cache, max_cycles)
+    return cpu_outcome(cpu, case.size)
+
+
+def run_vector(case, max_cycles, expected):
+    # One lane; lanes share a PC, hold int64 values and have no cycle budget
+    if expected.stopped is not None or expected.overflow or case.has_branches():
+        return None
+    from .vector import VectorCPU
+
+    cpu = VectorCPU(case.size)
+    cpu.load_program(case.instructions)
+    cpu.load_data([case.data])
+    ac, data = cpu.run()
+    return Outcome((int(ac[0]), cpu.pc, cpu.ir, cpu.mar, cpu.ir), cpu.halted, cpu.cycles, None,
+                   [int(value) for value in data[0]])
+
+
+ENGINES = {
+    "interpreter": run_interpreter,
+    "fast-forward": run_fast_forward,
+    "translate": run_translate,
+    "profiled": run_profiled,
+    "compact": run_compact,
+    "paged": run_paged,
+    "paged-translate": run_paged_translate,
+    "prefix-cache": run_prefix_cache,
+    "prefix-cache-edited": run_prefix_cache_edited,
+    "vector": run_vector,
+}
+OPTIONAL_ENGINES = {"vector": "numpy"}  # Engine -> module it needs
+
+
+def available_engines():
+    return [name for name in ENGINES
+            if name not in OPTIONAL_ENGINES or find_spec(OPTIONAL_ENGINES[name]) is not None]
+
+
+def differences(expected, actual):
+    """Human-readable differences between two outcomes, at most MAX_DIFFERENCES"""
+    found = []
+    for name, want, got in zip(REGISTER_NAMES, expected.registers, actual.registers):
+        if want != got:
+            found.append(f"{name}: expected {want!r}, got {got!r}")
+    for name in ("halted", "cycles", "stopped"):
+        want, got = getattr(expected, name), getattr(actual, name)
+        if want != got:
+            found.append(f"{name}: expected {want!r}, got {got!r}")
+    for address, (want, got) in enumerate(zip(expected.data, actual.data)):
+        if want != got:
+            found.append(f"memory[{address}]: expected {want!r}, got {got!r}")
+    if actual.lines is not None:
+        for number, (want, got) in enumerate(zip(expected.lines, actual.lines)):
+            if want != got:
+                found.append(f"trace line {number}: expected {want!r}, got {got!r}")
+                break
+        if len(expected.lines) != len(actual.lines):
+            found.append(f"trace length: expected {len(expected.lines)} lines, got {len(actual.lines)}")
+    return found[:MAX_DIFFERENCES]
+
+
+def check_engine(case, engine, reference, max_cycles, reruns=None):
+    """Differences between engine and the reference run of case; empty when they agree.
+
+    reruns caches the shorter or wrapping reference runs some engines are
+    compared against, so that engines checking the same case can share them.
+    """
+    reruns = {} if reruns is None else reruns
+
+    def rerun(cycles, wrap, budget_reason=CYCLE_BUDGET):
+        key = (cycles, wrap, budget_reason)
+        if key not in reruns:
+            reruns[key] = run_reference(case, cycles, wrap, budget_reason)
+        return reruns[key]
+
+    wrap = engine == "compact" and reference.overflow
+    expected = rerun(max_cycles, wrap) if wrap else reference
+    try:
+        actual = ENGINES[engine](case, max_cycles, expected)
+    except Exception as e:
+        return [f"raised {type(e).__name__}: {e}"]
+    if actual is None:
+        return []
+    if actual.stopped == INFINITE_LOOP:
+        # Loop detection may stop early, but only on a program that really never ends
+        if not expected.looping:
+            return [f"stopped at cycle {actual.cycles} as an infinite loop, but no state repeats "
+                    f"within {max_cycles} cycles"]
+        expected = rerun(actual.cycles, wrap, INFINITE_LOOP)
+    return differences(expected, actual)
+
+
+def check_case(case, engines, max_cycles):
+    """(engine, differences) for every engine that disagrees with the reference on case"""
+    reference = run_reference(case, max_cycles)
+    reruns = {}
+    failures = []
+    for engine in engines:
+        found = check_engine(case, engine, reference, max_cycles, reruns)
+        if found:
+            failures.append((engine, found))
+    return failures
+
+
+def random_operand(rng, size):
+    choice = rng.random()
+    if choice < 0.8:
+        return str(rng.randrange(size))
+    if choice < 0.85:
+        return str(rng.choice((-1, size, size + rng.randrange(1, 100), -rng.randrange(2, 100))))
+    if choice < 0.9:
+        return str(rng.choice((1 << 60, 1 << 70, -(1 << 70))))
+    return rng.choice(("+1", "007", "1_0", "x", "0x10", "3.0", str(size - 1)))
+
+
+def random_instruction(rng, size, branches):
+    choice = rng.random()
+    if choice < 0.6:
+        mnemonic = rng.choice(OPERAND_MNEMONICS)
+    elif choice < 0.75:
+        mnemonic = rng.choice(BRANCH_MNEMONICS) if branches else rng.choice(OPERAND_MNEMONICS)
+    elif choice < 0.82:
+        return rng.choice(("HLT", "HLT 3", " HLT"))
+    elif choice < 0.88:
+        return rng.choice(("", " ", "\t"))
+    elif choice < 0.94:
+        return rng.choice(("LOAD", "JZ", "STORE ", "FOO 1", "load 1", "NOP 2", "HALT"))
+    else:
+        mnemonic = rng.choice(OPERAND_MNEMONICS + (BRANCH_MNEMONICS if branches else ()))
+        return rng.choice(("{}  {}", "{}\t{}", " {} {}", "{} {} 9", "{} {} ;x")).format(
+            mnemonic, random_operand(rng, size))
+    return f"{mnemonic} {random_operand(rng, size)}"
+
+
+def random_value(rng):
+    choice = rng.random()
+    if choice < 0.8:
+        return rng.randint(-5, 5)
+    if choice < 0.9:
+        return rng.randint(-1000, 1000)
+    return rng.choice((MAX_WORD, MIN_WORD, MAX_WORD - 1, 1 << 62, -(1 << 62), 1 << 64))
+
+
+def generate_case(rng):
+    """A random program: a run of instructions from address 0, a few strays and some data"""
+    size = rng.choice(MEMORY_SIZES)
+    branches = rng.random() < 0.7  # Straight-line programs keep translate and vector off their fallbacks
+    instructions = {}
+    for address in range(rng.randint(1, size)):
+        if rng.random() < 0.9:
+            instructions[address] = random_instruction(rng, size, branches)
+    for _ in range(rng.randint(0, 2)):
+        instructions[rng.randrange(size)] = random_instruction(rng, size, branches)
+    data = {}
+    for _ in range(rng.randint(0, size)):
+        address = rng.randrange(size) if rng.random() < 0.95 else rng.choice((-1, size))
+        data[address] = random_value(rng)
+    return Case(size, instructions, data)
+
+
+def replaced(mapping, key, value):
+    mapping = dict(mapping)
+    mapping[key] = value
+    return mapping
+
+
+def shifted(text, removed):
+    # Operands above a removed address move down with the words they point at
+    parts = text.split()
+    if len(parts) == 2 and text == f"{parts[0]} {parts[1]}" and parts[1].lstrip("-").isdigit():
+        operand = int(parts[1])
+        if operand > removed:
+            return f"{parts[0]} {operand - 1}"
+    return text
+
+
+def without_address(case, removed, retarget=True):
+    """case with address removed and everything above it moved down one word"""
+    def moved(mapping, value=lambda value: value):
+        return {address - (address > removed): value(item) for address, item in mapping.items()
+                if address != removed}
+
+    if retarget:
+        return Case(case.size - 1, moved(case.instructions, lambda text: shifted(text, removed)), moved(case.data))
+    return Case(case.size - 1, moved(case.instructions), moved(case.data))
+
+
+def simpler_cases(case):
+    """Candidate reductions of case, most aggressive first"""
+    for size in (case.size // 2, case.size - 1):
+        if size >= 1:
+            yield Case(size, {address: text for address, text in case.instructions.items() if address < size},
+                       {address: value for address, value in case.data.items() if address < size})
+    if case.size > 1:
+        for address in range(case.size - 1, -1, -1):
+            yield without_address(case, address)
+            yield without_address(case, address, retarget=False)
+    for address in sorted(case.instructions, reverse=True):
+        instructions = dict(case.instructions)
+        del instructions[address]
+        yield Case(case.size, instructions, case.data)
+    for address in sorted(case.data, reverse=True):
+        data = dict(case.data)
+        del data[address]
+        yield Case(case.size, case.instructions, data)
+    for address, text in sorted(case.instructions.items()):
+        parts = text.split()
+        candidates = [" ".join(parts[:2])] if parts else []
+        if len(parts) >= 2:
+            candidates.append(f"{parts[0]} 0")
+        for simpler in candidates:
+            if simpler != text:
+                yield Case(case.size, replaced(case.instructions, address, simpler), case.data)
+    for address, value in sorted(case.data.items()):
+        for simpler in (1, value // 2):
+            if simpler != value and abs(simpler) < abs(value):
+                yield Case(case.size, case.instructions, replaced(case.data, address, simpler))
+
+
+def shrink(case, engine, max_cycles):
+    """Greedily reduce case while engine still disagrees with the reference on it"""
+    def fails(candidate):
+        return bool(check_engine(candidate, engine, run_reference(candidate, max_cycles), max_cycles))
+
+    progress = True
+    while progress:
+        progress = False
+        for candidate in simpler_cases(case):
+            if candidate.cost() < case.cost() and fails(candidate):
+                case = candidate
+                progress = True
+                break
+    return case
+
+
+def fuzz_batch(seed, count, engines, max_cycles):
+    """Worker task: generate and check count programs; returns (count, failures)"""
+    rng = random.Random(seed)
+    failures = []
+    for _ in range(count):
+        case = generate_case(rng)
+        for engine, found in check_case(case, engines, max_cycles):
+            failures.append((case.to_json(), engine, found))
+    return count, failures
+
+
+def run_fuzz(engines, workers=None, seconds=None, programs=None, seed=None, max_cycles=DEFAULT_MAX_CYCLES,
+             batch_size=DEFAULT_BATCH_SIZE, max_failures=DEFAULT_MAX_FAILURES, log=sys.stderr):
+    """Fuzz until seconds or programs run out (or max_failures mismatches are found).
+
+    Returns (programs checked, elapsed seconds, [(case JSON, engine, differences)]).
+    Batches are seeded from seed and their index, so a run can be repeated.
+    """
+    if seed is None:
+        seed = random.randrange(1 << 32)
+    print(f"fuzzing {', '.join(engines)} with seed {seed}", file=log)
+    workers = workers or os.cpu_count() or 1
+    start = time.perf_counter()
+    deadline = None if seconds is None else start + seconds
+    checked = submitted = 0
+    failures = []
+    next_report = start + REPORT_INTERVAL
+
+    def more():
+        return ((deadline is None or time.perf_counter() < deadline)
+                and (programs is None or submitted < programs) and len(failures) < max_failures)
+
+    def batch():
+        nonlocal submitted
+        count = batch_size if programs is None else min(batch_size, programs - submitted)
+        submitted += count
+        return f"{seed}:{submitted}", count, engines, max_cycles
+
+    def collect(result):
+        nonlocal checked, next_report
+        count, found = result
+        checked += count
+        failures.extend(found)
+        now = time.perf_counter()
+        if now >= next_report:
+            print(f"{checked} programs, {checked / (now - start):.0f}/s, {len(failures)} mismatches", file=log)
+            next_report = now + REPORT_INTERVAL
+
+    if workers == 1:
+        while more():
+            collect(fuzz_batch(*batch()))
+    else:
+        from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            pending = set()
+            while True:
+                while more() and len(pending) < 2 * workers:
+                    pending.add(pool.submit(fuzz_batch, *batch()))
+                if not pending:
+                    break
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    collect(future.result())
+    return checked, time.perf_counter() - start, failures
+
+
+def kind(found):
+    # What differs first, e.g. memory rather than memory[4]
+    return found[0].split(":")[0].split("[")[0].split(" ")[0]
+
+
+def reproducers(failures, max_cycles):
+    """Shrink the first mismatch of each engine and kind of difference"""
+    seen = set()
+    for entry, engine, found in failures:
+        if (engine, kind(found)) in seen:
+            continue
+        seen.add((engine, kind(found)))
+        case = shrink(Case.from_json(entry), engine, max_cycles)
+        found = check_engine(case, engine, run_reference(case, max_cycles), max_cycles)
+        if (engine, kind(found), case.cost()) in seen:
+            continue  # Shrunk to a reproducer already reported
+        seen.add((engine, kind(found), case.cost()))
+        yield {"engine": engine, "max_cycles": max_cycles, "differences": found, **case.to_json()}
+
+
+def replay(path, engines, max_cycles):
+    """Re-check saved reproducers; returns the number that still disagree"""
+    remaining = 0
+    with open(path) as f:
+        for line in f:
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            case = Case.from_json(entry)
+            cycles = entry.get("max_cycles", max_cycles)
+            checked = [entry["engine"]] if "engine" in entry else engines
+            for engine, found in check_case(case, checked, cycles):
+                remaining += 1
+                print(f"{engine}: " + "; ".join(found))
+    return remaining
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Differential fuzzing of the CPU execution engines")
+    parser.add_argument("--seconds", type=float, default=None, help="time to fuzz for (default 60 without --programs)")
+    parser.add_argument("--programs", type=int, default=None, help="number of programs to check")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="worker processes")
+    parser.add_argument("--seed", type=int, default=None, help="seed for repeatable runs")
+    parser.add_argument("--engines", help=f"comma-separated subset of {', '.join(ENGINES)}")
+    parser.add_argument("--max-cycles", type=int, default=DEFAULT_MAX_CYCLES, help="cycle budget of each program")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="programs sent to a worker at a time")
+    parser.add_argument("--max-failures", type=int, default=DEFAULT_MAX_FAILURES,
+                        help="stop after this many mismatches")
+    parser.add_argument("-o", "--output", help="write shrunk reproducers as JSON lines (default: stdout)")
+    parser.add_argument("--replay", help="re-check reproducers from a JSON lines file instead of fuzzing")
+    args = parser.parse_args(argv)
+
+    engines = available_engines()
+    if args.engines:
+        selected = args.engines.split(",")
+        unknown = [engine for engine in selected if engine not in engines]
+        if unknown:
+            parser.error(f"unknown or unavailable engines: {', '.join(unknown)}")
+        engines = selected
+
+    if args.replay:
+        sys.exit(1 if replay(args.replay, engines, args.max_cycles) else 0)
+
+    seconds = args.seconds
+    if seconds is None and args.programs is None:
+        seconds = 60.0
+    checked, elapsed, failures = run_fuzz(engines, args.workers, seconds, args.programs, args.seed,
+                                          args.max_cycles, args.batch_size, args.max_failures)
+    print(f"{checked} programs in {elapsed:.1f}s ({checked / elapsed:.0f} programs/s), "
+          f"{len(failures)} mismatches", file=sys.stderr)
+    if not failures:
+        return
+    output = open(args.output, "w") if args.output else sys.stdout
+    try:
+        for entry in reproducers(failures, args.max_cycles):
+            output.write(json.dumps(entry) + "\n")
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
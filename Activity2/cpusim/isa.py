@@ -0,0 +1,83 @@
+# Integer opcodes for the decoded instruction form
+NOP = 0  # Empty memory cell
+LOAD = 1
+STORE = 2
+ADD = 3
+SUB = 4
+HLT = 5
+# Malformed instructions keep their own opcodes so errors are logged at execute time
+MISSING_OPERAND = 6
+INVALID_ADDRESS = 7
+UNKNOWN = 8
+# Branches: PC ← operand always (JMP), when AC == 0 (JZ) or when AC < 0 (JN)
+JMP = 9
+JZ = 10
+JN = 11
+
+OPCODE_COUNT = 12
+BRANCHES = (JMP, JZ, JN)
+
+OPCODES = {
+    "LOAD": LOAD,
+    "STORE": STORE,
+    "ADD": ADD,
+    "SUB": SUB,
+    "HLT": HLT,
+    "JMP": JMP,
+    "JZ": JZ,
+    "JN": JN,
+}
+
+MNEMONICS = {value: name for name, value in OPCODES.items()}
+
+# Display names for every opcode, including empty cells and malformed instructions
+NAMES = dict(MNEMONICS)
+NAMES.update({
+    NOP: "NOP",
+    MISSING_OPERAND: "MISSING_OPERAND",
+    INVALID_ADDRESS: "INVALID_ADDRESS",
+    UNKNOWN: "UNKNOWN",
+})
+
+EMPTY = (NOP, 0, "")
+
+
+def branch_taken(opcode, ac):
+    if opcode == JZ:
+        return ac == 0
+    if opcode == JN:
+        return ac < 0
+    return True
+
+
+def decode(instruction):
+    """Decode an instruction string into an (opcode, operand, text) tuple"""
+    if not instruction or instruction.strip() == "":
+        return (NOP, 0, instruction)
+
+    instruction_parts = instruction.split()
+    opcode = instruction_parts[0]
+
+    if opcode == "HLT":
+        return (HLT, 0, instruction)
+
+    if len(instruction_parts) < 2:
+        return (MISSING_OPERAND, 0, instruction)
+
+    try:
+        address = int(instruction_parts[1])
+    except ValueError:
+        return (INVALID_ADDRESS, 0, instruction)
+
+    return (OPCODES.get(opcode, UNKNOWN), address, instruction)
+
+
+def format_instruction(opcode, operand):
+    """Canonical text of a decoded instruction, or None for malformed opcodes"""
+    if opcode == NOP:
+        return ""
+    if opcode == HLT:
+        return "HLT"
+    if opcode in MNEMONICS:
+        return f"{MNEMONICS[opcode]} {operand}"
+    return None
@@ -0,0 +1,112 @@
+"""Undo journal for stepping a CPU backwards.
+
+Every journaled cycle records the registers it is about to change and the one
+memory word a STORE overwrites. Every checkpoint_interval cycles a checkpoint
+copies the full state and the per-cycle records are dropped, so the journal
+never holds more than checkpoint_interval records. Going back within the
+current interval undoes records one by one; going further restores the nearest
+checkpoint and replays forward, which costs at most checkpoint_interval cycles.
+"""
+from collections import deque
+
+from . import isa
+
+DEFAULT_CHECKPOINT_INTERVAL = 256
+DEFAULT_MAX_CHECKPOINTS = 64
+
+
+class Checkpoint:
+    def __init__(self, cpu):
+        self.cycle = cpu.cycles
+        self.state = cpu_state(cpu)
+        self.data = cpu.memory.snapshot()
+        self.trace_total = cpu.trace.total
+
+    def restore(self, cpu):
+        restore_state(cpu, self.state)
+        cpu.memory.restore(self.data)
+        cpu.trace.truncate(self.trace_total)
+
+
+def cpu_state(cpu):
+    registers = cpu.registers
+    return (registers.AC, registers.PC, registers.IR, registers.MAR, registers.MDR,
+            cpu.halted, cpu.current, cpu.cycles)
+
+
+def restore_state(cpu, state):
+    registers = cpu.registers
+    (registers.AC, registers.PC, registers.IR, registers.MAR, registers.MDR,
+     cpu.halted, cpu.current, cpu.cycles) = state
+
+
+class Journal:
+    def __init__(self, cpu, checkpoint_interval=DEFAULT_CHECKPOINT_INTERVAL,
+                 max_checkpoints=DEFAULT_MAX_CHECKPOINTS):
+        self.cpu = cpu
+        self.checkpoint_interval = checkpoint_interval
+        self.checkpoints = deque([Checkpoint(cpu)], maxlen=max_checkpoints)
+        self.records = []  # (state, address, old value, trace total) since the last checkpoint
+
+    @property
+    def cycle(self):
+        return self.cpu.cycles
+
+    @property
+    def earliest_cycle(self):
+        return self.checkpoints[0].cycle
+
+    def can_step(self):
+        cpu = self.cpu
+        return not cpu.halted and cpu.registers.PC < cpu.memory.size
+
+    def step(self):
+        cpu = self.cpu
+        if not self.can_step():
+            return False
+
+        # The only memory word a cycle can change is the target of a STORE
+        memory = cpu.memory
+        opcode, address, _ = memory.get_decoded(cpu.registers.PC)
+        if opcode == isa.STORE and 0 <= address < memory.size:
+            old_value = memory.get_value(address)
+        else:
+            address = old_value = None
+        self.records.append((cpu_state(cpu), address, old_value, cpu.trace.total))
+
+        cpu.run_cycle()
+        if (cpu.cycles - self.checkpoints[-1].cycle) >= self.checkpoint_interval:
+            self.checkpoints.append(Checkpoint(cpu))
+            self.records.clear()
+        return True
+
+    def step_back(self):
+        if self.records:
+            state, address, old_value, trace_total = self.records.pop()
+            if address is not None:
+                self.cpu.memory.set_data(address, old_value)
+            restore_state(self.cpu, state)
+            self.cpu.trace.truncate(trace_total)
+            return True
+        if self.cycle <= self.earliest_cycle:
+            return False
+        return self.goto(self.cycle - 1)
+
+    def goto(self, cycle):
+        """Move to cycle (clamped to the journal's range); returns whether the CPU moved"""
+        cycle = max(cycle, self.earliest_cycle)
+        start = self.cycle
+        if cycle < start:
+            window_start = self.checkpoints[-1].cycle
+            if cycle >= window_start:
+                while self.cycle > cycle:
+                    self.step_back()
+            else:
+                # Restore the last checkpoint at or before cycle and replay from it
+                while self.checkpoints[-1].cycle > cycle:
+                    self.checkpoints.pop()
+                self.checkpoints[-1].restore(self.cpu)
+                self.records.clear()
+        while self.cycle < cycle and self.step():
+            pass
+        return self.cycle != start
@@ -0,0 +1,214 @@
+"""Loop detection and counted-loop fast-forwarding for CPU.run_program.
+
+A LoopGuard swaps in its own STORE and branch handlers, so runs without
+backward jumps never pay for it. It does two things at each loop head (the
+target of a taken backward branch):
+
+Repeated states. The machine is deterministic, so reaching the same
+(PC, AC, memory) twice means the run never ends. Memory is represented by an
+XOR of hash((address, value)) over the words stored since the guard started,
+and states are compared with Brent's cycle detection. Hashes of small ints
+collide (hash(-1) == hash(-2)), so a matching digest is only a candidate:
+the words stored since the guard started are compared with a copy taken at
+the saved state before the run is declared endless.
+
+Counted loops. Between two arrivals at the same head the CPU runs a path that
+is fixed by the branch decisions taken on it. Along a fixed path,
+LOAD/STORE/ADD/SUB make one iteration an affine map of (AC, memory). So if
+two consecutive iterations change every word by the same delta, all later
+ones do too, and so do the AC values tested by each branch. The first
+iteration whose branch decisions differ then follows in closed form, and the
+iterations before it are applied in one step.
+"""
+from collections import deque
+
+from . import isa
+
+TRACKED_ITERATIONS = 3  # Iterations compared before fast-forwarding
+
+
+class Iteration:
+    def __init__(self, head_ac, cycles, writes, branches):
+        self.head_ac = head_ac
+        self.cycles = cycles
+        self.writes = writes  # address -> value at the end of the iteration
+        self.path = tuple((pc, taken) for pc, _, taken, _ in branches)
+        self.tests = [(opcode, ac) for _, opcode, _, ac in branches]
+
+
+def first_flip(opcode, ac, delta, taken):
+    """Smallest n >= 1 for which the branch decision at ac + n*delta differs, or None"""
+    if opcode == isa.JZ:
+        if taken:
+            return 1 if delta else None
+        if delta and -ac % delta == 0 and -ac // delta > 0:
+            return -ac // delta
+        return None
+    if opcode == isa.JN:
+        if taken:
+            return (-ac + delta - 1) // delta if delta > 0 else None
+        return ac // -delta + 1 if delta < 0 else None
+    return None  # JMP is always taken
+
+
+class LoopGuard:
+    def __init__(self, cpu, fast_forward=True):
+        self.cpu = cpu
+        self.fast_forward = fast_forward
+        self.limit = None  # Cycle limit fast-forwarding must not pass
+        self.looping = False
+        self.jumped = False
+        self.skipped_cycles = 0
+        self.dirty = 0
+        self.stored = {}  # address -> current value of every word stored since the guard started
+        # Bound now, so a profiler that later wraps the accessor does not count the guard's reads
+        self.get_value = cpu.memory.get_value
+        self.original = {}  # address -> value of that word when the guard started
+
+        # Brent's cycle detection over loop-head states
+        self.saved = None
+        self.saved_stored = {}
+        self.power = 1
+        self.steps = 0
+
+        # The innermost loop being tracked
+        self.head = None
+        self.head_ac = 0
+        self.head_cycles = 0
+        self.writes = {}
+        self.branches = []  # (pc, opcode, taken, ac) in execution order
+        self.iterations = deque(maxlen=TRACKED_ITERATIONS)
+
+        cpu.dispatch[isa.STORE] = self.execute_store
+        for opcode in isa.BRANCHES:
+            cpu.dispatch[opcode] = self.execute_branch
+
+    def remove(self):
+        cpu = self.cpu
+        cpu.dispatch[isa.STORE] = cpu.execute_store
+        for opcode in isa.BRANCHES:
+            cpu.dispatch[opcode] = cpu.execute_branch
+
+    def run(self, cycles, sparse=False):
+        """Run up to cycles cycles; returns True when the run can never end"""
+        cpu = self.cpu
+        self.jumped = False
+        for _ in range(cycles):
+            # Skips and fast-forwards move the cycle count, so the caller re-checks its budget
+            if sparse and cpu.skip_empty(self.limit):
+                break
+            if not cpu.run_cycle() or self.looping or self.jumped:
+                break
+        return self.looping
+
+    def set_word(self, address, old, new):
+        self.dirty ^= hash((address, old)) ^ hash((address, new))
+        self.writes[address] = new
+        if address not in self.original:
+            self.original[address] = old
+        self.stored[address] = new
+
+    def same_memory(self):
+        # Words first stored after the saved state still held their original value then
+        saved = self.saved_stored
+        original = self.original
+        return all(value == saved.get(address, original[address]) for address, value in self.stored.items())
+
+    def execute_store(self, address):
+        if not 0 <= address < self.cpu.memory.size:
+            self.cpu.execute_store(address)
+            return
+        old = self.get_value(address)
+        self.cpu.execute_store(address)
+        self.set_word(address, old, self.get_value(address))
+
+    def execute_branch(self, address):
+        cpu = self.cpu
+        pc = cpu.registers.PC - 1
+        opcode = cpu.current[0]
+        ac = cpu.registers.AC
+        cpu.execute_branch(address)
+        taken = isa.branch_taken(opcode, ac)
+        self.branches.append((pc, opcode, taken, ac))
+        if taken and address <= pc:
+            self.at_head(address)
+
+    def at_head(self, head):
+        cpu = self.cpu
+        state = (head, cpu.registers.AC, self.dirty)
+        if state == self.saved and self.same_memory():
+            self.looping = True
+            return
+        self.steps += 1
+        if self.steps >= self.power:
+            self.saved = state
+            self.saved_stored = dict(self.stored)
+            self.power *= 2
+            self.steps = 0
+
+        if head == self.head:
+            self.iterations.append(Iteration(self.head_ac, cpu.cycles - self.head_cycles,
+                                             self.writes, self.branches))
+        else:
+            self.head = head
+            self.iterations.clear()
+        self.begin_iteration()
+        if self.fast_forward and len(self.iterations) == TRACKED_ITERATIONS:
+            self.try_fast_forward()
+
+    def begin_iteration(self):
+        self.head_ac = self.cpu.registers.AC
+        self.head_cycles = self.cpu.cycles
+        self.writes = {}
+        self.branches = []
+
+    def try_fast_forward(self):
+        first, second, third = self.iterations
+        if not (first.path == second.path == third.path
+                and first.cycles == second.cycles == third.cycles
+                and first.writes.keys() == second.writes.keys() == third.writes.keys()):
+            return
+        cpu = self.cpu
+        registers = cpu.registers
+
+        # Deltas between the heads of iterations 2, 3 and 4 (the current head) must agree
+        ac_delta = registers.AC - third.head_ac
+        if third.head_ac - second.head_ac != ac_delta:
+            return
+        word_deltas = {}
+        for address, value in third.writes.items():
+            delta = value - second.writes[address]
+            if second.writes[address] - first.writes[address] != delta:
+                return
+            word_deltas[address] = delta
+
+        # Iteration 3 + n is the first whose branch decisions differ
+        flip = None
+        for (opcode, ac), (_, previous), (_, taken) in zip(third.tests, second.tests, third.path):
+            n = first_flip(opcode, ac, ac - previous, taken)
+            if n is not None and (flip is None or n < flip):
+                flip = n
+
+        budget = None if self.limit is None else (self.limit - cpu.cycles) // third.cycles
+        if flip is None:
+            if budget is None:
+                self.looping = True  # The same path repeats forever
+                return
+            skip = budget
+        else:
+            skip = flip - 1 if budget is None else min(flip - 1, budget)
+        if skip <= 0:
+            return
+
+        registers.AC += skip * ac_delta
+        memory = cpu.memory
+        for address, delta in word_deltas.items():
+            old = memory.get_value(address)
+            new = old + skip * delta
+            memory.set_data(address, new)
+            self.set_word(address, old, new)
+        cpu.cycles += skip * third.cycles
+        self.skipped_cycles += skip * third.cycles
+        self.jumped = True
+        self.iterations.clear()
+        self.begin_iteration()
@@ -0,0 +1,238 @@
+"""Versioned binary snapshot of a whole CPU.
+
+Layout (little endian):
+    header    magic, version, flags, word_bits, memory size, cycles, metadata length
+    metadata  JSON: registers and instruction text that is not in canonical form
+    data      size int64 words              (8-byte aligned)
+    code      size packed instruction words (see compact_memory.pack)
+    bitmap    (size + 7) // 8 bytes, one bit per instruction address
+
+The memory sections are the raw CompactMemory buffers, so saving and loading
+a CompactMemory is a straight copy through memoryview with no per-word loop.
+
+Sparse memories (PagedMemory) set FLAG_SPARSE and keep the file proportional
+to what is allocated: the metadata also lists the saved data pages as
+[base, length] pairs and the program as address -> text, and the data section
+holds just those pages' int64 words back to back, with no code or bitmap.
+Version 1 images have no sparse layout and are still read.
+
+word_bits is 0 for memories whose words are unbounded Python ints (Memory,
+PagedMemory). Their words outside the int64 range are kept exactly in the
+metadata as address -> value and read as 0 in the data section, and the image
+loads back into Memory or PagedMemory, so a resumed run never starts wrapping.
+"""
+import json
+import mmap
+import struct
+from array import array
+
+from .compact_memory import CompactMemory
+from .cpu import CPU
+from .memory import Memory
+from .paged_memory import PagedMemory
+from .tracing import FULL
+
+MAGIC = b"SCPUIMG\0"
+VERSION = 2
+READ_VERSIONS = (1, 2)
+HEADER = struct.Struct("<8sHHHHQQI")
+FLAG_HALTED = 1
+FLAG_SPARSE = 2
+REGISTER_NAMES = ("AC", "PC", "IR", "MAR", "MDR")
+
+INT64_MIN = -(1 << 63)
+INT64_MAX = (1 << 63) - 1
+
+
+class ImageError(Exception):
+    pass
+
+
+def align(offset):
+    return (offset + 7) & ~7
+
+
+def int64_words(values, base, wide):
+    # Words outside int64 move to wide (address -> value) and are saved as 0
+    values = list(values)
+    if values and (min(values) < INT64_MIN or max(values) > INT64_MAX):
+        for offset, value in enumerate(values):
+            if not INT64_MIN <= value <= INT64_MAX:
+                wide[str(base + offset)] = value
+                values[offset] = 0
+    return values
+
+
+def to_compact(memory, wide):
+    # Copy any memory backend into a CompactMemory with 64-bit words
+    if isinstance(memory, CompactMemory):
+        return memory
+    compact = CompactMemory(memory.size)
+    for base, page in memory.iter_pages():
+        compact.load_data(int64_words(page, base, wide), base)
+    for address, text in memory.iter_instructions():
+        compact.set_instruction(address, text)
+    return compact
+
+
+def save_image(cpu, path):
+    registers = cpu.registers
+    metadata = {
+        "registers": {
+            "AC": registers.AC,
+            "PC": registers.PC,
+            "IR": registers.IR,
+            "MAR": registers.MAR,
+            "MDR": registers.MDR,
+        },
+    }
+    flags = FLAG_HALTED if cpu.halted else 0
+    word_bits = getattr(cpu.memory, "word_bits", 0)  # 0: unbounded words
+    wide = metadata["wide"] = {}
+    if getattr(cpu.memory, "sparse", False):
+        # Only allocated pages are written; a dense copy could be gigabytes
+        memory = cpu.memory
+        flags |= FLAG_SPARSE
+        pages = []
+        for base, page in memory.iter_pages():
+            if any(page):
+                pages.append((base, array("q", int64_words(page, base, wide))))
+        metadata["pages"] = [[base, len(words)] for base, words in pages]
+        metadata["texts"] = {}
+        metadata["program"] = {str(address): text for address, text in memory.iter_instructions()}
+        sections = [memoryview(words).cast("B") for _, words in pages]
+    else:
+        memory = to_compact(cpu.memory, wide)
+        metadata["texts"] = {str(address): text for address, text in memory.texts.items()}
+        sections = [memoryview(memory.data).cast("B"), memoryview(memory.code).cast("B"), memory.bitmap]
+    metadata = json.dumps(metadata).encode()
+    header = HEADER.pack(MAGIC, VERSION, flags, word_bits, 0, memory.size, cpu.cycles, len(metadata))
+    padding = align(len(header) + len(metadata)) - len(header) - len(metadata)
+
+    with open(path, "wb") as f:
+        f.write(header)
+        f.write(metadata)
+        f.write(bytes(padding))
+        for section in sections:
+            f.write(section)
+
+
+def load_image(path, trace_level=FULL, memory_class=None):
+    """Load a CPU snapshot; memory_class may be CompactMemory (fast path), Memory or PagedMemory.
+
+    By default an image loads into the kind of memory it was saved from: CompactMemory,
+    Memory for other dense images, PagedMemory for sparse ones.
+    """
+    with open(path, "rb") as f:
+        try:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError as e:  # mmap refuses empty files
+            raise ImageError("file is too short to be a CPU image") from e
+    with mapped:
+        view = memoryview(mapped)
+        try:
+            return read_image(view, trace_level, memory_class)
+        finally:
+            view.release()
+
+
+def read_image(view, trace_level, memory_class):
+    if len(view) < HEADER.size:
+        raise ImageError("file is too short to be a CPU image")
+    magic, version, flags, word_bits, _, size, cycles, metadata_length = HEADER.unpack_from(view)
+    if magic != MAGIC:
+        raise ImageError("not a CPU image")
+    if version not in READ_VERSIONS:
+        raise ImageError(f"unsupported image version {version}")
+    sparse = bool(flags & FLAG_SPARSE) and version >= 2
+
+    metadata_start = HEADER.size
+    if len(view) < metadata_start + metadata_length:
+        raise ImageError("image is truncated")
+    try:
+        metadata = json.loads(bytes(view[metadata_start:metadata_start + metadata_length]))
+        texts = {int(address): text for address, text in metadata["texts"].items()}
+        registers = {name: metadata["registers"][name] for name in REGISTER_NAMES}
+        if not all(type(registers[name]) is int for name in ("AC", "PC", "MAR")):
+            raise TypeError("AC, PC and MAR must be integers")
+        wide = {int(address): int(value) for address, value in metadata.get("wide", {}).items()}
+        if sparse:
+            pages = [(int(base), int(length)) for base, length in metadata["pages"]]
+            program = {int(address): text for address, text in metadata["program"].items()}
+    except (ValueError, KeyError, TypeError, AttributeError) as e:
+        raise ImageError(f"image metadata is corrupt: {e}") from e
+
+    data_start = align(metadata_start + metadata_length)
+    if memory_class is None:
+        if sparse:
+            memory_class = PagedMemory
+        else:
+            memory_class = Memory if word_bits == 0 else CompactMemory
+    word_bits = word_bits or 64  # Width of the words in the data section
+    if sparse:
+        memory = read_sparse(view, data_start, size, pages, program, memory_class, word_bits)
+    else:
+        memory = read_dense(view, data_start, size, texts, memory_class, word_bits)
+    for address, value in wide.items():
+        memory.set_data(address, value)
+
+    cpu = CPU(trace_level, memory=memory)
+    for name, value in registers.items():
+        setattr(cpu.registers, name, value)
+    cpu.halted = bool(flags & FLAG_HALTED)
+    cpu.cycles = cycles
+    if cpu.registers.PC > 0:
+        cpu.current = memory.get_decoded(cpu.registers.MAR)
+    return cpu
+
+
+def new_image_memory(memory_class, size, word_bits):
+    if memory_class is CompactMemory:
+        return CompactMemory(size, word_bits)
+    return memory_class(size)
+
+
+def read_dense(view, data_start, size, texts, memory_class, word_bits):
+    code_start = data_start + 8 * size
+    bitmap_start = code_start + 8 * size
+    bitmap_end = bitmap_start + (size + 7) // 8
+    if len(view) < bitmap_end:
+        raise ImageError("image is truncated")
+    compact = CompactMemory(size, word_bits)
+    memoryview(compact.data).cast("B")[:] = view[data_start:code_start]
+    memoryview(compact.code).cast("B")[:] = view[code_start:bitmap_start]
+    compact.bitmap[:] = view[bitmap_start:bitmap_end]
+    compact.texts = texts
+    if memory_class is CompactMemory:
+        return compact
+
+    memory = new_image_memory(memory_class, size, word_bits)
+    if getattr(memory, "sparse", False):
+        # Load the data in page-sized runs and leave the all-zero ones unallocated
+        words = view[data_start:code_start].cast("q")
+        zeros = bytes(8 * memory.page_size)
+        for base in range(0, size, memory.page_size):
+            run = words[base:base + memory.page_size]
+            if run.cast("B") != zeros[:8 * len(run)]:
+                memory.load_data(run.tolist(), base)
+    else:
+        memory.load_data(compact.data.tolist())
+    for address, text in compact.iter_instructions():
+        memory.set_instruction(address, text)
+    return memory
+
+
+def read_sparse(view, data_start, size, pages, program, memory_class, word_bits):
+    data_end = data_start + 8 * sum(length for _, length in pages)
+    if len(view) < data_end:
+        raise ImageError("image is truncated")
+    memory = new_image_memory(memory_class, size, word_bits)
+    words = view[data_start:data_end].cast("q")
+    offset = 0
+    for base, length in pages:
+        memory.load_data(words[offset:offset + length].tolist(), base)
+        offset += length
+    for address, text in program.items():
+        memory.set_instruction(address, text)
+    return memory
+
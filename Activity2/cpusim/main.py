@@ -0,0 +1,17 @@
+import sys
+
+
+def main():
+    # Qt is only imported here, so the headless tools never pay for it
+    try:
+        from PyQt5.QtWidgets import QApplication
+    except ImportError:
+        sys.exit("The GUI needs PyQt5: pip install 'cpusim[gui]'")
+    from .ui import CPUApp
+    
+    app = QApplication(sys.argv)
+    
+    window = CPUApp()
+    window.show()
+    
+    sys.exit(app.exec_())
@@ -0,0 +1,95 @@
+from .isa import EMPTY, decode
+
+DEFAULT_MEMORY_SIZE = 256
+
+class Memory:
+    def __init__(self, size=DEFAULT_MEMORY_SIZE):
+        self.size = size
+        self.data = [0] * size
+        self.instructions = [""] * size
+        self.is_instruction = [False] * size
+        self.decoded = [None] * size  # Decode cache, filled on first fetch
+    
+    def clear(self):
+        self.data = [0] * self.size
+        self.instructions = [""] * self.size
+        self.is_instruction = [False] * self.size
+        self.decoded = [None] * self.size
+    
+    def set_instruction(self, address, instruction):
+        if 0 <= address < self.size:
+            self.instructions[address] = instruction
+            self.is_instruction[address] = True
+            self.decoded[address] = None  # Invalidate only this entry
+    
+    def set_data(self, address, value):
+        if 0 <= address < self.size:
+            self.data[address] = value
+            # Don't mark as instruction - this is data
+    
+    def load_data(self, values, start=0):
+        """Bulk-load consecutive data words starting at start"""
+        values = list(values[:max(self.size - start, 0)])
+        self.data[start:start + len(values)] = values
+    
+    def load_instructions(self, instructions, start=0):
+        """Bulk-load consecutive instructions starting at start"""
+        instructions = list(instructions[:max(self.size - start, 0)])
+        end = start + len(instructions)
+        self.instructions[start:end] = instructions
+        self.is_instruction[start:end] = [True] * len(instructions)
+        self.decoded[start:end] = [None] * len(instructions)
+    
+    def get_value(self, address):
+        if 0 <= address < self.size:
+            return self.data[address]
+        return 0
+    
+    def get_instruction(self, address):
+        if 0 <= address < self.size:
+            return self.instructions[address]
+        return ""
+    
+    def get_decoded(self, address):
+        if 0 <= address < self.size:
+            entry = self.decoded[address]
+            if entry is None:
+                entry = self.decoded[address] = decode(self.instructions[address])
+            return entry
+        return EMPTY
+    
+    def is_instruction_address(self, address):
+        if 0 <= address < self.size:
+            return self.is_instruction[address]
+        return False
+    
+    def iter_pages(self):
+        """(base address, page) pairs; dense memory is a single page"""
+        yield 0, self.data
+    
+    def iter_instructions(self):
+        for address, text in enumerate(self.instructions):
+            if self.is_instruction[address]:
+                yield address, text
+    
+    def snapshot(self):
+        return self.data[:]
+    
+    def restore(self, snapshot):
+        self.data[:] = snapshot
+    
+    def diff(self, snapshot):
+        """(address, old, new) for every data word that differs from snapshot"""
+        return [(address, old, new) for address, (old, new) in enumerate(zip(snapshot, self.data))
+                if old != new]
+    
+    def get_memory_dump(self, start=0, end=10):
+        """Debug method to see memory contents"""
+        result = []
+        for addr in range(start, min(end, self.size)):
+            if self.is_instruction[addr]:
+                result.append(f"Address {addr}: INSTRUCTION = '{self.instructions[addr]}'")
+            else:
+                result.append(f"Address {addr}: DATA = {self.data[addr]}")
+        return result
+    
\ No newline at end of file
@@ -0,0 +1,236 @@
+"""Several CPU cores sharing one data memory.
+
+The data words live in a multiprocessing.shared_memory block of int64 words.
+Each core is an ordinary CPU with its own Registers, trace and instruction
+storage; only the data words are shared. Cores run either
+
+    interleaved  in this process under a deterministic scheduler: round robin,
+                 `quantum` cycles per core per turn, so runs are reproducible
+    parallel     free running, one worker process per core, attached to the
+                 shared block by name; interleaving is up to the OS
+
+Cores never use the loop guard: a core spinning on a word another core will
+set looks like an endless loop to it. Use max_cycles or max_seconds to bound
+runs instead; each core's result says why it stopped early.
+
+The shared block is dense, 8 bytes per word, so memory sizes are capped at
+paged_memory.DENSE_LIMIT words.
+
+    python -m cpusim.multicore a.prog b.prog --data shared.data --quantum 4
+    python -m cpusim.multicore a.prog b.prog --mode parallel --max-cycles 100000
+"""
+import argparse
+import json
+import sys
+import time
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+from .batch import assemble_program, load_data_file, registers_dict
+from .compact_memory import CompactMemory
+from .cpu import CPU, CYCLE_BUDGET, ENGINES, INTERPRETER, TIME_BUDGET
+from .memory import DEFAULT_MEMORY_SIZE
+from .paged_memory import DENSE_LIMIT, new_memory
+from .tracing import FULL, LEVELS
+
+INTERLEAVED = "interleaved"
+PARALLEL = "parallel"
+MODES = (INTERLEAVED, PARALLEL)
+
+
+class SharedCoreMemory(CompactMemory):
+    """CompactMemory whose data words are a view of a shared memory block.
+
+    Every core gets its own instance over the same block, so instructions and
+    decode caches stay private to the core. Words are 64 bits and wrap.
+    """
+
+    shared = True  # Other cores write these words; see CPU.run_interpreted
+
+    def __init__(self, block, size):
+        super().__init__(0)
+        self.size = size
+        self.block = block
+        self.data = block.buf[:8 * size].cast("q")
+        self.code = array("q", bytes(8 * size))
+        self.bitmap = bytearray((size + 7) // 8)
+
+    def release(self):
+        # The view has to go before the block can be closed
+        self.data.release()
+
+    def snapshot(self):
+        return array("q", self.data)
+
+
+def create_block(size):
+    if size > DENSE_LIMIT:
+        raise ValueError(f"shared memory holds at most {DENSE_LIMIT} words, not {size}")
+    return shared_memory.SharedMemory(create=True, size=max(8 * size, 1))
+
+
+def run_core(block_name, size, instructions, trace_level, engine, max_cycles=None, max_seconds=None):
+    """Worker process entry point: run one core against the shared block"""
+    block = shared_memory.SharedMemory(name=block_name)
+    memory = SharedCoreMemory(block, size)
+    try:
+        cpu = CPU(trace_level, memory=memory, engine=engine)
+        for address, instruction in instructions.items():
+            memory.set_instruction(address, instruction)
+        cpu.run_program(max_cycles=max_cycles, max_seconds=max_seconds)
+        return core_result(cpu)
+    finally:
+        memory.release()
+        block.close()
+
+
+def core_result(cpu):
+    result = {
+        "registers": registers_dict(cpu),
+        "halted": cpu.halted,
+        "cycles": cpu.cycles,
+    }
+    if cpu.stopped:
+        result["stopped"] = cpu.stopped
+    if cpu.trace.full:
+        result["log"] = cpu.execution_log
+    return result
+
+
+class MultiCore:
+    """N cores over one shared data memory; one program dict per core"""
+
+    def __init__(self, programs, data_values=None, size=DEFAULT_MEMORY_SIZE, trace_level=FULL,
+                 engine=INTERPRETER):
+        self.size = size
+        self.programs = programs
+        self.trace_level = trace_level
+        self.engine = engine
+        self.block = create_block(size)
+        self.cores = []
+        for instructions in programs:
+            core = CPU(trace_level, memory=SharedCoreMemory(self.block, size), engine=engine)
+            for address, instruction in instructions.items():
+                core.memory.set_instruction(address, instruction)
+            self.cores.append(core)
+        self.memory = SharedCoreMemory(self.block, size)  # Host view for loading and reading data
+        for address, value in (data_values or {}).items():
+            self.memory.set_data(address, value)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        if self.block is None:
+            return
+        for core in self.cores:
+            core.memory.release()
+        self.memory.release()
+        self.block.close()
+        self.block.unlink()
+        self.block = None
+
+    def run_interleaved(self, quantum=1, max_cycles=None, max_seconds=None):
+        """Round robin over the cores, quantum cycles each, until every core stops.
+
+        Each core runs at most max_cycles cycles, and the whole run at most
+        max_seconds; cores cut short get stopped set like CPU.run_program.
+        """
+        start_cycles = []
+        for core in self.cores:
+            core.trace.clear()
+            core.trace.start()
+            core.stopped = None
+            start_cycles.append(core.cycles)
+        deadline = None if max_seconds is None else time.perf_counter() + max_seconds
+        running = [(core, None if max_cycles is None else start + max_cycles)
+                   for core, start in zip(self.cores, start_cycles)]
+        while running:
+            still_running = []
+            for core, limit in running:
+                turn = quantum if limit is None else min(quantum, limit - core.cycles)
+                for _ in range(turn):
+                    if not core.run_cycle():
+                        break
+                if not core.running():
+                    continue
+                if limit is not None and core.cycles >= limit:
+                    core.stopped = CYCLE_BUDGET
+                else:
+                    still_running.append((core, limit))
+            running = still_running
+            if running and deadline is not None and time.perf_counter() >= deadline:
+                for core, _ in running:
+                    core.stopped = TIME_BUDGET
+                break
+        for core, start in zip(self.cores, start_cycles):
+            core.trace.finish(core.cycles - start, core.halted, core.stopped)
+        return [core_result(core) for core in self.cores]
+
+    def run_parallel(self, max_cycles=None, max_seconds=None):
+        """Free-running cores, one worker process each; registers come back in the results"""
+        with ProcessPoolExecutor(max_workers=max(len(self.cores), 1)) as pool:
+            futures = [
+                pool.submit(run_core, self.block.name, self.size, instructions, self.trace_level,
+                            self.engine, max_cycles, max_seconds)
+                for instructions in self.programs
+            ]
+            results = [future.result() for future in futures]
+        for core, result in zip(self.cores, results):
+            for name, value in result["registers"].items():
+                setattr(core.registers, name, value)
+            core.halted = result["halted"]
+            core.cycles = result["cycles"]
+            core.stopped = result.get("stopped")
+            core.current = core.memory.get_decoded(core.registers.MAR)
+        return results
+
+
+def load_core_program(path, size, data_values):
+    """Instructions of one core's program; words from an assembly .data section go to data_values"""
+    memory = new_memory(size)
+    empty = memory.snapshot()
+    assemble_program(path, memory)
+    data_values.update((address, value) for address, _, value in memory.diff(empty))
+    return dict(memory.iter_instructions())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run one program per core over a shared data memory")
+    parser.add_argument("programs", nargs="+", help=".prog or .asm files, one per core")
+    parser.add_argument("--data", help="shared 'address value' data file")
+    parser.add_argument("--mode", choices=MODES, default=INTERLEAVED)
+    parser.add_argument("--quantum", type=int, default=1, help="cycles per core per turn when interleaved")
+    parser.add_argument("--memory-size", type=int, default=DEFAULT_MEMORY_SIZE,
+                        help=f"words of shared memory, at most {DENSE_LIMIT}")
+    parser.add_argument("--trace", choices=sorted(LEVELS), default="off")
+    parser.add_argument("--engine", choices=ENGINES, default=INTERPRETER,
+                        help="execution engine for parallel mode")
+    parser.add_argument("--max-cycles", type=int, default=None, help="cycle budget of each core")
+    parser.add_argument("--max-seconds", type=float, default=None, help="wall-clock budget of the run")
+    args = parser.parse_args(argv)
+    if args.memory_size > DENSE_LIMIT:
+        parser.error(f"--memory-size: shared memory holds at most {DENSE_LIMIT} words")
+
+    data_values = {}
+    programs = [load_core_program(path, args.memory_size, data_values) for path in args.programs]
+    if args.data:
+        data_values.update(load_data_file(args.data, args.memory_size))
+    with MultiCore(programs, data_values, args.memory_size, LEVELS[args.trace], args.engine) as machine:
+        if args.mode == PARALLEL:
+            results = machine.run_parallel(args.max_cycles, args.max_seconds)
+        else:
+            results = machine.run_interleaved(args.quantum, args.max_cycles, args.max_seconds)
+        for core, result in enumerate(results):
+            result["core"] = core
+            sys.stdout.write(json.dumps(result) + "\n")
+        data = {address: value for address, value in enumerate(machine.memory.data.tolist()) if value}
+        sys.stdout.write(json.dumps({"data": data}) + "\n")
+
+
+if __name__ == "__main__":
+    main()
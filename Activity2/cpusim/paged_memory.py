@@ -0,0 +1,164 @@
+from bisect import bisect_left, insort
+
+from .isa import EMPTY, decode
+from .memory import Memory
+
+DENSE_LIMIT = 1 << 16  # Largest size still allocated as a dense Memory
+
+
+class PagedMemory:
+    """Sparse memory for large address spaces, with the same interface as Memory.
+
+    Data lives in fixed-size list pages that are allocated on the first non-zero
+    write; reads from untouched pages return 0 like Memory.get_value. Words are
+    unbounded Python ints, as in Memory.
+    Instructions are kept in a dict with a sorted address list so the CPU can
+    skip over runs of empty cells instead of fetching them one by one.
+    """
+
+    sparse = True
+
+    def __init__(self, size=1 << 24, page_bits=12):
+        self.size = size
+        self.page_bits = page_bits
+        self.page_size = 1 << page_bits
+        self.page_mask = self.page_size - 1
+        self.pages = {}  # page number -> list of page_size words
+        self.program = {}  # address -> instruction text
+        self.program_addresses = []  # Sorted keys of program
+        self.decoded = {}  # Decode cache, filled on first fetch
+
+    def clear(self):
+        self.pages.clear()
+        self.program.clear()
+        self.program_addresses.clear()
+        self.decoded.clear()
+
+    def new_page(self, page_number):
+        page = self.pages[page_number] = [0] * self.page_size
+        return page
+
+    def set_instruction(self, address, instruction):
+        if 0 <= address < self.size:
+            if address not in self.program:
+                insort(self.program_addresses, address)
+            self.program[address] = instruction
+            self.decoded.pop(address, None)  # Invalidate only this entry
+
+    def set_data(self, address, value):
+        if 0 <= address < self.size:
+            page = self.pages.get(address >> self.page_bits)
+            if page is None:
+                if not value:
+                    return  # Untouched pages already read as 0
+                page = self.new_page(address >> self.page_bits)
+            page[address & self.page_mask] = value
+
+    def load_data(self, values, start=0):
+        """Bulk-load consecutive data words starting at start, one page slice at a time.
+
+        Like set_data, all-zero slices of untouched pages allocate nothing.
+        """
+        values = values[:max(self.size - start, 0)]
+        offset = 0
+        while offset < len(values):
+            address = start + offset
+            page_number = address >> self.page_bits
+            page_offset = address & self.page_mask
+            count = min(self.page_size - page_offset, len(values) - offset)
+            chunk = values[offset:offset + count]
+            page = self.pages.get(page_number)
+            if page is None:
+                if not any(chunk):
+                    offset += count
+                    continue
+                page = self.new_page(page_number)
+            page[page_offset:page_offset + count] = chunk
+            offset += count
+
+    def load_instructions(self, instructions, start=0):
+        """Bulk-load consecutive instructions starting at start"""
+        for address, instruction in enumerate(instructions[:max(self.size - start, 0)], start):
+            self.set_instruction(address, instruction)
+
+    def get_value(self, address):
+        if 0 <= address < self.size:
+            page = self.pages.get(address >> self.page_bits)
+            if page is not None:
+                return page[address & self.page_mask]
+        return 0
+
+    def get_instruction(self, address):
+        return self.program.get(address, "")
+
+    def get_decoded(self, address):
+        entry = self.decoded.get(address)
+        if entry is None:
+            text = self.program.get(address)
+            if text is None:
+                return EMPTY
+            entry = self.decoded[address] = decode(text)
+        return entry
+
+    def is_instruction_address(self, address):
+        return address in self.program
+
+    def next_instruction_address(self, address):
+        """Lowest instruction address at or after address, or size if there is none"""
+        index = bisect_left(self.program_addresses, address)
+        if index < len(self.program_addresses):
+            return self.program_addresses[index]
+        return self.size
+
+    def iter_pages(self):
+        """Allocated (base address, page) pairs in address order"""
+        for page_number in sorted(self.pages):
+            yield page_number << self.page_bits, self.pages[page_number]
+
+    def iter_instructions(self):
+        for address in self.program_addresses:
+            yield address, self.program[address]
+
+    def snapshot(self):
+        return {page_number: page[:] for page_number, page in self.pages.items()}
+
+    def restore(self, snapshot):
+        self.pages = {page_number: page[:] for page_number, page in snapshot.items()}
+
+    def diff(self, snapshot):
+        """(address, old, new) for every data word that differs from snapshot, page by page"""
+        changes = []
+        zeros = None
+        for page_number in sorted(set(snapshot) | set(self.pages)):
+            old = snapshot.get(page_number)
+            new = self.pages.get(page_number)
+            if old == new:
+                continue
+            if old is None or new is None:
+                zeros = zeros or [0] * self.page_size
+                old = zeros if old is None else old
+                new = zeros if new is None else new
+            base = page_number << self.page_bits
+            changes.extend(
+                (base + offset, old_value, new_value)
+                for offset, (old_value, new_value) in enumerate(zip(old, new))
+                if old_value != new_value
+            )
+        return changes
+
+    def get_memory_dump(self, start=0, end=10):
+        """Debug method to see memory contents"""
+        result = []
+        for addr in range(start, min(end, self.size)):
+            if addr in self.program:
+                result.append(f"Address {addr}: INSTRUCTION = '{self.program[addr]}'")
+            else:
+                result.append(f"Address {addr}: DATA = {self.get_value(addr)}")
+        return result
+
+
+def new_memory(size):
+    """Dense Memory for small address spaces, PagedMemory above DENSE_LIMIT words"""
+    if size <= DENSE_LIMIT:
+        return Memory(size)
+    return PagedMemory(size)
@@ -0,0 +1,232 @@
+"""Reuse the machine state of an unchanged program prefix across runs.
+
+Up to the first branch a program runs straight through, so the state after the
+first k instructions depends only on those instructions and the initial values
+of the data words they use.
+Every `stride` instructions a run stores what that stride changed under the key
+(prefix hash, touched-data hash). The next run of an edited program resumes
+from the longest chain of cached strides from address 0 and only executes
+the rest.
+Entries are evicted least recently used first, bounded by an estimate of their
+size in bytes.
+"""
+import hashlib
+from array import array
+from collections import OrderedDict
+
+from . import isa
+from .cpu import CYCLE_BUDGET
+
+DEFAULT_STRIDE = 32
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+ENTRY_BYTES = 200  # Rough fixed cost of one cached state
+WRITE_BYTES = 100  # Per memory word written by the prefix
+RECORD_BYTES = 120  # Per trace record kept for full tracing
+
+MAX_CHUNKS = 65536  # Decoded chunk infos kept before the table is reset
+
+OPERAND_OPCODES = (isa.LOAD, isa.STORE, isa.ADD, isa.SUB)
+
+
+class ChunkInfo:
+    """Decoded facts about one stride of instruction text"""
+
+    def __init__(self, memory, start, stop):
+        self.operands = []  # In-range operand addresses, in execution order
+        self.halts = False
+        for address in range(start, stop):
+            opcode, operand, _ = memory.get_decoded(address)
+            if opcode == isa.HLT or opcode in isa.BRANCHES:
+                self.halts = True  # The straight-line prefix ends here
+                break
+            if opcode in OPERAND_OPCODES and 0 <= operand < memory.size:
+                self.operands.append(operand)
+
+
+class PrefixState:
+    def __init__(self, registers, cycles, writes, records, record_cycles):
+        self.registers = registers  # (AC, PC, IR, MAR, MDR)
+        self.cycles = cycles
+        self.writes = writes  # address -> value for the words stored during this stride
+        self.records = records  # Trace records of this stride only, None unless tracing fully
+        self.record_cycles = record_cycles  # The cycle of each record; empty cells leave no record
+        self.size = ENTRY_BYTES + WRITE_BYTES * len(writes) + RECORD_BYTES * len(records or ())
+
+
+class PrefixCache:
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, stride=DEFAULT_STRIDE):
+        self.max_bytes = max_bytes
+        self.stride = stride
+        self.states = OrderedDict()
+        self.bytes = 0
+        self.chunks = {}  # (chunk digest, memory size) -> ChunkInfo
+        self.hits = 0
+        self.misses = 0
+
+    def clear(self):
+        self.states.clear()
+        self.chunks.clear()
+        self.bytes = 0
+
+    def get(self, key):
+        state = self.states.get(key)
+        if state is not None:
+            self.states.move_to_end(key)
+        return state
+
+    def put(self, key, state):
+        old = self.states.pop(key, None)
+        if old is not None:
+            self.bytes -= old.size
+        self.states[key] = state
+        self.bytes += state.size
+        while self.bytes > self.max_bytes and len(self.states) > 1:
+            _, evicted = self.states.popitem(last=False)
+            self.bytes -= evicted.size
+
+    def chunk_info(self, memory, start, stop, digest):
+        # Which operands are in range depends on the memory size, not only on the text
+        key = (digest, memory.size)
+        info = self.chunks.get(key)
+        if info is None:
+            if len(self.chunks) >= MAX_CHUNKS:
+                self.chunks.clear()
+            info = self.chunks[key] = ChunkInfo(memory, start, stop)
+        return info
+
+    def boundary_keys(self, cpu):
+        """Keys of the states after stride, 2*stride, ... instructions, up to the first HLT or branch"""
+        memory = cpu.memory
+        size = memory.size
+        texts = getattr(memory, "instructions", None)  # Memory and CompactMemory keep the text list
+        seed = repr((size, getattr(memory, "word_bits", None), cpu.trace.full)).encode()
+        prefix = hashlib.blake2b(seed, digest_size=16).digest()
+        touched = prefix
+        keys = []
+        for start in range(0, size, self.stride):
+            stop = min(start + self.stride, size)
+            if texts is not None:
+                chunk = texts[start:stop]
+            else:
+                chunk = [memory.get_instruction(address) for address in range(start, stop)]
+            chunk_digest = hashlib.blake2b("\0".join(chunk).encode(), digest_size=16).digest()
+            info = self.chunk_info(memory, start, stop, chunk_digest)
+            if info.halts:
+                break
+            prefix = hashlib.blake2b(prefix + chunk_digest, digest_size=16).digest()
+            values = repr([memory.get_value(address) for address in info.operands]).encode()
+            touched = hashlib.blake2b(touched + values, digest_size=16).digest()
+            keys.append((stop, (prefix, touched)))
+        return keys
+
+    def begin(self, cpu):
+        """Resume cpu from the longest cached prefix and return the run that records new states.
+
+        Returns None when cpu is not at the start of a fresh program, or when its
+        memory is sparse and hashing every stride of the address space would cost
+        more than running the program.
+        """
+        if cpu.halted or cpu.cycles or cpu.registers.PC or getattr(cpu.memory, "sparse", False):
+            return None
+        keys = self.boundary_keys(cpu)
+
+        # Longest run of cached boundaries from the start; each holds one stride of trace records
+        resume = -1
+        chain = []
+        for index, (_, key) in enumerate(keys):
+            state = self.get(key)
+            if state is None:
+                break
+            chain.append(state)
+            resume = index
+
+        if resume < 0:
+            self.misses += 1
+        else:
+            self.hits += 1
+            state = chain[-1]
+            registers = cpu.registers
+            registers.AC, registers.PC, registers.IR, registers.MAR, registers.MDR = state.registers
+            cpu.cycles = state.cycles
+            cpu.current = cpu.memory.get_decoded(registers.MAR)
+            set_data = cpu.memory.set_data
+            for cached in chain:
+                for address, value in cached.writes.items():
+                    set_data(address, value)
+                if cpu.trace.full:
+                    cpu.trace.extend(cached.records, cached.record_cycles)
+        return PrefixRun(self, cpu, keys, resume)
+
+
+class PrefixRun:
+    """Stores the state at each stride boundary a resumed run passes"""
+
+    def __init__(self, cache, cpu, keys, resume):
+        self.cache = cache
+        self.cpu = cpu
+        self.keys = keys
+        self.next = resume + 1  # Index into keys of the next boundary to store
+        self.written = set()  # Addresses stored since the last boundary
+        self.trace_start = cpu.trace.total
+        self.record_cycles = array("q")
+        self.resumed_cycles = cpu.cycles
+
+    def after_cycle(self):
+        cpu = self.cpu
+        opcode, address, _ = cpu.current
+        if opcode == isa.STORE and 0 <= address < cpu.memory.size:
+            self.written.add(address)
+        if self.next >= len(self.keys) or cpu.halted:
+            return
+        trace = cpu.trace
+        if trace.full:
+            new = trace.total - self.trace_start - len(self.record_cycles)
+            if new > 0:
+                self.record_cycles.extend([cpu.cycles] * new)
+        boundary, key = self.keys[self.next]
+        if cpu.registers.PC != boundary:
+            return
+
+        registers = cpu.registers
+        get_value = cpu.memory.get_value
+        records = None
+        record_cycles = self.record_cycles
+        if trace.full:
+            records = trace.records_since(self.trace_start)
+            record_cycles = record_cycles[len(record_cycles) - len(records):]
+            self.trace_start = trace.total
+            self.record_cycles = array("q")
+        state = PrefixState(
+            (registers.AC, registers.PC, registers.IR, registers.MAR, registers.MDR),
+            cpu.cycles,
+            {address: get_value(address) for address in self.written},
+            records,
+            record_cycles,
+        )
+        self.cache.put(key, state)
+        self.written.clear()
+        self.next += 1
+
+
+def run_cached(cpu, cache, max_cycles=None):
+    """run_program equivalent that resumes from and fills the prefix cache.
+
+    With max_cycles the run stops once that many cycles, counting a resumed
+    prefix, have run, and sets cpu.stopped to CYCLE_BUDGET.
+    """
+    trace = cpu.trace
+    trace.clear()
+    trace.start()
+    start_cycles = cpu.cycles
+    limit = float("inf") if max_cycles is None else start_cycles + max_cycles
+    run = cache.begin(cpu)
+    if run is None:
+        while cpu.cycles < limit and cpu.run_cycle():
+            pass
+    else:
+        while cpu.cycles < limit and cpu.run_cycle():
+            run.after_cycle()
+    cpu.stopped = CYCLE_BUDGET if cpu.running() else None
+    trace.finish(cpu.cycles - start_cycles, cpu.halted, cpu.stopped)
+    return trace
@@ -0,0 +1,80 @@
+import json
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+from . import isa
+
+
+class Profile:
+    """Counters collected by CPU.run_program(profile=...) for a single run"""
+
+    def __init__(self):
+        self.cycles = 0
+        self.opcode_counts = Counter()
+        self.opcode_times = Counter()
+        self.fetch_time = 0.0
+        self.execute_time = 0.0
+        self.reads = Counter()  # address -> Memory.get_value calls
+        self.writes = Counter()  # address -> Memory.set_data calls
+        self.wall_time = 0.0
+
+    @contextmanager
+    def count_memory_access(self, memory):
+        # Shadow the memory accessors with counting versions for the duration of the run
+        get_value = memory.get_value
+        set_data = memory.set_data
+        reads = self.reads
+        writes = self.writes
+
+        def counting_get_value(address):
+            reads[address] += 1
+            return get_value(address)
+
+        def counting_set_data(address, value):
+            writes[address] += 1
+            set_data(address, value)
+
+        memory.get_value = counting_get_value
+        memory.set_data = counting_set_data
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.wall_time += time.perf_counter() - start
+            del memory.get_value
+            del memory.set_data
+
+    def report(self):
+        opcodes = {}
+        for opcode, count in self.opcode_counts.items():
+            opcodes[isa.NAMES[opcode]] = {"count": count, "time": self.opcode_times[opcode]}
+        return {
+            "cycles": self.cycles,
+            "wall_time": self.wall_time,
+            "fetch_time": self.fetch_time,
+            "execute_time": self.execute_time,
+            "opcodes": opcodes,
+            "memory": {
+                "reads": dict(sorted(self.reads.items())),
+                "writes": dict(sorted(self.writes.items())),
+            },
+        }
+
+    def to_json(self, **kwargs):
+        return json.dumps(self.report(), **kwargs)
+
+    def summary_lines(self, top=10):
+        lines = [f"Cycles: {self.cycles}    Wall time: {self.wall_time * 1e3:.3f} ms"]
+        total = self.fetch_time + self.execute_time
+        if total:
+            lines.append(f"Fetch: {self.fetch_time / total:.1%}    Decode/execute: {self.execute_time / total:.1%}")
+        for opcode, count in self.opcode_counts.most_common():
+            elapsed = self.opcode_times[opcode]
+            lines.append(f"{isa.NAMES[opcode]:<16} {count:>8} x  {elapsed / count * 1e6:8.2f} us each")
+        accesses = self.reads + self.writes
+        if accesses:
+            lines.append(f"Hottest addresses (reads/writes, top {top}):")
+            for address, _ in accesses.most_common(top):
+                lines.append(f"  memory[{address}]: {self.reads[address]}/{self.writes[address]}")
+        return lines
@@ -0,0 +1,448 @@
+"""Local simulation service: JSON lines over a Unix socket or localhost TCP.
+
+Each request is one JSON object per line:
+
+    {"id": 1, "program": ["LOAD 10", "ADD 11", "HLT"], "data": {"10": 5, "11": 7},
+     "trace": "off", "stream": false, "engine": "interpreter", "memory_size": 256,
+     "max_cycles": 1000000, "max_seconds": 5}
+
+`program` is a list of instructions from address 0 or an {address: instruction}
+object; alternatively `source` holds assembly text (see assembler.py).
+max_seconds is capped by the server's --max-seconds. Replies carry the request
+id: {"id", "lines"} messages while a streamed run (trace "full", stream true)
+is in progress, then one {"id", "result"} or {"id", "error"}. A connection may
+keep any number of requests in flight, so clients should hold one connection
+open rather than reconnecting.
+
+Requests wait in a bounded queue. When it is full, the server stops reading
+from the socket, so the backpressure reaches the client. A dispatcher groups
+queued jobs into batches for a process pool that is started once, so small
+jobs pay neither process startup nor any GUI import. Batches only grow when
+the queue is longer than the pool, so idle workers get work first, and each
+result is sent as soon as its job finishes rather than with its batch.
+
+    python -m cpusim.service --unix /tmp/cpu.sock
+    python -m cpusim.service --port 8765 -j 4
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import signal
+import time
+from contextlib import suppress
+from concurrent.futures import ProcessPoolExecutor
+from queue import Empty
+
+from .assembler import assemble
+from .batch import registers_dict
+from .cpu import CPU, CYCLE_BUDGET, ENGINES, INTERPRETER
+from .memory import DEFAULT_MEMORY_SIZE
+from .paged_memory import new_memory
+from .tracing import FULL, LEVELS
+from .validator import Validator
+
+DEFAULT_QUEUE_SIZE = 256
+DEFAULT_BATCH_SIZE = 16
+DEFAULT_BATCH_WAIT = 0.005  # Seconds the dispatcher waits to fill a batch
+DEFAULT_MAX_SECONDS = 60.0  # Wall-clock budget of one job unless the request asks for less
+STREAM_CYCLES = 1000  # Cycles between streamed line batches
+PUMP_BATCH = 256  # Worker messages taken from the stream queue per thread hop
+MAX_LINE = 16 * 1024 * 1024  # Longest request line accepted
+
+
+class RequestError(Exception):
+    pass
+
+
+# Set in each worker process by init_worker
+stream_queue = None
+
+
+def init_worker(queue):
+    global stream_queue
+    stream_queue = queue
+
+
+def parse_request(request, max_seconds=DEFAULT_MAX_SECONDS):
+    """Validate a request and return the job sent to a worker"""
+    memory_size = request.get("memory_size", DEFAULT_MEMORY_SIZE)
+    if not isinstance(memory_size, int) or memory_size <= 0:
+        raise RequestError("memory_size must be a positive integer")
+    trace = request.get("trace", "off")
+    if trace not in LEVELS:
+        raise RequestError(f"trace must be one of {sorted(LEVELS)}")
+    engine = request.get("engine", INTERPRETER)
+    if engine not in ENGINES:
+        raise RequestError(f"engine must be one of {list(ENGINES)}")
+    max_cycles = request.get("max_cycles")
+    if max_cycles is not None and (not isinstance(max_cycles, int) or max_cycles <= 0):
+        raise RequestError("max_cycles must be a positive integer")
+    seconds = request.get("max_seconds", max_seconds)
+    if not isinstance(seconds, (int, float)) or seconds <= 0:
+        raise RequestError("max_seconds must be a positive number")
+
+    source = request.get("source")
+    if source is not None and not isinstance(source, str):
+        raise RequestError("source must be a string of assembly text")
+    program = request.get("program")
+    if program is None and source is not None:
+        program = []  # A null program next to source text means no extra instructions
+    if isinstance(program, list):
+        program = dict(enumerate(program))
+    if not isinstance(program, dict):
+        raise RequestError("program must be a list or an object of address: instruction")
+    instructions = {}
+    for address, instruction in program.items():
+        valid, address = Validator.validate_address(address, memory_size)
+        if not valid:
+            raise RequestError(f"program: {address}")
+        instructions[address] = str(instruction)
+
+    data_values = {}
+    for address, value in (request.get("data") or {}).items():
+        valid, address = Validator.validate_address(address, memory_size)
+        if not valid:
+            raise RequestError(f"data: {address}")
+        valid, value = Validator.validate_data_value(value)
+        if not valid:
+            raise RequestError(f"data: {value}")
+        data_values[address] = value
+
+    return {
+        "source": source,
+        "instructions": instructions,
+        "data": data_values,
+        "trace_level": LEVELS[trace],
+        "stream": bool(request.get("stream")) and LEVELS[trace] == FULL,
+        "engine": engine,
+        "memory_size": memory_size,
+        "max_cycles": max_cycles,
+        "max_seconds": min(seconds, max_seconds),
+    }
+
+
+def run_request(key, job):
+    """Run one parsed job in a worker process and return its result"""
+    cpu = CPU(job["trace_level"], memory=new_memory(job["memory_size"]), engine=job["engine"])
+    if job["source"] is not None:
+        assemble(job["source"].splitlines(), cpu.memory)
+    cpu.load_program(job["instructions"], job["data"])
+    start = time.perf_counter()
+    initial_data = cpu.memory.snapshot()
+    if job["stream"]:
+        # Run in STREAM_CYCLES slices, sending the new log lines after each one
+        trace = cpu.trace
+        trace.clear()
+        trace.start()
+        stream_queue.put((key, trace.header_lines()))
+        start_cycles = cpu.cycles
+        limit = None if job["max_cycles"] is None else cpu.cycles + job["max_cycles"]
+        deadline = start + job["max_seconds"]
+        sent = 0
+        while True:
+            slice_limit = cpu.cycles + STREAM_CYCLES
+            if limit is not None:
+                slice_limit = min(slice_limit, limit)
+            cpu.stopped = cpu.run_interpreted(slice_limit, deadline)
+            stream_queue.put((key, trace.lines_since(sent)))
+            sent = trace.total
+            if cpu.stopped != CYCLE_BUDGET or cpu.cycles == limit:
+                break
+        trace.finish(cpu.cycles - start_cycles, cpu.halted, cpu.stopped)
+        stream_queue.put((key, trace.footer_lines()))
+    else:
+        cpu.run_program(max_cycles=job["max_cycles"], max_seconds=job["max_seconds"])
+    wall_time = time.perf_counter() - start
+
+    result = {
+        "registers": registers_dict(cpu),
+        "halted": cpu.halted,
+        "cycles": cpu.cycles,
+        "memory_diff": {address: [old, new] for address, old, new in cpu.memory.diff(initial_data)},
+        "wall_time": wall_time,
+    }
+    if cpu.stopped:
+        result["stopped"] = cpu.stopped
+    if cpu.trace.full and not job["stream"]:
+        result["log"] = cpu.execution_log
+    return result
+
+
+def run_requests(batch):
+    """Worker entry point: run a batch of (key, job) pairs, sending each result when it is done"""
+    for key, job in batch:
+        try:
+            result = ("result", run_request(key, job))
+        except Exception as e:  # One bad job must not fail the rest of the batch
+            result = ("error", f"{type(e).__name__}: {e}")
+        stream_queue.put((key, result))  # After this job's lines: one worker's puts stay in order
+
+
+def get_messages(queue):
+    """Block for one message, then take whatever else is already queued"""
+    messages = [queue.get()]
+    while len(messages) < PUMP_BATCH and messages[-1] is not None:
+        try:
+            messages.append(queue.get_nowait())
+        except Empty:
+            break
+    return messages
+
+
+class Connection:
+    def __init__(self, writer):
+        self.writer = writer
+        self.lock = asyncio.Lock()
+        self.in_flight = 0  # Jobs queued or running whose result line is not yet written
+        self.idle = asyncio.Event()
+        self.idle.set()
+
+    def job_started(self):
+        self.in_flight += 1
+        self.idle.clear()
+
+    async def finish_job(self, message):
+        # The job's last line: once every job has sent one the connection may close
+        await self.send(message)
+        self.in_flight -= 1
+        if not self.in_flight:
+            self.idle.set()
+
+    async def send(self, message):
+        async with self.lock:
+            if self.writer.is_closing():
+                return
+            self.writer.write(json.dumps(message).encode() + b"\n")
+            try:
+                await self.writer.drain()
+            except ConnectionError:
+                pass
+
+
+class SimulationService:
+    def __init__(self, workers=None, queue_size=DEFAULT_QUEUE_SIZE, batch_size=DEFAULT_BATCH_SIZE,
+                 batch_wait=DEFAULT_BATCH_WAIT, max_seconds=DEFAULT_MAX_SECONDS):
+        self.workers = workers or os.cpu_count() or 1
+        self.max_seconds = max_seconds
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait
+        self.queue = asyncio.Queue(queue_size)
+        self.slots = asyncio.Semaphore(self.workers)  # Batches in flight
+        # Forked workers would inherit the sockets of connections accepted before the
+        # pool grew, and a client would then never see its connection close
+        context = multiprocessing.get_context("spawn")
+        self.stream_queue = context.Queue()
+        self.pool = ProcessPoolExecutor(self.workers, mp_context=context, initializer=init_worker,
+                                        initargs=(self.stream_queue,))
+        self.jobs = {}  # key -> (connection, request id) of every job sent to the pool
+        self.next_key = 0
+        self.tasks = []
+
+    async def start(self):
+        # Start every worker now rather than on demand, so the first jobs do not wait for them
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(loop.run_in_executor(self.pool, os.getpid) for _ in range(self.workers)))
+        self.tasks.append(asyncio.create_task(self.dispatch()))
+        self.tasks.append(asyncio.create_task(self.pump_streams()))
+
+    async def close(self):
+        for task in self.tasks:
+            task.cancel()
+        self.stream_queue.put(None)  # Wakes the pump thread
+        self.pool.shutdown(cancel_futures=True)
+
+    async def handle_connection(self, reader, writer):
+        connection = Connection(writer)
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                request_id = None
+                try:
+                    request = json.loads(line)
+                    if not isinstance(request, dict):
+                        raise RequestError("request must be a JSON object")
+                    request_id = request.get("id")
+                    job = parse_request(request, self.max_seconds)
+                except (ValueError, RequestError) as e:
+                    await connection.send({"id": request_id, "error": str(e)})
+                    continue
+                # Blocks while the queue is full, which stops reading from this client
+                connection.job_started()
+                await self.queue.put((connection, request_id, job))
+        except (ConnectionError, asyncio.LimitOverrunError, ValueError):
+            pass
+        finally:
+            # A client may half-close after its last request; its results are still owed
+            await connection.idle.wait()
+            writer.close()
+
+    async def dispatch(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            await self.slots.acquire()
+            batch = [await self.queue.get()]
+            # Share the queue among the workers rather than giving it all to one
+            size = max(1, min(self.batch_size, (self.queue.qsize() + 1) // self.workers))
+            deadline = loop.time() + self.batch_wait
+            while len(batch) < size:
+                if self.queue.empty():
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                    except asyncio.TimeoutError:
+                        break
+                else:
+                    batch.append(self.queue.get_nowait())
+            asyncio.create_task(self.run_batch(batch))
+
+    async def run_batch(self, batch):
+        # Results arrive through pump_streams; this only frees the slot and reports a lost batch
+        loop = asyncio.get_running_loop()
+        keyed = []
+        try:
+            for connection, request_id, job in batch:
+                key = self.next_key
+                self.next_key += 1
+                self.jobs[key] = (connection, request_id)
+                keyed.append((key, job))
+            try:
+                await loop.run_in_executor(self.pool, run_requests, keyed)
+            except Exception as e:
+                for key, _ in keyed:
+                    job = self.jobs.pop(key, None)
+                    if job is not None:
+                        connection, request_id = job
+                        await connection.finish_job({"id": request_id, "error": f"{type(e).__name__}: {e}"})
+        finally:
+            self.slots.release()
+
+    async def pump_streams(self):
+        # Streamed lines and finished results from the workers, in the order each worker sent them
+        loop = asyncio.get_running_loop()
+        while True:
+            for item in await loop.run_in_executor(None, get_messages, self.stream_queue):
+                if item is None:
+                    return
+                key, message = item
+                if isinstance(message, list):
+                    job = self.jobs.get(key)
+                    if job is not None and message:
+                        await job[0].send({"id": job[1], "lines": message})
+                else:
+                    job = self.jobs.pop(key, None)
+                    if job is not None:
+                        kind, value = message
+                        await job[0].finish_job({"id": job[1], kind: value})
+
+
+class ServiceClient:
+    """One persistent connection with any number of requests in flight"""
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.pending = {}  # request id -> (future, line callback)
+        self.next_id = 0
+        self.receiver = asyncio.create_task(self.receive())
+
+    @classmethod
+    async def connect(cls, unix=None, host="127.0.0.1", port=None):
+        if unix:
+            reader, writer = await asyncio.open_unix_connection(unix, limit=MAX_LINE)
+        else:
+            reader, writer = await asyncio.open_connection(host, port, limit=MAX_LINE)
+        return cls(reader, writer)
+
+    async def close(self):
+        self.writer.close()
+        self.receiver.cancel()
+
+    async def submit(self, program=None, data=None, on_lines=None, **options):
+        """Run a program, or source=<assembly text>; on_lines(lines) is called with
+        streamed trace lines if given"""
+        request_id = self.next_id
+        self.next_id += 1
+        future = asyncio.get_running_loop().create_future()
+        self.pending[request_id] = (future, on_lines)
+        request = dict(options, id=request_id, data=data or {})
+        if program is not None:
+            request["program"] = program
+        if on_lines is not None:
+            request.update(trace="full", stream=True)
+        self.writer.write(json.dumps(request).encode() + b"\n")
+        await self.writer.drain()
+        return await future
+
+    async def receive(self):
+        while True:
+            line = await self.reader.readline()
+            if not line:
+                break
+            message = json.loads(line)
+            future, on_lines = self.pending.get(message.get("id"), (None, None))
+            if future is None:
+                continue
+            if "lines" in message:
+                if on_lines is not None:
+                    on_lines(message["lines"])
+            else:
+                del self.pending[message["id"]]
+                if "error" in message:
+                    future.set_exception(RequestError(message["error"]))
+                else:
+                    future.set_result(message["result"])
+        for future, _ in self.pending.values():
+            if not future.done():
+                future.set_exception(ConnectionError("service closed the connection"))
+
+
+async def serve(args):
+    # SIGTERM unwinds through service.close(), which shuts the worker processes down too
+    with suppress(NotImplementedError):  # No signal handlers in the Windows event loop
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, asyncio.current_task().cancel)
+    service = SimulationService(args.workers, args.queue_size, args.batch_size, args.batch_wait,
+                                args.max_seconds)
+    await service.start()
+    if args.unix:
+        server = await asyncio.start_unix_server(service.handle_connection, args.unix, limit=MAX_LINE)
+    else:
+        server = await asyncio.start_server(service.handle_connection, args.host, args.port,
+                                            limit=MAX_LINE)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await service.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve CPU simulations over a local socket")
+    parser.add_argument("--unix", help="Unix socket path (default: TCP)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("-j", "--workers", type=int, default=None, help="worker processes")
+    parser.add_argument("--queue-size", type=int, default=DEFAULT_QUEUE_SIZE,
+                        help="queued requests before clients are made to wait")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE,
+                        help="jobs sent to a worker at a time")
+    parser.add_argument("--batch-wait", type=float, default=DEFAULT_BATCH_WAIT,
+                        help="seconds to wait for a batch to fill")
+    parser.add_argument("--max-seconds", type=float, default=DEFAULT_MAX_SECONDS,
+                        help="wall-clock budget of each job")
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args))
+    except (KeyboardInterrupt, asyncio.CancelledError):
+        pass
+
+
+if __name__ == "__main__":
+    main()
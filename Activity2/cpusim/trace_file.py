@@ -0,0 +1,339 @@
+"""On-disk trace files: every record of a run, streamed to disk in column blocks.
+
+Layout (little endian):
+    header  magic, version, records per block, record count, text table offset and length
+    blocks  BLOCK_RECORDS records each (the last may be short), stored column after column:
+                cycle, pc, operand, before, after, value   int64
+                text                                       uint32, index into the text table
+                opcode                                     uint8
+    texts   JSON list of instruction texts
+
+Columns are what make large files cheap to inspect: seeking a cycle bisects
+the cycle column in place, and filtering by address runs mmap.find over the
+pc and operand columns instead of unpacking every record. Fields an opcode
+does not use are stored as 0; values outside int64 are stored wrapped.
+
+    python -m cpusim.trace_file run.trace --cycle 1000000 --count 20
+    python -m cpusim.trace_file run.trace --address 42
+"""
+import argparse
+import json
+import mmap
+import struct
+from array import array
+from bisect import bisect_left
+
+from .tracing import DEFAULT_CAPACITY, FULL, Trace, render_record
+
+MAGIC = b"SCPUTRC\0"
+VERSION = 1
+HEADER = struct.Struct("<8sHHIQQQ")
+BLOCK_RECORDS = 16384  # Records per block; a multiple of 8 keeps every column aligned
+
+# Column typecodes in file order: cycle, pc, operand, before, after, value, text, opcode
+COLUMNS = "qqqqqqIB"
+RECORD_BYTES = sum(array(typecode).itemsize for typecode in COLUMNS)
+CYCLE, PC, OPERAND = 0, 1, 2
+
+WORD_RANGE = 1 << 64
+
+
+def wrap(value):
+    return (value + (1 << 63)) % WORD_RANGE - (1 << 63)
+
+
+class TraceFileError(Exception):
+    pass
+
+
+class TraceWriter:
+    """Streams trace records to a file; the current block is kept in memory until it fills"""
+
+    def __init__(self, path, block_records=BLOCK_RECORDS):
+        self.path = path
+        self.block_records = block_records
+        self.file = open(path, "w+b")
+        self.reset()
+
+    def reset(self):
+        self.flushed = 0  # Records in the full blocks already on disk
+        self.columns = [array(typecode) for typecode in COLUMNS]
+        self.texts = []
+        self.text_ids = {}
+        self.file.seek(0)
+        self.file.truncate()
+        self.flush()
+
+    @property
+    def count(self):
+        return self.flushed + len(self.columns[CYCLE])
+
+    def append(self, cycle, record):
+        pc, (opcode, operand, text), before, after, value = record
+        text_id = self.text_ids.get(text)
+        if text_id is None:
+            text_id = self.text_ids[text] = len(self.texts)
+            self.texts.append(text)
+        columns = self.columns
+        try:
+            columns[0].append(cycle)
+            columns[1].append(pc)
+            columns[2].append(operand)
+            columns[3].append(before or 0)
+            columns[4].append(after or 0)
+            columns[5].append(value or 0)
+        except OverflowError:
+            # Unbounded words from a list-backed memory; drop the partial row and store it wrapped
+            length = len(columns[-1])
+            for column in columns:
+                del column[length:]
+            for column, field in zip(columns, (cycle, pc, operand, before or 0, after or 0, value or 0)):
+                column.append(wrap(field))
+        columns[6].append(text_id)
+        columns[7].append(opcode)
+        if len(columns[CYCLE]) >= self.block_records:
+            self.write_block()
+            self.flushed += len(columns[CYCLE])
+            self.columns = [array(typecode) for typecode in COLUMNS]
+
+    def block_offset(self, first_record):
+        return HEADER.size + first_record * RECORD_BYTES
+
+    def write_block(self):
+        self.file.seek(self.block_offset(self.flushed))
+        for column in self.columns:
+            column.tofile(self.file)
+
+    def flush(self):
+        """Write the partial block, the text table and the header, so readers see every record"""
+        self.write_block()
+        texts = json.dumps(self.texts).encode()
+        text_offset = self.file.tell()
+        self.file.write(texts)
+        self.file.truncate()
+        self.file.seek(0)
+        self.file.write(HEADER.pack(MAGIC, VERSION, 0, self.block_records, self.count,
+                                    text_offset, len(texts)))
+        self.file.flush()
+
+    def truncate(self, count):
+        """Drop the newest records so that only the first count remain"""
+        if count >= self.count:
+            return
+        if count < self.flushed:
+            # Bring the block holding record count back into memory
+            first = count - count % self.block_records
+            self.file.seek(self.block_offset(first))
+            columns = []
+            for typecode in COLUMNS:
+                column = array(typecode)
+                column.frombytes(self.file.read(self.block_records * column.itemsize))
+                columns.append(column)
+            self.columns = columns
+            self.flushed = first
+        keep = count - self.flushed
+        for column in self.columns:
+            del column[keep:]
+
+    def close(self):
+        if not self.file.closed:
+            self.flush()
+            self.file.close()
+
+
+class FileTrace(Trace):
+    """Trace that also streams every record to a trace file.
+
+    The in-memory buffer stays bounded as usual; the file holds the whole run.
+    Records are stamped with cpu.cycles, so the cpu is needed as the clock.
+    """
+
+    def __init__(self, path, cpu, level=FULL, capacity=DEFAULT_CAPACITY):
+        self.writer = TraceWriter(path)
+        self.cpu = cpu
+        super().__init__(level, capacity)
+
+    @property
+    def path(self):
+        return self.writer.path
+
+    def clear(self):
+        super().clear()
+        self.writer.reset()
+
+    def record(self, pc, entry, before=None, after=None, value=None):
+        record = (pc, entry, before, after, value)
+        self.records.append(record)
+        self.total += 1
+        self.writer.append(self.cpu.cycles, record)
+
+    def extend(self, records, cycles):
+        # Replayed records (see prefix_cache) come with the cycles they ran in
+        super().extend(records)
+        append = self.writer.append
+        for cycle, record in zip(cycles, records):
+            append(cycle, record)
+
+    def truncate(self, total):
+        super().truncate(total)
+        self.writer.truncate(total)
+
+    def finish(self, cycles, halted, stopped=None):
+        super().finish(cycles, halted, stopped)
+        self.writer.flush()
+
+    def flush(self):
+        self.writer.flush()
+
+    def close(self):
+        self.writer.close()
+
+
+class TraceReader:
+    """Memory-mapped trace file; records are read on demand, block by block"""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            try:
+                self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError as e:  # mmap refuses empty files
+                raise TraceFileError("not a trace file") from e
+        try:
+            if len(self.map) < HEADER.size:
+                raise TraceFileError("not a trace file")
+            magic, version, _, self.block_records, self.count, text_offset, text_length = \
+                HEADER.unpack_from(self.map)
+            if magic != MAGIC or self.block_records == 0:
+                raise TraceFileError("not a trace file")
+            if version != VERSION:
+                raise TraceFileError(f"unsupported trace file version {version}")
+            if text_offset + text_length > len(self.map) \
+                    or HEADER.size + self.count * RECORD_BYTES > text_offset:
+                raise TraceFileError("truncated trace file")
+            try:
+                self.texts = json.loads(self.map[text_offset:text_offset + text_length])
+            except ValueError as e:
+                raise TraceFileError(f"corrupt instruction texts: {e}") from e
+            if not isinstance(self.texts, list):
+                raise TraceFileError("corrupt instruction texts")
+        except TraceFileError:
+            self.map.close()
+            raise
+        self.block_count = (self.count + self.block_records - 1) // self.block_records
+        self.cached_block = None
+        self.cached_columns = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self):
+        return self.count
+
+    def close(self):
+        self.release_columns()
+        self.map.close()
+
+    def release_columns(self):
+        # Views into the map have to go before it can be closed
+        if self.cached_columns is not None:
+            for column in self.cached_columns:
+                column.release()
+        self.cached_block = self.cached_columns = None
+
+    def block_size(self, block):
+        return min(self.block_records, self.count - block * self.block_records)
+
+    def column_offsets(self, block):
+        """(start, itemsize) of each column of a block"""
+        size = self.block_size(block)
+        offset = HEADER.size + block * self.block_records * RECORD_BYTES
+        offsets = []
+        for typecode in COLUMNS:
+            itemsize = array(typecode).itemsize
+            offsets.append((offset, itemsize))
+            offset += size * itemsize
+        return offsets
+
+    def columns(self, block):
+        if block != self.cached_block:
+            self.release_columns()
+            size = self.block_size(block)
+            view = memoryview(self.map)
+            self.cached_columns = [view[start:start + size * itemsize].cast(typecode)
+                                   for (start, itemsize), typecode in zip(self.column_offsets(block), COLUMNS)]
+            view.release()
+            self.cached_block = block
+        return self.cached_columns
+
+    def cycle(self, index):
+        block, row = divmod(index, self.block_records)
+        return self.columns(block)[CYCLE][row]
+
+    def record(self, index):
+        """(cycle, record) with record in the Trace tuple form"""
+        block, row = divmod(index, self.block_records)
+        cycle, pc, operand, before, after, value, text, opcode = (column[row] for column in self.columns(block))
+        return cycle, (pc, (opcode, operand, self.texts[text]), before, after, value)
+
+    def line(self, index):
+        return render_record(self.record(index)[1])
+
+    def find_cycle(self, cycle):
+        """Index of the first record at or after cycle (len(self) when there is none)"""
+        if not self.count:
+            return 0
+        firsts = [self.cycle(block * self.block_records) for block in range(self.block_count)]
+        block = max(bisect_left(firsts, cycle) - 1, 0)
+        column = self.columns(block)[CYCLE]
+        row = bisect_left(column, cycle)
+        if row == len(column) and block + 1 < self.block_count:
+            return (block + 1) * self.block_records
+        return block * self.block_records + row
+
+    def matching(self, address):
+        """Indices of the records whose PC or operand is address, in order"""
+        pattern = struct.pack("<q", wrap(address))
+        indices = array("q")
+        for block in range(self.block_count):
+            offsets = self.column_offsets(block)
+            first = block * self.block_records
+            rows = set()
+            for column in (PC, OPERAND):
+                start, itemsize = offsets[column]
+                end = start + self.block_size(block) * itemsize
+                position = self.map.find(pattern, start, end)
+                while position >= 0:
+                    if (position - start) % itemsize == 0:
+                        rows.add((position - start) // itemsize)
+                    position = self.map.find(pattern, position + 1, end)
+            indices.extend(first + row for row in sorted(rows))
+        return indices
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Print records from a trace file")
+    parser.add_argument("path", help="trace file")
+    parser.add_argument("--cycle", type=int, default=0, help="start at the first record at or after this cycle")
+    parser.add_argument("--address", type=int, help="only records whose PC or operand is this address")
+    parser.add_argument("--count", type=int, default=50, help="records to print")
+    args = parser.parse_args(argv)
+
+    with TraceReader(args.path) as reader:
+        if args.address is not None:
+            indices = reader.matching(args.address)
+            cycles = [reader.cycle(index) for index in indices]
+            indices = indices[bisect_left(cycles, args.cycle):]
+        else:
+            indices = range(reader.find_cycle(args.cycle), len(reader))
+        print(f"{args.path}: {len(reader)} records")
+        for index in indices[:args.count]:
+            cycle, record = reader.record(index)
+            print(f"{cycle}\t{render_record(record)}")
+
+
+if __name__ == "__main__":
+    main()
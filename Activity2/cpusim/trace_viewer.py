@@ -0,0 +1,164 @@
+from bisect import bisect_left
+
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex
+from PyQt5.QtWidgets import (QGroupBox, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, QPushButton,
+                             QSpinBox, QTableView, QHeaderView, QAbstractItemView, QMessageBox)
+
+from .trace_file import TraceFileError, TraceReader
+from .tracing import render_record
+
+
+class TraceModel(QAbstractTableModel):
+    """Rows of a trace file, read from the mapped file only when the view asks for them"""
+
+    HEADERS = ["Cycle", "PC", "Instruction", "Effect"]
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.reader = None
+        self.indices = None  # Record indices passing the address filter, None when unfiltered
+        self.cached_row = None
+        self.cached_fields = None
+
+    def set_reader(self, reader):
+        self.beginResetModel()
+        self.reader = reader
+        self.indices = None
+        self.cached_row = None
+        self.endResetModel()
+
+    def set_filter(self, address):
+        self.beginResetModel()
+        self.indices = None if address is None else self.reader.matching(address)
+        self.cached_row = None
+        self.endResetModel()
+
+    def record_index(self, row):
+        return row if self.indices is None else self.indices[row]
+
+    def row_for_cycle(self, cycle):
+        """First row at or after cycle"""
+        index = self.reader.find_cycle(cycle)
+        return index if self.indices is None else bisect_left(self.indices, index)
+
+    def fields(self, row):
+        # The view asks once per column; render each row once
+        if row != self.cached_row:
+            cycle, record = self.reader.record(self.record_index(row))
+            pc, instruction, effect = render_record(record).split("\t", 2)
+            self.cached_fields = (str(cycle), pc[len("PC="):], instruction[len("IR="):],
+                                  " ".join(part for part in effect.split("\t") if part))
+            self.cached_row = row
+        return self.cached_fields
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid() or self.reader is None:
+            return 0
+        return len(self.reader) if self.indices is None else len(self.indices)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.HEADERS[section]
+        return None
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or role != Qt.DisplayRole:
+            return None
+        return self.fields(index.row())[index.column()]
+
+
+class TraceViewer(QGroupBox):
+    """Trace file panel: a lazily paged record table with seek-by-cycle and an address filter"""
+
+    def __init__(self, parent=None):
+        super().__init__("Trace File", parent)
+        self.reader = None
+        self.model = TraceModel(self)
+
+        layout = QVBoxLayout(self)
+        controls = QHBoxLayout()
+        self.path_label = QLabel()
+        controls.addWidget(self.path_label)
+        controls.addStretch()
+        controls.addWidget(QLabel("Cycle:"))
+        self.cycle = QSpinBox()
+        self.cycle.setRange(0, 2**31 - 1)
+        controls.addWidget(self.cycle)
+        self.seek_btn = QPushButton("Seek")
+        self.seek_btn.clicked.connect(self.seek_cycle)
+        controls.addWidget(self.seek_btn)
+        controls.addWidget(QLabel("Address:"))
+        self.address = QLineEdit()
+        self.address.setPlaceholderText("PC or operand")
+        self.address.returnPressed.connect(self.apply_filter)
+        controls.addWidget(self.address)
+        self.filter_btn = QPushButton("Filter")
+        self.filter_btn.clicked.connect(self.apply_filter)
+        controls.addWidget(self.filter_btn)
+        self.clear_filter_btn = QPushButton("Clear")
+        self.clear_filter_btn.clicked.connect(self.clear_filter)
+        controls.addWidget(self.clear_filter_btn)
+        layout.addLayout(controls)
+
+        self.table = QTableView()
+        self.table.setModel(self.model)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.verticalHeader().hide()
+        # Fixed row heights, so the view never measures rows it does not show
+        self.table.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.table.verticalHeader().setDefaultSectionSize(self.table.fontMetrics().height() + 6)
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.Interactive)
+        self.table.horizontalHeader().setStretchLastSection(True)
+        layout.addWidget(self.table)
+
+    def open_file(self, path):
+        self.close_file()
+        try:
+            self.reader = TraceReader(path)
+        except (OSError, TraceFileError) as e:
+            QMessageBox.warning(self, "Error", f"Could not open trace file: {e}")
+            return
+        self.model.set_reader(self.reader)
+        self.path_label.setText(f"{path}: {len(self.reader)} records")
+        self.address.clear()
+        self.show()
+
+    def close_file(self):
+        # The writer rewrites the file on the next run; the mapping has to go first
+        if self.reader is not None:
+            self.model.set_reader(None)
+            self.reader.close()
+            self.reader = None
+
+    def seek_cycle(self):
+        if self.reader is None:
+            return
+        row = min(self.model.row_for_cycle(self.cycle.value()), self.model.rowCount() - 1)
+        if row >= 0:
+            index = self.model.index(row, 0)
+            self.table.scrollTo(index, QAbstractItemView.PositionAtTop)
+            self.table.selectRow(row)
+
+    def apply_filter(self):
+        if self.reader is None:
+            return
+        text = self.address.text().strip()
+        if not text:
+            self.clear_filter()
+            return
+        try:
+            address = int(text)
+        except ValueError:
+            QMessageBox.warning(self, "Error", "Address must be a valid integer")
+            return
+        self.model.set_filter(address)
+        self.path_label.setText(f"{self.reader.path}: {self.model.rowCount()} of {len(self.reader)} records")
+
+    def clear_filter(self):
+        if self.reader is None:
+            return
+        self.model.set_filter(None)
+        self.path_label.setText(f"{self.reader.path}: {len(self.reader)} records")
@@ -0,0 +1,143 @@
+from collections import deque
+from itertools import islice
+
+from . import isa
+
+# Trace levels
+OFF = 0  # Nothing is recorded
+SUMMARY = 1  # Only the run header/footer and cycle count
+FULL = 2  # One record per executed instruction
+
+LEVELS = {"off": OFF, "summary": SUMMARY, "full": FULL}
+
+DEFAULT_CAPACITY = 100000
+SEPARATOR = "=" * 60
+
+
+class Trace:
+    """Bounded execution trace rendered to text only when it is read.
+
+    Each record is a (pc, entry, before, after, value) tuple where entry is the
+    decoded (opcode, operand, text) instruction. For LOAD/ADD/SUB before/after
+    are the AC and value is the memory word read; for STORE before/after are
+    the memory word and value is the AC that was stored. For branches after is
+    the target and value is the AC the condition was tested on.
+    """
+
+    def __init__(self, level=FULL, capacity=DEFAULT_CAPACITY):
+        self.records = deque(maxlen=capacity)
+        self.level = level
+        self.clear()
+
+    @property
+    def level(self):
+        return self._level
+
+    @level.setter
+    def level(self, level):
+        self._level = level
+        self.full = level >= FULL  # Checked by the CPU on every instruction
+
+    def clear(self):
+        self.records.clear()
+        self.total = 0  # Records ever added, including ones evicted from the buffer
+        self.started = False
+        self.finished = False
+        self.cycles = 0
+        self.halted = False
+        self.stopped = None  # Why a run ended early (budget, loop), None otherwise
+
+    def start(self):
+        if self._level > OFF:
+            self.started = True
+
+    def finish(self, cycles, halted, stopped=None):
+        if self._level > OFF:
+            self.finished = True
+            self.cycles = cycles
+            self.halted = halted
+            self.stopped = stopped
+
+    def record(self, pc, entry, before=None, after=None, value=None):
+        self.records.append((pc, entry, before, after, value))
+        self.total += 1
+
+    def extend(self, records, cycles=None):
+        # cycles, the cycle each record ran in, is only kept by traces that store it
+        self.records.extend(records)
+        self.total += len(records)
+
+    def truncate(self, total):
+        """Drop the newest records so that only the first total remain"""
+        remove = self.total - total
+        if remove <= 0:
+            return
+        for _ in range(min(remove, len(self.records))):
+            self.records.pop()
+        self.total = total
+
+    def header_lines(self):
+        if self.started:
+            return ["Starting program execution...", SEPARATOR]
+        return []
+
+    def footer_lines(self):
+        lines = []
+        if self.finished:
+            if self._level == SUMMARY:
+                lines.append(f"Cycles executed: {self.cycles}")
+                if not self.stopped:
+                    lines.append("Program halted." if self.halted else "Reached end of memory.")
+            if self.stopped:
+                lines.append(f"Stopped: {self.stopped}.")
+            lines.append(SEPARATOR)
+            lines.append("Program execution completed.")
+        return lines
+
+    def records_since(self, index):
+        """Records added after the first index records, oldest first"""
+        count = min(self.total - index, len(self.records))
+        if count <= 0:
+            return []
+        newest = list(islice(reversed(self.records), count))
+        newest.reverse()
+        return newest
+
+    def lines_since(self, index):
+        """Render the records added after the first index records"""
+        return [render_record(record) for record in self.records_since(index)]
+
+    def __iter__(self):
+        yield from self.header_lines()
+        dropped = self.total - len(self.records)
+        if dropped:
+            yield f"... {dropped} earlier trace records dropped ..."
+        for record in self.records:
+            yield render_record(record)
+        yield from self.footer_lines()
+
+    def lines(self):
+        return list(self)
+
+
+def render_record(record):
+    pc, (opcode, address, text), before, after, value = record
+    if opcode == isa.LOAD:
+        return f"PC={pc}\tIR={text}\tAC={before}→{after}\t\t(loaded from memory[{address}]={value})"
+    if opcode == isa.STORE:
+        return f"PC={pc}\tIR={text}\tMemory[{address}]={before}→{after}\t(stored from AC={value})"
+    if opcode == isa.ADD:
+        return f"PC={pc}\tIR={text}\tAC={before}→{after}\t\t(added memory[{address}]={value})"
+    if opcode == isa.SUB:
+        return f"PC={pc}\tIR={text}\tAC={before}→{after}\t\t(subtracted memory[{address}]={value})"
+    if opcode in isa.BRANCHES:
+        if isa.branch_taken(opcode, value):
+            return f"PC={pc}\tIR={text}\tPC→{after}\t\t(jumped, AC={value})"
+        return f"PC={pc}\tIR={text}\tPC→{after}\t\t(not taken, AC={value})"
+    if opcode == isa.HLT:
+        return f"PC={pc}\tIR={text}\tProgram Halted."
+    if opcode == isa.MISSING_OPERAND:
+        return f"PC={pc}\tIR={text}\tError: Missing operand"
+    if opcode == isa.INVALID_ADDRESS:
+        return f"PC={pc}\tIR={text}\tError: Invalid address"
+    return f"PC={pc}\tIR={text}\tError: Unknown instruction"
@@ -0,0 +1,152 @@
+"""Translate a loaded program into a compiled Python function.
+
+Without branches a program is a single basic block: execution starts at PC and
+runs straight to HLT or the end of memory. The block is turned into Python
+source that keeps AC and every touched memory word in local variables, compiled
+once, and cached by a hash of the program text. Programs that reach a branch
+are left to the interpreter.
+"""
+import hashlib
+from collections import OrderedDict
+
+from . import isa
+
+DEFAULT_CACHE_SIZE = 128
+
+
+class TranslationCache:
+    """LRU cache of translated blocks keyed by program hash"""
+
+    def __init__(self, maxsize=DEFAULT_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.blocks = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        block = self.blocks.get(key)
+        if block is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.blocks.move_to_end(key)
+        return block
+
+    def put(self, key, block):
+        self.blocks[key] = block
+        self.blocks.move_to_end(key)
+        while len(self.blocks) > self.maxsize:
+            self.blocks.popitem(last=False)
+
+    def clear(self):
+        self.blocks.clear()
+
+
+cache = TranslationCache()
+
+
+class Block:
+    def __init__(self, function, source, cycles, end_pc, last_text, halted):
+        self.function = function
+        self.source = source
+        self.cycles = cycles
+        self.end_pc = end_pc
+        self.last_text = last_text
+        self.halted = halted
+
+
+def program_key(memory, start, wraps):
+    instructions = getattr(memory, "instructions", None)  # Memory and CompactMemory keep the text list
+    if getattr(memory, "sparse", False):
+        instructions = [f"{address}:{text}" for address, text in memory.iter_instructions()]
+    elif instructions is None:
+        instructions = [memory.get_instruction(address) for address in range(memory.size)]
+    digest = hashlib.blake2b("\0".join(instructions).encode(), digest_size=16).digest()
+    return (digest, memory.size, start, wraps)
+
+
+def translate(memory, start, wraps):
+    """Build the Python function for the block starting at start"""
+    size = memory.size
+    body = []
+    reads = set()
+    stores = set()
+    cycles = 0
+    last_text = None
+    halted = False
+
+    sparse = getattr(memory, "sparse", False)
+    pc = start
+    while pc < size:
+        if sparse:
+            # Empty cells between instructions only count cycles
+            address = memory.next_instruction_address(pc)
+            if address > pc:
+                cycles += address - pc
+                last_text = ""
+                pc = address
+                continue
+        opcode, address, last_text = memory.get_decoded(pc)
+        pc += 1
+        cycles += 1
+        in_range = 0 <= address < size
+        if opcode == isa.HLT:
+            halted = True
+            break
+        if opcode in isa.BRANCHES:
+            return Block(None, None, 0, start, None, False)  # Cached so the check runs once
+        if opcode in (isa.LOAD, isa.ADD, isa.SUB) and in_range and address not in stores:
+            reads.add(address)
+        if opcode == isa.LOAD:
+            body.append(f"ac = m{address}" if in_range else "ac = 0")
+        elif opcode == isa.ADD and in_range:
+            body.append(f"ac += m{address}")
+        elif opcode == isa.SUB and in_range:
+            body.append(f"ac -= m{address}")
+        elif opcode == isa.STORE and in_range:
+            stores.add(address)
+            body.append(f"m{address} = wrap(ac)" if wraps else f"m{address} = ac")
+
+    lines = ["def block(ac, get_value, set_data, wrap):"]
+    lines.extend(f"    m{address} = get_value({address})" for address in sorted(reads))
+    lines.extend(f"    {line}" for line in body)
+    lines.extend(f"    set_data({address}, m{address})" for address in sorted(stores))
+    lines.append("    return ac")
+    source = "\n".join(lines) + "\n"
+
+    namespace = {}
+    exec(compile(source, f"<block {start}>", "exec"), namespace)
+    return Block(namespace["block"], source, cycles, pc, last_text, halted)
+
+
+def run_translated(cpu, translation_cache=cache, limit=None):
+    """Run cpu to completion through a translated block.
+
+    Returns False without touching the CPU when the interpreter has to be used
+    instead (full tracing, a branch, a block longer than the cycle limit, or
+    nothing left to run).
+    """
+    memory = cpu.memory
+    start = cpu.registers.PC
+    if cpu.trace.full or cpu.halted or start >= memory.size:
+        return False
+
+    wrap = getattr(memory, "wrap", None)
+    key = program_key(memory, start, wrap is not None)
+    block = translation_cache.get(key)
+    if block is None:
+        block = translate(memory, start, wrap is not None)
+        translation_cache.put(key, block)
+    if block.function is None or (limit is not None and cpu.cycles + block.cycles > limit):
+        return False
+
+    registers = cpu.registers
+    registers.AC = block.function(registers.AC, memory.get_value, memory.set_data, wrap)
+    registers.PC = block.end_pc
+    registers.MAR = block.end_pc - 1
+    registers.IR = block.last_text
+    registers.MDR = block.last_text
+    cpu.current = memory.get_decoded(registers.MAR)
+    cpu.halted = block.halted
+    cpu.cycles += block.cycles
+    return True
@@ -0,0 +1,552 @@
+import time
+from PyQt5.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, 
+                             QHBoxLayout, QLabel, QPushButton, 
+                             QTableView, QAbstractItemView,
+                             QTextEdit, QPlainTextEdit, QMessageBox, QGroupBox, QSpinBox,
+                             QHeaderView, QCheckBox, QFileDialog)
+from PyQt5.QtCore import QThread, pyqtSignal
+from PyQt5.QtGui import QTextCursor
+
+from .cpu import CYCLE_BUDGET, INFINITE_LOOP
+from .editor import DataModel, InstructionModel, InstructionDelegate, OPERAND_INSTRUCTIONS
+from .loop_guard import LoopGuard
+from .prefix_cache import PrefixCache
+from .trace_file import FileTrace
+from .trace_viewer import TraceViewer
+
+MAX_EDITOR_ROWS = 65536  # Instruction rows the editor will create
+MAX_MEMORY_SIZE = (1 << 31) - 1  # Largest QSpinBox value; sizes above paged_memory.DENSE_LIMIT are sparse
+
+
+def escape_field(text):
+    # Table text must not smuggle comments, labels or extra words into the assembly line
+    for c in ";#:,":
+        text = text.replace(c, "?")
+    return text
+
+
+class ProgramWorker(QThread):
+    """Runs a CPU off the GUI thread and streams new log lines in batches"""
+    lines_ready = pyqtSignal(list)
+    run_finished = pyqtSignal(bool)  # True when the run was cancelled
+    
+    CYCLES_PER_CHECK = 1000  # Cycles between cancellation/flush checks
+    FLUSH_INTERVAL = 0.1  # Seconds between log batches
+    
+    def __init__(self, cpu, profile=None, prefix_cache=None, parent=None):
+        super().__init__(parent)
+        self.cpu = cpu
+        self.profile = profile
+        self.prefix_cache = prefix_cache
+    
+    def run(self):
+        cpu = self.cpu
+        profile = self.profile
+        trace = cpu.trace
+        trace.clear()
+        trace.start()
+        # Records going to a trace file are shown in the trace viewer instead of the log
+        stream_records = not isinstance(trace, FileTrace)
+        self.lines_ready.emit(trace.header_lines())
+        start_cycles = cpu.cycles
+        # Skip the part of the program that is unchanged since an earlier run
+        cached_run = None
+        if self.prefix_cache is not None and profile is None:
+            cached_run = self.prefix_cache.begin(cpu)
+        sent = 0
+        last_flush = time.monotonic()
+        running = True
+        sparse = getattr(cpu.memory, "sparse", False)
+        # Ends the run when a state repeats; fast-forwarding would skip the records shown here
+        guard = LoopGuard(cpu, fast_forward=False)
+        
+        try:
+            while running and not self.isInterruptionRequested():
+                if profile is not None:
+                    # The instrumented loop runs in budgeted chunks so it can be cancelled too
+                    limit = cpu.cycles + self.CYCLES_PER_CHECK
+                    running = cpu.run_profiled(profile, limit, guard=guard) == CYCLE_BUDGET
+                else:
+                    for _ in range(self.CYCLES_PER_CHECK):
+                        if sparse:
+                            cpu.skip_empty()
+                        if not cpu.run_cycle() or guard.looping:
+                            running = False
+                            break
+                        if cached_run is not None:
+                            cached_run.after_cycle()
+                now = time.monotonic()
+                if stream_records and now - last_flush >= self.FLUSH_INTERVAL:
+                    self.lines_ready.emit(trace.lines_since(sent))
+                    sent = trace.total
+                    last_flush = now
+        finally:
+            guard.remove()
+        
+        if stream_records:
+            lines = trace.lines_since(sent)
+        else:
+            trace.flush()
+            lines = [f"{trace.total} trace records written to {trace.path}"]
+        cancelled = running
+        if cancelled:
+            lines.append("Program execution cancelled.")
+        else:
+            cpu.stopped = INFINITE_LOOP if guard.looping else None
+            trace.finish(cpu.cycles - start_cycles, cpu.halted, cpu.stopped)
+            lines.extend(trace.footer_lines())
+        self.lines_ready.emit(lines)
+        self.run_finished.emit(cancelled)
+
+class CPUApp(QMainWindow):
+    def __init__(self):
+        super().__init__()
+        self.cpu = None
+        self.worker = None
+        self.trace_path = None  # Runs stream their records here while "Trace to file" is checked
+        self.resume_cpu = False  # Run continues the loaded image instead of rebuilding the CPU
+        self.profile = None
+        self.shown_records = 0  # Trace records already appended to the output view
+        self.prefix_cache = PrefixCache()
+        self.data_model = DataModel(self)
+        self.instruction_model = InstructionModel(self.data_model, self)
+        self.init_ui()
+    
+    def init_ui(self):
+        self.setWindowTitle("Simple Sison CPU Simulator")
+        self.setGeometry(100, 100, 1000, 800)
+        
+        central_widget = QWidget()
+        self.setCentralWidget(central_widget)
+        layout = QVBoxLayout(central_widget)
+        
+        # Setup phase
+        setup_group = QGroupBox("Program Setup")
+        setup_layout = QVBoxLayout(setup_group)
+        
+        # Instruction count input
+        count_layout = QHBoxLayout()
+        count_layout.addWidget(QLabel("Number of Instructions:"))
+        self.instruction_count = QSpinBox()
+        self.instruction_count.setRange(1, 256)
+        self.instruction_count.setValue(4)
+        count_layout.addWidget(self.instruction_count)
+        count_layout.addWidget(QLabel("Memory Size:"))
+        self.memory_size = QSpinBox()
+        self.memory_size.setRange(256, MAX_MEMORY_SIZE)
+        self.memory_size.setValue(256)
+        self.memory_size.valueChanged.connect(
+            lambda size: self.instruction_count.setMaximum(min(size, MAX_EDITOR_ROWS)))
+        count_layout.addWidget(self.memory_size)
+        count_layout.addStretch()
+        
+        setup_btn_layout = QHBoxLayout()
+        self.setup_btn = QPushButton("Setup Instructions")
+        self.setup_btn.clicked.connect(self.setup_instructions)
+        setup_btn_layout.addWidget(self.setup_btn)
+        
+        setup_layout.addLayout(count_layout)
+        setup_layout.addLayout(setup_btn_layout)
+        
+        # Instructions table
+        self.instructions_table = QTableView()
+        self.instructions_table.setModel(self.instruction_model)
+        self.instructions_table.setItemDelegate(InstructionDelegate(self.instructions_table))
+        self.instructions_table.setEditTriggers(QAbstractItemView.AllEditTriggers)
+        self.instructions_table.verticalHeader().hide()
+        self.instructions_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        setup_layout.addWidget(self.instructions_table)
+        
+        # Data values input, one virtual row per address in use
+        self.data_group = QGroupBox("Data Values")
+        data_layout = QVBoxLayout(self.data_group)
+        self.data_table = QTableView()
+        self.data_table.setModel(self.data_model)
+        self.data_table.setEditTriggers(QAbstractItemView.AllEditTriggers)
+        self.data_table.verticalHeader().hide()
+        self.data_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        data_layout.addWidget(self.data_table)
+        setup_layout.addWidget(self.data_group)
+        self.data_group.hide()
+        self.data_model.rowsInserted.connect(self.update_data_group)
+        self.data_model.rowsRemoved.connect(self.update_data_group)
+        self.data_model.modelReset.connect(self.update_data_group)
+        
+        # Execution phase
+        execution_group = QGroupBox("Execution")
+        execution_layout = QVBoxLayout(execution_group)
+        
+        # Buttons
+        btn_layout = QHBoxLayout()
+        self.run_btn = QPushButton("Run Program")
+        self.run_btn.clicked.connect(self.run_program)
+        self.step_btn = QPushButton("Step")
+        self.step_btn.clicked.connect(self.step_program)
+        self.step_back_btn = QPushButton("Step Back")
+        self.step_back_btn.clicked.connect(self.step_back_program)
+        self.goto_cycle = QSpinBox()
+        self.goto_cycle.setRange(0, 2**31 - 1)
+        self.goto_btn = QPushButton("Go to Cycle")
+        self.goto_btn.clicked.connect(self.goto_program_cycle)
+        self.reset_btn = QPushButton("Reset")
+        self.reset_btn.clicked.connect(self.reset_program)
+        self.cancel_btn = QPushButton("Cancel")
+        self.cancel_btn.clicked.connect(self.cancel_program)
+        self.open_program_btn = QPushButton("Open Program...")
+        self.open_program_btn.clicked.connect(self.open_program)
+        self.open_image_btn = QPushButton("Open Image...")
+        self.open_image_btn.clicked.connect(self.open_image)
+        self.save_image_btn = QPushButton("Save Image...")
+        self.save_image_btn.clicked.connect(self.save_image)
+        
+        btn_layout.addWidget(self.run_btn)
+        btn_layout.addWidget(self.step_btn)
+        btn_layout.addWidget(self.step_back_btn)
+        btn_layout.addWidget(self.goto_cycle)
+        btn_layout.addWidget(self.goto_btn)
+        btn_layout.addWidget(self.reset_btn)
+        btn_layout.addWidget(self.cancel_btn)
+        btn_layout.addWidget(self.open_program_btn)
+        btn_layout.addWidget(self.open_image_btn)
+        btn_layout.addWidget(self.save_image_btn)
+        self.profile_check = QCheckBox("Profile run")
+        btn_layout.addWidget(self.profile_check)
+        self.trace_file_check = QCheckBox("Trace to file")
+        self.trace_file_check.toggled.connect(self.choose_trace_file)
+        btn_layout.addWidget(self.trace_file_check)
+        self.open_trace_btn = QPushButton("Open Trace...")
+        self.open_trace_btn.clicked.connect(self.open_trace)
+        btn_layout.addWidget(self.open_trace_btn)
+        btn_layout.addStretch()
+        
+        execution_layout.addLayout(btn_layout)
+        
+        # Output
+        self.output_text = QPlainTextEdit()
+        self.output_text.setReadOnly(True)
+        execution_layout.addWidget(self.output_text)
+        
+        # Profile summary, shown after a profiled run
+        self.profile_group = QGroupBox("Profile")
+        profile_layout = QVBoxLayout(self.profile_group)
+        self.profile_text = QTextEdit()
+        self.profile_text.setReadOnly(True)
+        profile_layout.addWidget(self.profile_text)
+        execution_layout.addWidget(self.profile_group)
+        self.profile_group.hide()
+        
+        # Records of file-traced runs, paged in from the file
+        self.trace_viewer = TraceViewer()
+        execution_layout.addWidget(self.trace_viewer)
+        self.trace_viewer.hide()
+        
+        layout.addWidget(setup_group)
+        layout.addWidget(execution_group)
+        
+        self.step_btn.setEnabled(False)
+        self.run_btn.setEnabled(False)
+        self.reset_btn.setEnabled(False)
+        self.cancel_btn.setEnabled(False)
+        self.save_image_btn.setEnabled(False)
+        self.set_journal(None)
+    
+    def setup_instructions(self):
+        count = self.instruction_count.value()
+        
+        # Clear previous setup
+        self.instruction_model.reset_rows(count)
+        
+        self.step_btn.setEnabled(True)
+        self.run_btn.setEnabled(True)
+        self.reset_btn.setEnabled(True)
+    
+    def update_data_group(self, *args):
+        """Show the data panel only while some instruction uses a data address"""
+        count = self.data_model.rowCount()
+        if not count:
+            self.data_group.hide()
+            return
+        
+        self.data_group.show()
+        self.data_group.setTitle(f"Data Values ({count} addresses)")
+    
+    def program_source(self):
+        """Assembly lines for the editor tables, the address each line came from,
+        and (address, message) for operands that are not addresses"""
+        model = self.instruction_model
+        max_memory = self.memory_size.value()
+        lines = []
+        origins = []
+        errors = []
+        
+        def add(line, origin):
+            lines.append(line)
+            origins.append(origin)
+        
+        location = 0
+        for address, instruction in enumerate(model.instructions):
+            if not instruction:
+                continue
+            if address != location:
+                add(f".org {address}", address)
+            location = address + 1
+            if instruction in OPERAND_INSTRUCTIONS:
+                operand = model.operands[address]
+                if operand:
+                    # The table takes addresses only; text would otherwise read as a label
+                    try:
+                        int(operand)
+                    except ValueError:
+                        errors.append((address, f"invalid operand '{operand}'"))
+                        operand = "0"
+                add(f"{instruction} {escape_field(operand)}", address)
+            else:
+                add(instruction, address)
+        
+        # Data values, only for addresses that instructions actually use
+        add(".data", None)
+        for address in self.data_model.address_index.sorted_addresses:
+            if 0 <= address < max_memory:
+                add(f".org {address}", address)
+                add(escape_field(self.data_model.value_text(address)) or "0", address)
+        return lines, origins, errors
+    
+    def assemble_program(self):
+        """Assemble the editor tables into a fresh memory, or report every error and return None"""
+        from .assembler import AssemblyError, assemble
+        from .paged_memory import new_memory
+        
+        lines, origins, errors = self.program_source()
+        messages = [f"Address {address}: {message}" for address, message in errors]
+        memory = new_memory(self.memory_size.value())
+        try:
+            assemble(lines, memory)
+        except AssemblyError as e:
+            messages += [f"Address {origins[line_number - 1]}: {message}" for line_number, message in e.errors]
+            if e.total > len(e.errors):
+                messages.append(f"... and {e.total - len(e.errors)} more errors")
+        if messages:
+            QMessageBox.warning(self, "Error", "\n".join(messages))
+            return None
+        return memory
+    
+    def run_program(self):
+        from .cpu import CPU
+        from .profiler import Profile
+        
+        if not self.resume_cpu:
+            memory = self.assemble_program()
+            if memory is None:
+                return
+            self.close_trace_file()
+            self.cpu = CPU(memory=memory)
+        
+        self.trace_viewer.close_file()
+        if self.trace_path is not None and not isinstance(self.cpu.trace, FileTrace):
+            try:
+                self.cpu.trace = FileTrace(self.trace_path, self.cpu)
+            except OSError as e:
+                QMessageBox.warning(self, "Error", f"Could not create trace file: {e}")
+                return
+        
+        # Run program on a worker thread, streaming the log into the view
+        self.output_text.clear()
+        self.profile = Profile() if self.profile_check.isChecked() else None
+        self.worker = ProgramWorker(self.cpu, self.profile, self.prefix_cache, self)
+        self.worker.lines_ready.connect(self.append_log_lines)
+        self.worker.run_finished.connect(self.on_run_finished)
+        self.worker.finished.connect(self.worker.deleteLater)
+        self.set_running(True)
+        self.worker.start()
+    
+    def set_journal(self, journal):
+        # Reverse stepping is only available while a stepping session is journaled
+        self.journal = journal
+        self.step_back_btn.setEnabled(journal is not None)
+        self.goto_btn.setEnabled(journal is not None)
+    
+    def set_running(self, running):
+        if running:
+            self.set_journal(None)
+        self.run_btn.setEnabled(not running)
+        self.step_btn.setEnabled(not running)
+        self.reset_btn.setEnabled(not running)
+        self.setup_btn.setEnabled(not running)
+        self.open_program_btn.setEnabled(not running)
+        self.open_image_btn.setEnabled(not running)
+        self.save_image_btn.setEnabled(not running and self.cpu is not None)
+        self.cancel_btn.setEnabled(running)
+    
+    def append_log_lines(self, lines):
+        if lines:
+            self.output_text.appendPlainText("\n".join(lines))
+    
+    def on_run_finished(self, cancelled):
+        self.worker = None
+        self.shown_records = self.cpu.trace.total
+        self.set_running(False)
+        
+        if self.profile is not None:
+            self.profile_text.setPlainText("\n".join(self.profile.summary_lines()))
+            self.profile_group.show()
+        else:
+            self.profile_group.hide()
+        
+        if isinstance(self.cpu.trace, FileTrace):
+            self.cpu.trace.flush()
+            self.trace_viewer.open_file(self.cpu.trace.path)
+    
+    def choose_trace_file(self, checked):
+        if checked:
+            path, _ = QFileDialog.getSaveFileName(self, "Trace File", "", "Trace files (*.trace);;All files (*)")
+            if not path:
+                self.trace_file_check.setChecked(False)
+                return
+            self.trace_path = path
+        else:
+            self.trace_path = None
+            self.close_trace_file()
+    
+    def close_trace_file(self):
+        # Finish the file of the current CPU; later runs write where trace_path points
+        from .tracing import Trace
+        
+        if self.cpu is not None and isinstance(self.cpu.trace, FileTrace):
+            self.cpu.trace.close()
+            self.cpu.trace = Trace(self.cpu.trace.level)
+    
+    def open_trace(self):
+        path, _ = QFileDialog.getOpenFileName(self, "Open Trace", "", "Trace files (*.trace);;All files (*)")
+        if path:
+            self.trace_viewer.open_file(path)
+    
+    def cancel_program(self):
+        if self.worker is not None:
+            self.worker.requestInterruption()
+    
+    def step_program(self):
+        from .cpu import CPU
+        from .journal import Journal
+        
+        if self.cpu is None:
+            memory = self.assemble_program()
+            if memory is None:
+                return
+            
+            self.cpu = CPU(memory=memory)
+            self.output_text.clear()
+            self.shown_records = 0
+            self.save_image_btn.setEnabled(True)
+        
+        if self.journal is None or self.journal.cpu is not self.cpu:
+            self.set_journal(Journal(self.cpu))
+        
+        if not self.cpu.halted:
+            self.journal.step()
+            self.sync_log_view()
+    
+    def step_back_program(self):
+        if self.journal is not None and self.journal.step_back():
+            self.sync_log_view()
+    
+    def goto_program_cycle(self):
+        if self.journal is not None and self.journal.goto(self.goto_cycle.value()):
+            self.sync_log_view()
+    
+    def sync_log_view(self):
+        """Bring the output view in line with the trace, touching only the lines that changed"""
+        trace = self.cpu.trace
+        if trace.total < self.shown_records:
+            self.remove_last_log_lines(self.shown_records - trace.total)
+        else:
+            # Append only the lines added since the last update
+            self.append_log_lines(trace.lines_since(self.shown_records))
+        self.shown_records = trace.total
+        self.goto_cycle.setValue(self.cpu.cycles)
+    
+    def remove_last_log_lines(self, count):
+        document = self.output_text.document()
+        keep = document.blockCount() - count
+        if keep <= 0:
+            self.output_text.clear()
+            return
+        cursor = QTextCursor(document.findBlockByNumber(keep - 1))
+        cursor.movePosition(QTextCursor.EndOfBlock)
+        cursor.movePosition(QTextCursor.End, QTextCursor.KeepAnchor)
+        cursor.removeSelectedText()
+    
+    def open_program(self):
+        from .assembler import AssemblyError, assemble_file
+        from .cpu import CPU
+        from .paged_memory import new_memory
+        
+        path, _ = QFileDialog.getOpenFileName(self, "Open Program", "",
+                                              "Programs (*.asm *.prog);;All files (*)")
+        if not path:
+            return
+        memory = new_memory(self.memory_size.value())
+        try:
+            program = assemble_file(path, memory, raw=path.endswith(".prog"))
+        except (OSError, AssemblyError) as e:
+            QMessageBox.warning(self, "Error", f"Could not open program:\n{e}")
+            return
+        self.load_cpu(CPU(memory=memory), [
+            f"Loaded program {path}",
+            f"{program.instructions} instructions, {program.words} data words",
+        ])
+    
+    def open_image(self):
+        from .machine_image import ImageError, load_image
+        
+        path, _ = QFileDialog.getOpenFileName(self, "Open CPU Image", "", "CPU images (*.img);;All files (*)")
+        if not path:
+            return
+        try:
+            cpu = load_image(path)
+        except (OSError, ImageError) as e:
+            QMessageBox.warning(self, "Error", f"Could not open image: {e}")
+            return
+        
+        self.load_cpu(cpu, [
+            f"Loaded image {path}",
+            f"{cpu.registers}, halted={cpu.halted}, cycles={cpu.cycles}",
+        ])
+    
+    def load_cpu(self, cpu, lines):
+        # Run and Step now continue from the loaded state until Reset
+        self.cpu = cpu
+        self.resume_cpu = True
+        self.shown_records = 0
+        self.output_text.clear()
+        self.output_text.appendPlainText("\n".join(lines))
+        self.run_btn.setEnabled(True)
+        self.step_btn.setEnabled(True)
+        self.reset_btn.setEnabled(True)
+        self.save_image_btn.setEnabled(True)
+    
+    def save_image(self):
+        from .machine_image import ImageError, save_image
+        
+        if self.cpu is None:
+            return
+        path, _ = QFileDialog.getSaveFileName(self, "Save CPU Image", "", "CPU images (*.img);;All files (*)")
+        if not path:
+            return
+        try:
+            save_image(self.cpu, path)
+        except (OSError, ImageError) as e:
+            QMessageBox.warning(self, "Error", f"Could not save image: {e}")
+    
+    def reset_program(self):
+        if self.worker is not None:
+            self.worker.requestInterruption()
+            self.worker.wait()
+            self.worker = None
+        self.close_trace_file()
+        self.cpu = None
+        self.resume_cpu = False
+        self.save_image_btn.setEnabled(False)
+        self.set_journal(None)
+        self.shown_records = 0
+        self.output_text.clear()
+        self.setup_instructions()
@@ -1,6 +1,8 @@
+from .memory import DEFAULT_MEMORY_SIZE
+
 class Validator:
     @staticmethod
-    def validate_instruction_count(count, max_memory=256):
+    def validate_instruction_count(count, max_memory=DEFAULT_MEMORY_SIZE):
         try:
             count = int(count)
             if count <= 0 or count > max_memory:
@@ -10,7 +12,7 @@ class Validator:
             return False, "Instruction count must be a valid integer"
     
     @staticmethod
-    def validate_address(address, max_memory=256):
+    def validate_address(address, max_memory=DEFAULT_MEMORY_SIZE):
         try:
             address = int(address)
             if address < 0 or address >= max_memory:
@@ -0,0 +1,96 @@
+"""Lockstep execution of one program over many data sets with NumPy.
+
+Every lane has its own AC and data memory; the program, PC and the other
+registers are shared because the instruction stream is the same for all lanes.
+Lane values are int64 and wrap on overflow, like CompactMemory with 64-bit words.
+"""
+import numpy as np
+
+from . import isa
+from .memory import Memory
+
+
+class VectorCPU:
+    def __init__(self, memory_size=256):
+        self.memory = Memory(memory_size)  # Holds the shared program and its decode cache
+        self.ac = None
+        self.data = None
+        self.pc = 0
+        self.ir = ""
+        self.mar = 0
+        self.halted = False
+        self.cycles = 0
+
+    @property
+    def size(self):
+        return self.memory.size
+
+    def load_program(self, instructions):
+        for address, instruction in instructions.items():
+            self.memory.set_instruction(address, instruction)
+            if self.memory.get_decoded(address)[0] in isa.BRANCHES:
+                raise ValueError(f"branch at address {address}: lanes share one PC and cannot diverge")
+
+    def load_data(self, data_sets):
+        """Set the initial data of every lane.
+
+        data_sets is either a (lanes, size) array or a sequence of
+        {address: value} dicts, one per lane.
+        """
+        data = np.zeros((len(data_sets), self.size), dtype=np.int64)
+        if isinstance(data_sets, np.ndarray):
+            columns = min(data_sets.shape[1], self.size)
+            data[:, :columns] = data_sets[:, :columns]
+        else:
+            for lane, data_values in enumerate(data_sets):
+                for address, value in data_values.items():
+                    if 0 <= address < self.size:
+                        data[lane, address] = value
+        self.data = data
+        self.ac = np.zeros(len(data), dtype=np.int64)
+        self.pc = 0
+        self.ir = ""
+        self.mar = 0
+        self.halted = False
+        self.cycles = 0
+
+    def run(self):
+        """Execute the program once for all lanes and return (ac, data)"""
+        size = self.size
+        ac = self.ac
+        data = self.data
+        pc = self.pc
+        while not self.halted and pc < size:
+            opcode, address, text = self.memory.get_decoded(pc)
+            self.mar = pc
+            self.ir = text
+            pc += 1
+            self.cycles += 1
+
+            in_range = 0 <= address < size
+            if opcode == isa.LOAD:
+                if in_range:
+                    ac[:] = data[:, address]
+                else:
+                    ac[:] = 0
+            elif opcode == isa.STORE:
+                if in_range:
+                    data[:, address] = ac
+            elif opcode == isa.ADD:
+                if in_range:
+                    ac += data[:, address]
+            elif opcode == isa.SUB:
+                if in_range:
+                    ac -= data[:, address]
+            elif opcode == isa.HLT:
+                self.halted = True
+        self.pc = pc
+        return ac, data
+
+
+def run_lockstep(instructions, data_sets, memory_size=256):
+    """Run one program over many data sets; returns per-lane (ac, data) arrays"""
+    cpu = VectorCPU(memory_size)
+    cpu.load_program(instructions)
+    cpu.load_data(data_sets)
+    return cpu.run()
@@ -1,15 +1,5 @@
-import sys
-from PyQt5.QtWidgets import QApplication
-from ui import CPUApp
-
-def main():
-    app = QApplication(sys.argv)
-    
-    window = CPUApp()
-    window.show()
-    
-    sys.exit(app.exec_())
+# Runs the GUI from a source checkout: python main.py (installed: cpusim-gui)
+from cpusim.main import main
 
 if __name__ == "__main__":
     main()
-    
\ No newline at end of file
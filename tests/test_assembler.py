@@ -0,0 +1,32 @@
+import pytest
+
+from cpusim.assembler import AssemblyError, assemble
+from cpusim.memory import Memory
+
+
+def overlap_errors(lines):
+    with pytest.raises(AssemblyError) as info:
+        assemble(lines, Memory(256))
+    return info.value.errors
+
+
+def test_every_range_inside_a_long_one_is_reported():
+    lines = ["HLT"] * 100 + [".org 10", "LOAD 1", ".org 30", "LOAD 2"]
+    assert overlap_errors(lines) == [
+        (102, "instructions at 10-10 overlap those from line 1"),
+        (104, "instructions at 30-30 overlap those from line 1"),
+    ]
+
+
+def test_neighbouring_overlap_is_reported_once():
+    lines = ["HLT"] * 4 + [".org 2", "LOAD 1", "LOAD 2", "LOAD 3"]
+    assert overlap_errors(lines) == [(6, "instructions at 2-3 overlap those from line 1")]
+
+
+def test_raw_mode_keeps_prog_lines_verbatim():
+    lines = ["# header comment", "LOAD 5 ; not a comment", "loop: ADD 6", ".data", "", "  JMP x  ", "HLT"]
+    memory = Memory(16)
+    program = assemble(lines, memory, raw=True)
+    assert program.labels == {} and program.instructions == 5
+    assert [memory.get_instruction(address) for address in range(6)] == \
+        ["LOAD 5 ; not a comment", "loop: ADD 6", ".data", "JMP x", "HLT", ""]
@@ -0,0 +1,35 @@
+import io
+import json
+
+from cpusim.batch import jobs_from_manifest, run_batch, run_job
+from cpusim.paged_memory import DENSE_LIMIT
+from cpusim.tracing import OFF
+
+
+def write_manifest(tmp_path):
+    (tmp_path / "programs").mkdir()
+    (tmp_path / "programs" / "sum.prog").write_text("# sum two words\nLOAD 10\nADD 11\nSTORE 12\nSTORE 10\nHLT\n")
+    (tmp_path / "programs" / "sum.data").write_text("10 5\n11 7\n")
+    (tmp_path / "double.asm").write_text("LOAD value\nADD value\nSTORE value\nHLT\n.data\nvalue: 21\n")
+    manifest = tmp_path / "jobs.jsonl"
+    manifest.write_text("\n".join(json.dumps(entry) for entry in (
+        {"name": "sum", "program": "programs/sum.prog", "data": "programs/sum.data"},
+        {"program": "double.asm"},
+    )) + "\n")
+    return str(manifest)
+
+
+def test_manifest_jobs_report_their_memory_diff(tmp_path):
+    jobs = list(jobs_from_manifest(write_manifest(tmp_path)))
+    assert [job["name"] for job in jobs] == ["sum", "double"]
+
+    for memory_size in (64, DENSE_LIMIT + 1):
+        summed, doubled = (run_job(job, OFF, memory_size=memory_size) for job in jobs)
+        assert summed["halted"] and summed["memory_diff"] == {10: [5, 12], 12: [0, 12]}
+        assert doubled["halted"] and doubled["memory_diff"] == {4: [21, 42]}
+
+    output = io.StringIO()
+    run_batch(jobs, output, workers=1, trace_level=OFF, memory_size=64)
+    results = [json.loads(line) for line in output.getvalue().splitlines()]
+    assert [result["memory_diff"] for result in results] == [{"10": [5, 12], "12": [0, 12]},
+                                                            {"4": [21, 42]}]
@@ -0,0 +1,28 @@
+from cpusim.compact_memory import CompactMemory
+from cpusim.memory import Memory
+
+TEXTS = ["LOAD 3", "ADD  4", "HLT", "BOGUS x", "STORE 99999999999999999999", "JMP 1"]
+
+
+def test_bulk_load_matches_memory_at_every_alignment():
+    for start in range(10):
+        for count in range(20):
+            compact, memory = CompactMemory(40), Memory(40)
+            compact.get_decoded(start)  # A stale decode cache entry must not survive the load
+            program = [TEXTS[index % len(TEXTS)] for index in range(count)]
+            compact.load_instructions(program, start)
+            memory.load_instructions(program, start)
+            assert compact.instructions == memory.instructions
+            assert [compact.is_instruction_address(address) for address in range(40)] == memory.is_instruction
+            assert [compact.get_decoded(address) for address in range(start, start + count)] == \
+                [memory.get_decoded(address) for address in range(start, start + count)]
+
+
+def test_instruction_text_list_follows_writes():
+    memory = CompactMemory(8)
+    memory.load_instructions(["LOAD 1", "HLT"])
+    assert memory.instructions == ["LOAD 1", "HLT"] + [""] * 6
+    memory.set_instruction(5, "ADD 2")
+    assert memory.instructions[5] == "ADD 2"
+    memory.clear()
+    assert memory.instructions == [""] * 8
@@ -0,0 +1,51 @@
+from cpusim.cpu import CPU
+from cpusim.journal import Journal, cpu_state
+
+# Adds 3 to memory[20] and counts memory[21] down to 0, storing every cycle or two
+COUNTER = {0: "LOAD 20", 1: "ADD 22", 2: "STORE 20", 3: "LOAD 21", 4: "SUB 23", 5: "STORE 21",
+           6: "JZ 8", 7: "JMP 0", 8: "HLT"}
+DATA = {20: 0, 21: 10, 22: 3, 23: 1}
+
+
+def new_cpu():
+    cpu = CPU()
+    cpu.load_program(COUNTER, DATA)
+    cpu.trace.start()
+    return cpu
+
+
+def fresh_run(cycles):
+    cpu = new_cpu()
+    for _ in range(cycles):
+        cpu.run_cycle()
+    return cpu
+
+
+def assert_same(cpu, expected):
+    assert cpu_state(cpu) == cpu_state(expected)
+    assert [cpu.memory.get_value(address) for address in DATA] == \
+        [expected.memory.get_value(address) for address in DATA]
+    assert list(cpu.trace.lines()) == list(expected.trace.lines())
+
+
+def test_step_back_and_goto_across_checkpoints_match_a_fresh_run():
+    cpu = new_cpu()
+    journal = Journal(cpu, checkpoint_interval=4)
+    for _ in range(30):
+        assert journal.step()
+    assert len(journal.checkpoints) == 8 and len(journal.records) == 2
+
+    # Back over the checkpoint at cycle 28 and the one at 24
+    for _ in range(7):
+        assert journal.step_back()
+    assert cpu.cycles == 23
+    assert_same(cpu, fresh_run(23))
+
+    assert journal.goto(9)
+    assert_same(cpu, fresh_run(9))
+    assert journal.goto(26)
+    assert_same(cpu, fresh_run(26))
+
+    assert journal.goto(0)
+    assert not journal.step_back()
+    assert_same(cpu, fresh_run(0))
@@ -0,0 +1,50 @@
+from cpusim.cpu import CPU, INFINITE_LOOP
+from cpusim.profiler import Profile
+from cpusim.tracing import FULL, OFF
+
+# Counts memory[5] down past 0; hash(-1) == hash(-2) made the loop digest repeat early
+COUNTDOWN = {0: "LOAD 5", 1: "SUB 6", 2: "STORE 5", 3: "ADD 7", 4: "JN 9", 5: "LOAD 8", 6: "JZ 0", 9: "HLT"}
+
+
+def run(instructions, data_values, trace_level=FULL, profile=None):
+    cpu = CPU(trace_level)
+    cpu.load_program(instructions, data_values)
+    cpu.run_program(profile=profile)
+    return cpu
+
+
+def test_hash_collision_is_not_an_infinite_loop():
+    cpu = run(COUNTDOWN, {5: 146, 6: 1, 7: 3})
+    assert cpu.halted
+    assert cpu.stopped is None
+    assert cpu.cycles == 1049
+    assert cpu.memory.get_value(5) == -4
+
+
+def test_countdown_halts_for_every_start_value():
+    for start in range(400):
+        for trace_level in (FULL, OFF):
+            cpu = run(COUNTDOWN, {5: start, 6: 1, 7: 3}, trace_level)
+            assert cpu.halted and cpu.stopped is None, (start, trace_level)
+
+
+def test_repeated_state_is_an_infinite_loop():
+    cpu = run({0: "LOAD 10", 1: "STORE 11", 2: "JMP 0"}, {10: 4})
+    assert cpu.stopped == INFINITE_LOOP
+    assert not cpu.halted
+
+
+def test_profiled_run_detects_repeated_state():
+    profile = Profile()
+    cpu = run({0: "LOAD 10", 1: "STORE 11", 2: "JMP 0"}, {10: 4}, profile=profile)
+    assert cpu.stopped == INFINITE_LOOP
+    assert profile.cycles == cpu.cycles
+
+
+def test_profiled_countdown_matches_plain_run_and_counts_only_its_own_reads():
+    profile = Profile()
+    cpu = run(COUNTDOWN, {5: 146, 6: 1, 7: 3}, profile=profile)
+    assert (cpu.halted, cpu.stopped, cpu.cycles) == (True, None, 1049)
+    # 150 LOAD 5 reads plus two traced reads per STORE 5; the guard's own reads are not counted
+    assert profile.writes[5] == 150
+    assert profile.reads[5] == 150 + 2 * 150
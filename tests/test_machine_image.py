@@ -0,0 +1,125 @@
+import json
+
+import pytest
+
+from cpusim.batch import run_job
+from cpusim.compact_memory import CompactMemory
+from cpusim.cpu import CPU
+from cpusim import trace_file
+from cpusim.machine_image import HEADER, ImageError, load_image, save_image
+from cpusim.memory import Memory
+from cpusim.paged_memory import PagedMemory
+from cpusim.profiler import Profile
+from cpusim.trace_file import TraceFileError, TraceReader
+
+
+def saved_image(path):
+    cpu = CPU(memory=CompactMemory(16))
+    cpu.load_program({0: "LOAD 5", 1: "HLT"}, {5: 9})
+    cpu.run_program()
+    save_image(cpu, path)
+    return path.read_bytes()
+
+
+def with_metadata(image, metadata):
+    # Same length as the original so the memory sections stay where the header says
+    length = HEADER.unpack_from(image)[-1]
+    metadata = metadata.ljust(length)
+    assert len(metadata) == length
+    return image[:HEADER.size] + metadata + image[HEADER.size + length:]
+
+
+def test_image_round_trip(tmp_path):
+    saved_image(tmp_path / "ok.img")
+    cpu = load_image(tmp_path / "ok.img")
+    assert cpu.registers.AC == 9
+    assert cpu.halted
+
+
+def test_sparse_image_saves_only_allocated_pages(tmp_path):
+    cpu = CPU(memory=PagedMemory((1 << 31) - 1))
+    cpu.load_program({0: "LOAD 5", 1: "STORE 2000000000", 1999999990: "ADD 5", 1999999991: "HLT"},
+                     {5: 7, 123456789: -3})
+    save_image(cpu, tmp_path / "sparse.img")
+    assert (tmp_path / "sparse.img").stat().st_size < 1 << 20
+
+    cpu = load_image(tmp_path / "sparse.img")
+    assert isinstance(cpu.memory, PagedMemory)
+    assert len(cpu.memory.pages) == 2
+    assert cpu.memory.get_value(123456789) == -3
+    # The profiled loop skips the empty stretch instead of stepping through it
+    profile = Profile()
+    cpu.run_program(profile=profile, max_seconds=10)
+    assert cpu.halted and cpu.registers.AC == 14
+    assert cpu.memory.get_value(2000000000) == 7
+    assert profile.cycles == cpu.cycles == 1999999992
+
+
+DOUBLING = ["LOAD 10", "ADD 10", "STORE 10"] * 3 + ["HLT"]
+
+
+@pytest.mark.parametrize("memory_class", [Memory, PagedMemory])
+def test_resumed_unbounded_run_matches_uninterrupted_run(tmp_path, memory_class):
+    def new_cpu():
+        cpu = CPU(memory=memory_class(64))
+        cpu.load_program(dict(enumerate(DOUBLING)), {10: 1 << 62})
+        return cpu
+
+    uninterrupted = new_cpu()
+    uninterrupted.run_program()
+    assert uninterrupted.memory.get_value(10) == 1 << 65
+
+    cpu = new_cpu()
+    cpu.run_program(max_cycles=4)  # Memory[10] and AC now hold 2**63, past int64
+    save_image(cpu, tmp_path / "wide.img")
+    cpu = load_image(tmp_path / "wide.img")
+    assert type(cpu.memory) is memory_class
+    assert cpu.memory.get_value(10) == 1 << 63
+    cpu.run_program()
+    assert cpu.memory.get_value(10) == uninterrupted.memory.get_value(10)
+    assert cpu.registers.AC == uninterrupted.registers.AC
+
+
+def test_dense_image_loads_into_sparse_pages(tmp_path):
+    cpu = CPU(memory=Memory(1 << 16))
+    cpu.load_program({0: "LOAD 5", 1: "HLT"}, {5: 1, 40000: 2})
+    save_image(cpu, tmp_path / "dense.img")
+    cpu = load_image(tmp_path / "dense.img", memory_class=PagedMemory)
+    assert sorted(cpu.memory.pages) == [0, 40000 >> cpu.memory.page_bits]
+    assert cpu.memory.get_value(40000) == 2
+    assert cpu.memory.get_instruction(0) == "LOAD 5"
+
+
+@pytest.mark.parametrize("metadata", [
+    b"{not json",
+    json.dumps({"texts": {}}).encode(),
+    json.dumps({"texts": {"x": "HLT"}, "registers": {}}).encode(),
+    json.dumps({"texts": [], "registers": {}}).encode(),
+    json.dumps({"texts": {}, "registers": {"AC": 0, "PC": "2", "IR": "", "MAR": 0, "MDR": ""}}).encode(),
+])
+def test_corrupt_metadata_raises_image_error(tmp_path, metadata):
+    image = saved_image(tmp_path / "ok.img")
+    (tmp_path / "bad.img").write_bytes(with_metadata(image, metadata))
+    with pytest.raises(ImageError):
+        load_image(tmp_path / "bad.img")
+
+
+def test_empty_image_is_a_job_error(tmp_path):
+    (tmp_path / "empty.img").write_bytes(b"")
+    with pytest.raises(ImageError):
+        load_image(tmp_path / "empty.img")
+    result = run_job({"name": "empty", "image": str(tmp_path / "empty.img")})
+    assert "error" in result
+
+
+def trace_header(block_records, texts):
+    header = trace_file.HEADER
+    return header.pack(trace_file.MAGIC, trace_file.VERSION, 0, block_records, 0, header.size, len(texts)) + texts
+
+
+@pytest.mark.parametrize("contents", [b"", trace_header(0, b"[]"), trace_header(64, b"{bad"), trace_header(64, b"{}")],
+                         ids=["empty", "no-blocks", "bad-json", "texts-not-list"])
+def test_bad_trace_file_raises_trace_file_error(tmp_path, contents):
+    (tmp_path / "bad.trace").write_bytes(contents)
+    with pytest.raises(TraceFileError):
+        TraceReader(tmp_path / "bad.trace")
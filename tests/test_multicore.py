@@ -0,0 +1,46 @@
+import pytest
+
+from cpusim.cpu import CYCLE_BUDGET
+from cpusim.multicore import MultiCore
+from cpusim.paged_memory import DENSE_LIMIT
+from cpusim.tracing import OFF
+
+SPIN = {0: "LOAD 100", 1: "JZ 0", 2: "HLT"}  # Waits for another core to set memory[100]
+
+
+def setter(delay):
+    # Busy for delay cycles, then sets memory[100] to 1
+    program = {address: "LOAD 101" for address in range(delay)}
+    program.update({delay: "STORE 100", delay + 1: "HLT"})
+    return program
+
+
+def test_parallel_spin_wait_is_not_an_infinite_loop():
+    with MultiCore([SPIN, setter(20000)], {101: 1}, 32768, OFF) as machine:
+        results = machine.run_parallel(max_cycles=10 ** 7)
+        assert results[0]["halted"], results[0]
+        assert "stopped" not in results[0]
+        assert results[1]["halted"]
+        assert machine.memory.get_value(100) == 1
+
+
+def test_interleaved_spin_wait_halts():
+    with MultiCore([SPIN, setter(2000)], {101: 1}, 4096, OFF) as machine:
+        results = machine.run_interleaved()
+        assert results[0]["halted"] and results[1]["halted"]
+
+
+def test_cycle_budget_stops_a_core_that_never_halts():
+    for run in ("run_interleaved", "run_parallel"):
+        with MultiCore([SPIN, {0: "HLT"}], {}, 256, OFF) as machine:
+            results = getattr(machine, run)(max_cycles=500)
+            assert results[0]["stopped"] == CYCLE_BUDGET
+            assert results[0]["cycles"] == 500
+            assert not results[0]["halted"]
+            assert results[1]["halted"]
+            assert machine.cores[0].stopped == CYCLE_BUDGET
+
+
+def test_sizes_above_the_dense_limit_are_rejected():
+    with pytest.raises(ValueError, match="at most"):
+        MultiCore([SPIN], size=DENSE_LIMIT + 1)
@@ -0,0 +1,16 @@
+from cpusim.paged_memory import PagedMemory
+
+
+def test_load_data_leaves_all_zero_pages_unallocated():
+    memory = PagedMemory(1 << 20, page_bits=4)
+    values = [0] * 100
+    values[40] = 7
+    values[95] = -1
+    memory.load_data(values, 10)
+    assert sorted(memory.pages) == [3, 6]
+    assert memory.get_value(50) == 7 and memory.get_value(105) == -1
+    assert memory.get_value(20) == 0
+
+    # Zeros still overwrite words of pages that are already allocated
+    memory.load_data([0] * 16, 48)
+    assert memory.get_value(50) == 0 and sorted(memory.pages) == [3, 6]
@@ -0,0 +1,63 @@
+from cpusim.cpu import CPU
+from cpusim.fuzz import DEFAULT_MAX_CYCLES, Case, check_case
+from cpusim.memory import Memory
+from cpusim.prefix_cache import PrefixCache, run_cached
+from cpusim.trace_file import FileTrace, TraceReader
+from cpusim.tracing import FULL
+
+FAR_LOADS = ["LOAD 300" for _ in range(32)] + ["HLT"]  # Out of range at 256 words, in range at 1024
+
+
+def run(cache, size, data_values, program=FAR_LOADS):
+    cpu = CPU(FULL, memory=Memory(size))
+    cpu.load_program(dict(enumerate(program)), data_values)
+    run_cached(cpu, cache)
+    return cpu
+
+
+def test_chunks_are_not_shared_across_memory_sizes():
+    cache = PrefixCache()
+    assert run(cache, 256, {}).registers.AC == 0
+    assert run(cache, 1024, {300: 5}).registers.AC == 5
+    assert run(cache, 1024, {300: 7}).registers.AC == 7
+    assert run(cache, 256, {}).registers.AC == 0
+
+
+def test_resumed_run_after_edited_suffix_matches_plain_run():
+    cache = PrefixCache(stride=4)
+    program = [f"ADD {20 + address % 3}" for address in range(12)] + ["STORE 30", "HLT"]
+    data_values = {20: 1, 21: 2, 22: 3}
+    run(cache, 64, data_values, program)
+    program[9] = "SUB 21"
+    cpu = run(cache, 64, data_values, program)
+    plain = CPU(FULL, memory=Memory(64))
+    plain.load_program(dict(enumerate(program)), data_values)
+    plain.run_program()
+    assert cache.hits
+    assert cpu.registers.AC == plain.registers.AC
+    assert cpu.memory.get_value(30) == plain.memory.get_value(30)
+    assert cpu.execution_log == plain.execution_log
+
+
+def test_fuzz_variant_with_edits_and_sizes_agrees_with_reference():
+    # Operands past 8 are out of range at half the size; the shared cache must not mix them up
+    case = Case(16, {**{address: "LOAD 12" for address in range(8)}, 8: "HLT"}, {12: 5})
+    assert check_case(case, ["prefix-cache", "prefix-cache-edited"], DEFAULT_MAX_CYCLES) == []
+
+
+def test_replayed_prefix_keeps_the_cycles_of_its_trace_records(tmp_path):
+    # Empty cells run as cycles without trace records, so the record cycles have gaps
+    cache = PrefixCache(stride=4)
+    program = {0: "LOAD 20", 2: "ADD 21", 3: "STORE 22", 5: "ADD 21", 8: "SUB 20", 9: "HLT"}
+    cycles = []
+    for name in ("first", "resumed"):
+        cpu = CPU(FULL, memory=Memory(32))
+        cpu.load_program(program, {20: 4, 21: 3})
+        cpu.trace = FileTrace(str(tmp_path / f"{name}.trace"), cpu)
+        run_cached(cpu, cache)
+        cpu.trace.close()
+        with TraceReader(cpu.trace.path) as reader:
+            cycles.append([reader.record(index) for index in range(len(reader))])
+    assert cache.hits
+    assert [cycle for cycle, _ in cycles[0]] == [1, 3, 4, 6, 9, 10]
+    assert cycles[1] == cycles[0]
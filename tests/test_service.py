@@ -0,0 +1,76 @@
+import asyncio
+import json
+
+import pytest
+
+from cpusim.service import RequestError, ServiceClient, SimulationService
+
+
+def serve_and_run(tmp_path, client_code):
+    """Start a one-worker service on a Unix socket and run client_code(path) against it"""
+    async def main():
+        service = SimulationService(workers=1)
+        await service.start()
+        path = str(tmp_path / "cpu.sock")
+        server = await asyncio.start_unix_server(service.handle_connection, path)
+        try:
+            async with server:
+                return await asyncio.wait_for(client_code(path), 60)
+        finally:
+            await service.close()
+
+    return asyncio.run(main())
+
+
+def test_results_and_streamed_lines_round_trip(tmp_path):
+    async def client_code(path):
+        client = await ServiceClient.connect(unix=path)
+        lines = []
+        try:
+            plain = await client.submit(["LOAD 10", "ADD 11", "STORE 12", "HLT"], {10: 5, 11: 7},
+                                        memory_size=16)
+            streamed = await client.submit(["LOAD 10", "HLT"], {10: 3}, on_lines=lines.extend,
+                                           memory_size=16)
+            with pytest.raises(RequestError):
+                await client.submit(["HLT"], memory_size=0)
+        finally:
+            await client.close()
+        return plain, streamed, lines
+
+    plain, streamed, lines = serve_and_run(tmp_path, client_code)
+    assert plain["halted"] and plain["registers"]["AC"] == 12
+    assert plain["memory_diff"] == {"12": [0, 12]}
+    assert streamed["registers"]["AC"] == 3
+    assert lines[0] == "Starting program execution..."
+    assert lines[-1] == "Program execution completed."
+
+
+def test_source_text_through_the_client(tmp_path):
+    async def client_code(path):
+        client = await ServiceClient.connect(unix=path)
+        try:
+            return await client.submit(source="start: LOAD value\nHLT\n.data\nvalue: 42\n",
+                                       memory_size=32)
+        finally:
+            await client.close()
+
+    result = serve_and_run(tmp_path, client_code)
+    assert result["halted"] and result["registers"]["AC"] == 42
+
+
+def test_half_closed_client_still_gets_every_result(tmp_path):
+    async def client_code(path):
+        reader, writer = await asyncio.open_unix_connection(path)
+        for request_id in range(3):
+            request = {"id": request_id, "program": ["LOAD 5", "ADD 5", "HLT"], "data": {"5": request_id},
+                       "memory_size": 8}
+            writer.write(json.dumps(request).encode() + b"\n")
+        await writer.drain()
+        writer.write_eof()
+        replies = [json.loads(line) for line in (await reader.read()).splitlines()]
+        writer.close()
+        return replies
+
+    replies = serve_and_run(tmp_path, client_code)
+    assert sorted((reply["id"], reply["result"]["registers"]["AC"]) for reply in replies) == \
+        [(0, 0), (1, 2), (2, 4)]
@@ -0,0 +1,64 @@
+import pytest
+
+from cpusim import isa
+from cpusim.trace_file import TraceFileError, TraceReader, TraceWriter
+from cpusim.tracing import render_record
+
+
+def record(index):
+    # LOADs from address index % 5, with one word beyond int64 that is stored wrapped
+    value = (1 << 64) + index if index == 7 else index * 10
+    return index % 3, (isa.LOAD, index % 5, f"LOAD {index % 5}"), index, index + 1, value
+
+
+def write(path, count, block_records=4, keep=None):
+    writer = TraceWriter(str(path), block_records)
+    for index in range(count):
+        writer.append(2 * index + 1, record(index))
+    if keep is not None:
+        writer.truncate(keep)
+    writer.close()
+    return TraceReader(str(path))
+
+
+def test_records_and_columns_round_trip(tmp_path):
+    with write(tmp_path / "run.trace", 10) as reader:
+        assert len(reader) == 10 and reader.block_count == 3
+        for index in range(10):
+            cycle, read = reader.record(index)
+            expected = record(index)
+            assert cycle == 2 * index + 1
+            assert read[:2] == expected[:2]
+            assert read[4] == (index if index == 7 else expected[4])
+        assert list(reader.columns(1)[0]) == [9, 11, 13, 15]
+        assert list(reader.columns(2)[1]) == [2, 0]
+        assert reader.find_cycle(8) == 4 and reader.find_cycle(100) == 10
+        assert list(reader.matching(2)) == [2, 5, 7, 8]
+
+
+def test_truncation_into_a_flushed_block(tmp_path):
+    with write(tmp_path / "run.trace", 10, keep=6) as reader:
+        assert len(reader) == 6
+        assert [reader.cycle(index) for index in range(6)] == [1, 3, 5, 7, 9, 11]
+        assert reader.line(5) == render_record(record(5))
+
+    # Appending after a truncation continues from the kept records
+    writer = TraceWriter(str(tmp_path / "again.trace"), 4)
+    for index in range(10):
+        writer.append(index, record(index))
+    writer.truncate(3)
+    writer.append(50, record(9))
+    writer.close()
+    with TraceReader(str(tmp_path / "again.trace")) as reader:
+        assert [reader.cycle(index) for index in range(4)] == [0, 1, 2, 50]
+        assert reader.record(3)[1][1] == record(9)[1]
+
+
+def test_not_a_trace_file(tmp_path):
+    path = tmp_path / "empty.trace"
+    path.write_bytes(b"")
+    with pytest.raises(TraceFileError):
+        TraceReader(str(path))
+    path.write_bytes(b"x" * 100)
+    with pytest.raises(TraceFileError):
+        TraceReader(str(path))